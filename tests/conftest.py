@@ -0,0 +1,18 @@
+import pytest
+
+from tradeguard.ingest import read_excel_file
+from tradeguard.synthetic import generate_synthetic_data
+
+SYNTHETIC_ROWS = 3000
+
+@pytest.fixture(scope='session')
+def synthetic_csv(tmp_path_factory):
+    """정답 라벨이 있는 합성 신고 CSV 경로 (세션당 한 번 생성)"""
+    prefix = str(tmp_path_factory.mktemp('synthetic') / 'decl')
+    generate_synthetic_data(prefix, SYNTHETIC_ROWS, formats=('csv',), seed=11, anomaly_rate=0.03)
+    return prefix + '.csv'
+
+@pytest.fixture
+def declarations(synthetic_csv):
+    """앱과 같은 경로로 수집한 DataFrame (테스트마다 새로 읽음)"""
+    return read_excel_file(synthetic_csv)
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from tradeguard import bench
+
+def test_broken_analysis_is_flagged_not_compared(tmp_path, monkeypatch):
+    monkeypatch.setitem(bench.ANALYSIS_FUNCTIONS, 'tariff_risk', lambda df: pd.DataFrame())
+    measurements = bench.run_benchmarks(sizes=(2000,), groups=('analysis',), data_dir=str(tmp_path))
+    stages = measurements['2000']
+    assert stages['analysis:tariff_risk']['problem'] == "정답에 이상 건이 있는데 결과가 비어 있음"
+    assert [p['stage'] for p in bench.find_problems(measurements)] == ['analysis:tariff_risk']
+
+    # 기준선에 저장하지 않고, 기준선과 비교하지도 않음
+    baseline_path = str(tmp_path / 'baseline.json')
+    bench.save_baseline({'measurements': measurements, 'timestamp': '', 'environment': {}}, baseline_path)
+    baseline = bench.load_baseline(baseline_path)
+    assert 'analysis:tariff_risk' not in baseline['2000']
+    assert 'analysis:f_rate' in baseline['2000']
+    slow = {'2000': {'analysis:tariff_risk': dict(stages['analysis:tariff_risk'], seconds=1000.0)}}
+    assert bench.find_regressions(slow, {'2000': {'analysis:tariff_risk': {'seconds': 0.001}}}) == []
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from tradeguard.analysis import ANALYSIS_KEY_MAP, CUBE_DIMENSIONS, build_risk_cube, run_analyses
+from tradeguard.constants import COL_ACCEPTANCE_DATE, COL_IMPORT_DEC_NO
+
+FAST_OPTIONS = ["8% 환급 검토", "0% 세율 위험", "F세율 적용", "무상운임 누락"]
+
+def test_cube_months_from_acceptance_date(declarations):
+    results = run_analyses(declarations, FAST_OPTIONS, {})
+    cube = results['cube']
+    assert list(cube.columns[:len(CUBE_DIMENSIONS)]) == CUBE_DIMENSIONS
+    assert cube['수리월'].astype(str).str.match(r'^\d{4}-\d{2}$').all()
+    expected = sum(len(results[ANALYSIS_KEY_MAP[o]]) for o in FAST_OPTIONS)
+    assert cube['행수'].sum() == expected
+
+def test_cube_without_acceptance_date_uses_unknown_month(declarations):
+    df = declarations.drop(columns=[COL_ACCEPTANCE_DATE])
+    results = run_analyses(df, FAST_OPTIONS, {})
+    cube = results['cube']
+    assert len(cube) > 0
+    assert set(cube['수리월'].astype(str)) == {'미상'}
+
+def test_cube_from_results_without_declaration_number():
+    df = pd.DataFrame({COL_IMPORT_DEC_NO: ['1', '2']})
+    cube = build_risk_cube(df, {'f_rate': pd.DataFrame({'금액': [1.0]})})
+    assert cube.empty
@@ -0,0 +1,76 @@
+import os
+import shutil
+
+from tradeguard.daemon import FolderWatcher
+
+def test_watch_skips_duplicates_and_unchanged_files(tmp_path, synthetic_csv):
+    first = tmp_path / 'a.csv'
+    copy = tmp_path / 'b.csv'
+    shutil.copy(synthetic_csv, first)
+    shutil.copy(synthetic_csv, copy)
+
+    watcher = FolderWatcher(str(tmp_path), analysis_options=['F세율 적용'], formats=('html',),
+                            workers=1, settle_seconds=0)
+    watcher.run(once=True)
+    files = watcher.state['files']
+    assert files[str(first)]['status'] == 'done'
+    assert files[str(copy)]['status'] == 'duplicate'
+    assert files[str(copy)]['duplicate_of'] == str(first)
+    assert (tmp_path / 'a.tradeguard.html').exists()
+    assert not (tmp_path / 'b.tradeguard.html').exists()
+
+    # 재시작 후에도 상태 파일로 처리한 파일을 건너뜀, 결과 파일은 입력으로 보지 않음
+    watcher = FolderWatcher(str(tmp_path), settle_seconds=0)
+    assert watcher.scan() == []
+
+    # 수정 시각만 바뀐 파일은 해시로 걸러냄
+    stat = os.stat(first)
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+    assert watcher.scan() == []
+    assert watcher.state['files'][str(first)]['mtime_ns'] == stat.st_mtime_ns - 10 ** 9
+
+    # 내용이 바뀐 파일과 사라진 파일
+    with open(first, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    os.remove(copy)
+    todo = watcher.scan()
+    assert [path for path, _, _ in todo] == [str(first)]
+    assert str(copy) not in watcher.state['files']
+
+def test_watch_ignores_synthetic_truth_files(tmp_path, synthetic_csv):
+    shutil.copytree(os.path.dirname(synthetic_csv), tmp_path / 'in')
+    assert (tmp_path / 'in' / 'decl.truth.csv').exists()
+
+    watcher = FolderWatcher(str(tmp_path / 'in'), settle_seconds=0)
+    assert [path for path, _, _ in watcher.scan()] == [str(tmp_path / 'in' / 'decl.csv')]
+
+def test_watch_reprocesses_renamed_files(tmp_path, synthetic_csv):
+    first = tmp_path / 'a.csv'
+    copy = tmp_path / 'b.csv'
+    shutil.copy(synthetic_csv, first)
+    shutil.copy(synthetic_csv, copy)
+
+    watcher = FolderWatcher(str(tmp_path), analysis_options=['F세율 적용'], formats=('html',),
+                            workers=1, settle_seconds=0)
+    watcher.run(once=True)
+    assert watcher.state['files'][str(copy)]['duplicate_of'] == str(first)
+
+    # 원본 이름이 바뀌면 원본이 사라진 중복 파일이 다시 처리되고, 새 이름은 그 중복이 됨
+    renamed = tmp_path / 'c.csv'
+    os.rename(first, renamed)
+    todo = watcher.scan()
+    assert [path for path, _, _ in todo] == [str(copy)]
+    files = watcher.state['files']
+    assert str(first) not in files
+    assert files[str(renamed)]['status'] == 'duplicate'
+    assert files[str(renamed)]['duplicate_of'] == str(copy)
+
+    # 중복이 아닌 단독 파일의 이름만 바뀌어도 새 경로에서 다시 처리
+    watcher = FolderWatcher(str(tmp_path), analysis_options=['F세율 적용'], formats=('html',),
+                            workers=1, settle_seconds=0)
+    watcher.run(once=True)
+    assert (tmp_path / 'b.tradeguard.html').exists()
+    moved = tmp_path / 'd.csv'
+    os.rename(copy, moved)
+    os.remove(renamed)
+    assert [path for path, _, _ in watcher.scan()] == [str(moved)]
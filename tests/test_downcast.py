@@ -0,0 +1,23 @@
+import json
+
+import pandas as pd
+
+from tradeguard.analysis import ANALYSIS_KEY_MAP, run_analyses
+from tradeguard.ingest import read_excel_file
+
+OPTIONS = [o for o in ANALYSIS_KEY_MAP if ANALYSIS_KEY_MAP[o] != 'summary']
+
+def test_downcast_keeps_analysis_results(synthetic_csv):
+    downcast = read_excel_file(synthetic_csv, downcast_mb=0)
+    plain = read_excel_file(synthetic_csv, downcast_mb=-1)
+    assert json.loads(downcast.attrs['memory_report'])['downcast']
+    assert not json.loads(plain.attrs['memory_report'])['downcast']
+    assert (downcast.dtypes != plain.dtypes).any()
+
+    expected = run_analyses(plain, OPTIONS, {})
+    actual = run_analyses(downcast, OPTIONS, {})
+    assert set(actual) == set(expected)
+    for key, data in expected.items():
+        if isinstance(data, pd.DataFrame):
+            pd.testing.assert_frame_equal(actual[key].reset_index(drop=True), data.reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False, obj=key)
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from tradeguard import jobs
+from tradeguard.jobs import AnalysisJob, JobScheduler
+
+MB = 1024 * 1024
+
+class GatedJob(AnalysisJob):
+    """gate가 열릴 때까지 실행 중으로 남는 작업 (메모리 추정치 고정)"""
+
+    def __init__(self, df, gate, memory_mb, session_id=None):
+        super().__init__('hash', df, [], None, session_id=session_id)
+        self.memory_bytes = int(memory_mb * MB)
+        self.gate = gate
+
+    def run(self, timings):
+        self.status = 'running'
+        self.started_at = time.time()
+        self.gate.wait(10)
+        self.finished_at = time.time()
+        self.status = 'done'
+
+def wait_released(scheduler, job, timeout=30):
+    """작업이 끝나고 스케줄러가 원본 해제/정리까지 마칠 때까지 대기"""
+    deadline = time.time() + timeout
+    while (not job.finished or job.id in scheduler.running) and time.time() < deadline:
+        time.sleep(0.02)
+    assert job.finished and job.id not in scheduler.running
+
+@pytest.fixture
+def small_df(declarations):
+    return declarations.head(200)
+
+def test_finished_job_releases_input(small_df):
+    scheduler = JobScheduler(max_workers=1)
+    job = scheduler.submit(AnalysisJob('hash', small_df, ['F세율 적용'], None))
+    wait_released(scheduler, job)
+    assert job.status == 'done'
+    assert job.df is None
+    assert job.manifest['input']['rows'] == len(small_df)
+    assert job.memory_bytes == sum(int(job.results[key].memory_usage(deep=True).sum()) for key in job.keys
+                                   if isinstance(job.results.get(key), pd.DataFrame))
+    assert scheduler.memory_in_use() == job.memory_bytes
+
+def test_finished_job_always_has_finished_at(small_df):
+    scheduler = JobScheduler(max_workers=1)
+    job = scheduler.submit(AnalysisJob('hash', small_df, ['F세율 적용', '세율 위험'], None))
+    deadline = time.time() + 30
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.001)
+    assert job.finished
+    assert job.finished_at is not None
+    assert job.finished_at >= job.started_at
+    wait_released(scheduler, job)
+
+def test_retained_results_are_evicted_for_new_jobs(small_df):
+    scheduler = JobScheduler(max_workers=2, memory_budget_mb=100, session_budget_mb=100)
+    gate = threading.Event()
+    gate.set()
+    old = scheduler.submit(GatedJob(small_df, gate, 10))
+    wait_released(scheduler, old)
+    with scheduler.lock:
+        old.memory_bytes = 60 * MB  # 보관 결과가 예산 대부분을 차지
+    assert scheduler.memory_in_use() == 60 * MB
+
+    new = scheduler.submit(GatedJob(small_df, threading.Event(), 50))
+    assert new not in scheduler.pending
+    assert scheduler.get(old.id) is None
+    new.gate.set()
+
+def test_eviction_never_drops_session_results(small_df):
+    scheduler = JobScheduler(max_workers=1)
+    results = {}
+    first = scheduler.submit(AnalysisJob('hash', small_df, ['F세율 적용'], results, session_id='s'))
+    wait_released(scheduler, first)
+    second = scheduler.submit(AnalysisJob('hash', small_df, ['F세율 적용', '무상운임 누락'], results, session_id='s'))
+    wait_released(scheduler, second)
+    assert first.keys == ['f_rate'] and second.keys == ['free_freight']
+    # 세션 저장소가 보관하는 결과는 작업을 제거해도 풀리지 않으므로 예산에 넣지 않음
+    assert first.memory_bytes == second.memory_bytes == 0
+
+    owned = scheduler.submit(AnalysisJob('hash', small_df, ['F세율 적용'], None, session_id='t'))
+    wait_released(scheduler, owned)
+    assert owned.memory_bytes > 0
+    assert scheduler.memory_in_use() == owned.memory_bytes
+
+    # 예산이 모자라면 작업 전용 결과만 제거, 다른 세션의 저장소 결과는 그대로
+    scheduler.memory_budget = 1
+    gate = threading.Event()
+    gate.set()
+    third = scheduler.submit(GatedJob(small_df, gate, 0))
+    wait_released(scheduler, third)
+    assert scheduler.get(owned.id) is None
+    assert scheduler.get(first.id) is first and scheduler.get(second.id) is second
+    assert 'f_rate' in results and 'free_freight' in results
+
+def test_long_waiting_job_is_not_skipped(small_df, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_MAX_WAIT_SECONDS', 30)
+    scheduler = JobScheduler(max_workers=4, memory_budget_mb=100, session_budget_mb=100)
+    gate = threading.Event()
+    try:
+        scheduler.submit(GatedJob(small_df, gate, 60))
+        large = scheduler.submit(GatedJob(small_df, gate, 60))
+        assert large in scheduler.pending
+
+        # 막 대기열에 들어간 큰 작업은 작은 작업이 앞지를 수 있음
+        small = scheduler.submit(GatedJob(small_df, gate, 10))
+        assert small.id in scheduler.running
+
+        # 오래 기다린 작업 뒤로는 앞지르기 불가
+        large.submitted_at -= 60
+        later = scheduler.submit(GatedJob(small_df, gate, 10))
+        assert later in scheduler.pending
+        assert scheduler.queue_position(large) == 1
+        assert later.queue_reason == "오래 기다린 앞선 작업이 먼저 실행됩니다."
+    finally:
+        gate.set()
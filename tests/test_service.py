@@ -0,0 +1,117 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from tradeguard.analysis import _read_usage_rate_hsk, load_usage_rate_hsk
+from tradeguard.service import create_server
+
+@pytest.fixture(scope='module')
+def server():
+    server = create_server(host='127.0.0.1', port=0, workers=1, max_upload_mb=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        data = response.read()
+        if response.getheader('Content-Type', '').startswith('application/json'):
+            data = json.loads(data)
+        return response.status, data
+    finally:
+        connection.close()
+
+@pytest.fixture(scope='module')
+def finished_job(server, synthetic_csv):
+    with open(synthetic_csv, 'rb') as f:
+        body = f.read()
+    status, job = request(server, 'POST', '/jobs?filename=decl.csv&analyses=f_rate,free_freight', body)
+    assert status == 202
+    deadline = time.time() + 60
+    while job['status'] in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.1)
+        _, job = request(server, 'GET', job['status_url'])
+    assert job['status'] == 'done'
+    return job
+
+def test_health_and_unknown_path(server):
+    assert request(server, 'GET', '/health')[0] == 200
+    assert request(server, 'GET', '/nope')[0] == 404
+    assert request(server, 'GET', '/jobs/0123456789ab')[0] == 404
+
+def test_warm_up_caches_reference_data(server):
+    # create_server에서 warm_up이 끝나 있어야 함 (따옴표 없는 쉼표가 있는 행도 포함)
+    assert _read_usage_rate_hsk.cache_info().currsize >= 1
+    hits = _read_usage_rate_hsk.cache_info().hits
+    hsk = load_usage_rate_hsk()
+    assert _read_usage_rate_hsk.cache_info().hits == hits + 1
+    assert len(hsk) > 200
+    assert hsk['8205599000'][0] == '광산용, 토목공사용 / 미장용과 도장용 / 시계 제조용'
+    status, health = request(server, 'GET', '/health')
+    assert health['status'] == 'ok' and health['reference_errors'] == {}
+
+def test_upload_validation(server):
+    assert request(server, 'POST', '/jobs', b'')[0] == 400
+    assert request(server, 'POST', '/jobs?analyses=nope', b'a,b\n1,2\n')[0] == 400
+    assert request(server, 'POST', '/jobs', b'a,b', {'Content-Length': 'abc'})[0] == 400
+
+    # 본문을 보내기 전에 Content-Length만으로 거절
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=60)
+    connection.putrequest('POST', '/jobs')
+    connection.putheader('Content-Length', str(1024 * 1024 + 1))
+    connection.endheaders()
+    assert connection.getresponse().status == 413
+    connection.close()
+
+@pytest.mark.parametrize('path, headers', [('/nope', {}), ('/jobs', {'Content-Length': 'abc'})])
+def test_unread_upload_closes_connection(server, path, headers):
+    # 읽지 않은 본문이 같은 연결의 다음 요청으로 해석되면 안 됨
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=60)
+    try:
+        connection.request('POST', path, body=b'GET /health HTTP/1.1\r\n\r\n', headers=headers)
+        response = connection.getresponse()
+        response.read()
+        assert response.status in (400, 404)
+        assert response.getheader('Connection') == 'close'
+        assert response.will_close
+    finally:
+        connection.close()
+
+def test_fully_read_upload_keeps_connection(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=60)
+    try:
+        connection.request('POST', '/jobs?analyses=nope', body=b'a,b\n1,2\n')
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 400
+        assert not response.will_close
+        connection.request('GET', '/health')
+        assert connection.getresponse().status == 200
+    finally:
+        connection.close()
+
+def test_result_json_and_limit(server, finished_job):
+    status, data = request(server, 'GET', finished_job['result_url'] + '?limit=2')
+    assert status == 200
+    for result in data['results'].values():
+        assert len(result['table']['data']) <= 2
+
+@pytest.mark.parametrize('query', ['limit=abc', 'limit=-1', 'format=pdf'])
+def test_result_bad_parameters(server, finished_job, query):
+    status, data = request(server, 'GET', f"{finished_job['result_url']}?{query}")
+    assert status == 400
+    assert 'error' in data
+
+def test_internal_errors_are_500(server, finished_job, monkeypatch):
+    def broken(job, fmt='json', limit=None):
+        raise ValueError("내부 오류")
+    monkeypatch.setattr(server.service, 'job_result', broken)
+    assert request(server, 'GET', finished_job['result_url'])[0] == 500
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from tradeguard.constants import COL_ACCEPTANCE_DATE, COL_CURRENCY, COL_IMPORT_DEC_NO, COL_LINE_NO
+from tradeguard.store import STORE_MONTH_COLUMN, STORE_UNKNOWN_MONTH, DeclarationStore
+
+@pytest.fixture
+def store(tmp_path):
+    return DeclarationStore(str(tmp_path / 'store'))
+
+def test_append_partitions_by_month(store, declarations):
+    record = store.append(declarations, 'A', source='all.csv')
+    assert record['added'] == len(declarations)
+    assert record['replaced'] == record['skipped'] == 0
+    assert record['deduplicated']
+    partitions = store.partitions()
+    assert partitions['행 수'].sum() == len(declarations)
+    assert sorted(partitions[STORE_MONTH_COLUMN]) == record['partitions']
+    assert store.clients() == ['A']
+
+def test_reupload_replaces_or_skips_same_keys(store, declarations):
+    store.append(declarations, 'A')
+    corrected = declarations.head(50).copy()
+    corrected[COL_CURRENCY] = 'JPY'
+
+    record = store.append(corrected, 'A', replace=False)
+    assert (record['added'], record['replaced'], record['skipped']) == (0, 0, 50)
+    assert len(store.load(['A'])) == len(declarations)
+
+    record = store.append(corrected, 'A')
+    assert (record['added'], record['replaced']) == (0, 50)
+    loaded = store.load(['A'])
+    assert len(loaded) == len(declarations)
+    keys = set(corrected[COL_IMPORT_DEC_NO].astype(str))
+    assert (loaded.loc[loaded[COL_IMPORT_DEC_NO].isin(keys), COL_CURRENCY] == 'JPY').sum() >= 50
+
+def test_duplicates_within_upload_keep_last(store, declarations):
+    part = declarations.head(20)
+    doubled = pd.concat([part, part.assign(**{COL_CURRENCY: 'JPY'})])
+    doubled.attrs = declarations.attrs
+    record = store.append(doubled, 'A')
+    assert (record['added'], record['skipped']) == (20, 20)
+    assert (store.load(['A'])[COL_CURRENCY] == 'JPY').all()
+
+def test_missing_key_column_appends_without_dedup(store, declarations):
+    df = declarations.head(20).drop(columns=[COL_LINE_NO])
+    store.append(df, 'A')
+    record = store.append(df, 'A')
+    assert not record['deduplicated']
+    assert len(store.load(['A'])) == 40
+
+def test_load_period_and_filters(store, declarations):
+    store.append(declarations, 'A')
+    store.append(declarations.head(10), 'B')
+    dates = pd.to_numeric(declarations[COL_ACCEPTANCE_DATE], errors='coerce')
+    month = sorted((dates // 100).dropna().unique())[1]
+    start = f"{int(month) // 100}-{int(month) % 100:02d}"
+
+    loaded = store.load(['A'], start=start, end=start)
+    assert len(loaded) == int(((dates // 100) == month).sum())
+    assert set(loaded[STORE_MONTH_COLUMN]) == {start}
+
+    day = int(dates[(dates // 100) == month].min())
+    assert len(store.load(['A'], start=str(day), end=str(day))) == int((dates == day).sum())
+
+    usd = store.load(['A'], filters=[(COL_CURRENCY, '==', 'USD')])
+    assert len(usd) == int((declarations[COL_CURRENCY].astype(str) == 'USD').sum())
+    assert len(store.load()) == len(declarations) + 10
+
+def test_rows_without_date_go_to_unknown_month(store, declarations):
+    df = declarations.head(5).copy()
+    df[COL_ACCEPTANCE_DATE] = None
+    record = store.append(df, 'A')
+    assert record['partitions'] == [STORE_UNKNOWN_MONTH]
+    # 기간을 지정하면 수리월 미상 파티션은 제외
+    assert len(store.load(['A'], start='2000-01')) == 0
+    assert len(store.load(['A'])) == 5
+
+def test_invalid_filter_operator(store, declarations):
+    store.append(declarations.head(5), 'A')
+    with pytest.raises(ValueError):
+        store.load(['A'], filters=[(COL_CURRENCY, 'like', 'US%')])
@@ -0,0 +1,13 @@
+import pandas as pd
+
+from tradeguard.analysis import ANALYSIS_KEY_MAP, run_analyses
+from tradeguard.synthetic import SYNTHETIC_RULES, evaluate_against_truth
+
+def test_every_rule_recovers_injected_anomalies(synthetic_csv, declarations):
+    truth = pd.read_csv(synthetic_csv[:-len('.csv')] + '.truth.csv', dtype=str)
+    results = run_analyses(declarations, list(ANALYSIS_KEY_MAP), {})
+    report = evaluate_against_truth(results, truth).set_index('규칙')
+    assert list(report.index) == SYNTHETIC_RULES
+    assert (report['정답'] > 0).all(), report[report['정답'] == 0]
+    assert (report['재현율'] == 1.0).all(), report[report['재현율'] < 1.0]
+    assert (report['정밀도'] == 1.0).all(), report[report['정밀도'] < 1.0]
@@ -0,0 +1,15 @@
+"""TradeGuard 수입신고 Risk 분석 코어
+
+Streamlit 없이 import 가능한 분석/보고서 모듈 모음. UI는 trade_guard_app.py 참고.
+python-docx, plotly, xlsxwriter는 보고서/차트를 처음 만들 때 로드된다.
+"""
+from .constants import *
+from .ingest import (
+    safe_numeric_conversion, normalize_column_names, map_columns,
+    calculate_duty_per_row, format_date_columns, read_excel_file
+)
+from .analysis import (
+    ANALYSIS_KEY_MAP, ANALYSIS_FUNCTIONS, make_options_key, run_analyses,
+    build_risk_cube, create_summary_analysis
+)
+from .reports import create_excel_file, create_word_document, create_html_report
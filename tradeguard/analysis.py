@@ -0,0 +1,939 @@
+"""수입신고 Risk 분석 (Streamlit 비의존)"""
+import functools
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+from .ingest import safe_numeric_conversion, calculate_duty_per_row
+from .perf import output_size, stage
+
+logger = logging.getLogger(__name__)
+
+# --- Thresholds ---
+
+ZERO_RISK_RATE_THRESHOLD = 8  # 0% Risk: 관세실행세율이 이 값 미만이고 FTA 세율이 아닌 건
+PRICE_Z_THRESHOLD = 1.96  # 단가 Risk: 규격별 Z-Score 절대값 기준 (95% 신뢰구간 밖)
+PRICE_MIN_SPEC_ROWS = 3  # 단가 Risk: 통계를 낼 최소 규격 행 수
+LOW_PRICE_THRESHOLD = 10  # 저단가: 단가가 이 값 이하인 건
+FREE_FREIGHT_INCOTERMS = ['EXW', 'FOB']  # 무상운임: 입력운임이 있어야 하는 인도조건
+
+# 실행 기록(manifest)에 남기는 분석 기준값
+ANALYSIS_THRESHOLDS = {
+    'zero_risk_rate': ZERO_RISK_RATE_THRESHOLD,
+    'price_z_score': PRICE_Z_THRESHOLD,
+    'price_min_spec_rows': PRICE_MIN_SPEC_ROWS,
+    'low_price': LOW_PRICE_THRESHOLD,
+    'free_freight_incoterms': FREE_FREIGHT_INCOTERMS
+}
+
+def _fill_missing(frame, value):
+    """결과 표의 결측값 채우기 (수집 시 다운캐스팅된 범주형/Arrow 문자열 컬럼은 object로 되돌린 뒤 채움)"""
+    compact = {col: object for col, dtype in frame.dtypes.items()
+               if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))}
+    return (frame.astype(compact) if compact else frame).fillna(value)
+
+def _clean_text(series):
+    """결측은 빈 문자열로, 나머지는 문자열 공백 제거 (dtype 무관)"""
+    return series.astype(object).where(series.notna(), '').astype(str).str.strip()
+
+# --- Existing Analysis Functions ---
+
+def create_eight_percent_refund_analysis(df):
+    """8% 환급 검토 분석"""
+    try:
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [
+            COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+            COL_HS_CODE, COL_RATE_TYPE, COL_RATE_DESC, COL_TARIFF_RATE, 
+            COL_EXPORT_COUNTRY, COL_ORIGIN_COUNTRY, COL_FTA_REVIEW, 
+            COL_SPEC_1, COL_SPEC_2, COL_SPEC_3, COL_COMP_1, COL_COMP_2, COL_COMP_3,
+            COL_ACTUAL_DUTY, COL_PAYMENT_METHOD, COL_CURRENCY, COL_TRADE_NAME, 
+            COL_LINE_NO, COL_ROW_NO, COL_QTY_1, COL_UNIT_1, COL_UNIT_PRICE, 
+            COL_AMOUNT, COL_LINE_PAYMENT_AMT, COL_ROW_DUTY
+        ]
+        
+        available_cols = [c for c in target_cols if c in df.columns and c not in [COL_ROW_DUTY, COL_FTA_REVIEW]]
+        df_work = df[available_cols].copy()
+        
+        df_work[COL_RATE_TYPE] = df_work[COL_RATE_TYPE].astype(str).str.strip()
+        df_work[COL_TARIFF_RATE] = safe_numeric_conversion(df_work[COL_TARIFF_RATE])
+        
+        df_work[COL_ROW_DUTY] = calculate_duty_per_row(df_work)
+        
+        if COL_EXPORT_COUNTRY in df_work.columns and COL_ORIGIN_COUNTRY in df_work.columns:
+            export_country = _clean_text(df_work[COL_EXPORT_COUNTRY])
+            df_work[COL_FTA_REVIEW] = np.where(
+                df_work[COL_EXPORT_COUNTRY].notna() & df_work[COL_ORIGIN_COUNTRY].notna() &
+                (export_country == _clean_text(df_work[COL_ORIGIN_COUNTRY])) & (export_country != ''),
+                'FTA사후환급 검토', ''
+            )
+        else:
+            df_work[COL_FTA_REVIEW] = ''
+            
+        df_filtered = df_work[
+            (df_work[COL_RATE_TYPE] == 'A')
+        ]
+        
+        final_cols = [c for c in target_cols if c in df_filtered.columns and c != COL_LINE_PAYMENT_AMT]
+        return _fill_missing(df_filtered[final_cols], 0)
+        
+    except Exception as e:
+        logger.error(f"8% 환급 검토 분석 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def create_zero_percent_risk_analysis(df):
+    """0% Risk 분석"""
+    try:
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [
+            COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+            COL_HS_CODE, COL_RATE_TYPE, COL_TARIFF_RATE, COL_SPEC_1, COL_SPEC_2, 
+            COL_COMP_1, COL_ACTUAL_DUTY, COL_TRADE_NAME, COL_LINE_NO, COL_ROW_NO, 
+            COL_QTY_1, COL_UNIT_1, COL_UNIT_PRICE, COL_AMOUNT, COL_LINE_PAYMENT_AMT, COL_ROW_DUTY
+        ]
+        
+        df['세율구분_str'] = df[COL_RATE_TYPE].astype(str).str.strip()
+        df_zero_risk = df[
+            (df[COL_TARIFF_RATE] < ZERO_RISK_RATE_THRESHOLD) & 
+            (~df['세율구분_str'].str.match(r'^F.{3}$')) & 
+            (~df['세율구분_str'].str.startswith('FR'))
+        ].copy()
+        
+        available_cols = [c for c in target_cols if c in df_zero_risk.columns and c != COL_ROW_DUTY]
+        df_zero_risk = df_zero_risk[available_cols].copy()
+        
+        df_zero_risk[COL_ROW_DUTY] = calculate_duty_per_row(df_zero_risk)
+        
+        final_cols = [c for c in target_cols if c in df_zero_risk.columns and c != COL_LINE_PAYMENT_AMT]
+        return _fill_missing(df_zero_risk[final_cols], 0)
+        
+    except Exception as e:
+        logger.error(f"0% Risk 분석 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def create_tariff_risk_analysis(df):
+    """세율 Risk 분석"""
+    try:
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        required_cols = [
+            COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+            COL_SPEC_1, COL_SPEC_2, COL_SPEC_3, COL_COMP_1, COL_COMP_2, COL_COMP_3, 
+            COL_HS_CODE, COL_RATE_TYPE, COL_RATE_DESC, COL_TAXABLE_USD, COL_ACTUAL_DUTY, 
+            COL_PAYMENT_METHOD, COL_AMOUNT, COL_LINE_PAYMENT_AMT, COL_TRADE_NAME
+        ]
+        
+        if COL_SPEC_1 not in df.columns or COL_HS_CODE not in df.columns:
+            return pd.DataFrame()
+            
+        risk_specs = df.groupby(COL_SPEC_1)[COL_HS_CODE].nunique()
+        risk_specs = risk_specs[risk_specs > 1]
+        
+        if len(risk_specs) == 0:
+            return pd.DataFrame()
+            
+        available_cols = [c for c in required_cols if c in df.columns]
+        # 관세실행세율 등 표시용 컬럼도 함께 선택 (아래 final_cols에서 앞쪽에 배치)
+        display_cols = [COL_SPEC_1, COL_HS_CODE, COL_TARIFF_RATE, COL_TAX_CLASSIFICATION, COL_TRADE_NAME]
+        selected_cols = available_cols + [c for c in display_cols if c in df.columns and c not in available_cols]
+        risk_data = df[df[COL_SPEC_1].isin(risk_specs.index)][selected_cols].copy()
+        
+        risk_data[COL_ROW_DUTY] = calculate_duty_per_row(risk_data)
+        
+        risk_data = _fill_missing(risk_data.sort_values([COL_SPEC_1, COL_HS_CODE]), '')
+        
+        final_cols = [c for c in available_cols if c != COL_LINE_PAYMENT_AMT]
+        
+        # display_cols에 있는 컬럼 중 available_cols에 없는 것 추가
+        for col in display_cols:
+            if col in df.columns and col not in final_cols:
+                final_cols.insert(min(2, len(final_cols)), col)
+        
+        if COL_ROW_DUTY not in final_cols:
+            final_cols.append(COL_ROW_DUTY)
+            
+        return risk_data[final_cols]
+        
+    except Exception as e:
+        logger.error(f"세율 Risk 분석 중 오류 발생: {e}")
+        return pd.DataFrame()
+
+def create_price_risk_analysis(df):
+    """단가 Risk 분석 (Z-Score 기반)"""
+    try:
+        if COL_UNIT_PRICE not in df.columns or COL_SPEC_1 not in df.columns:
+            return pd.DataFrame()
+            
+        # 분석에 필요한 컬럼 정의
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_HS_CODE, COL_TRADE_NAME, COL_SPEC_1, COL_UNIT_PRICE, COL_CURRENCY, COL_AMOUNT, COL_QTY_1]
+        available_cols = [c for c in target_cols if c in df.columns]
+        
+        df_work = df.copy()
+        df_work[COL_UNIT_PRICE] = safe_numeric_conversion(df_work[COL_UNIT_PRICE])
+        # 단가가 0보다 큰 건만 분석
+        df_work = df_work[df_work[COL_UNIT_PRICE] > 0]
+        
+        if len(df_work) == 0:
+            return pd.DataFrame()
+
+        # 규격1별 통계 산출 (평균, 표준편차)
+        # 데이터 개수(count)가 적으면(예: 3개 미만) 통계적 유의성이 낮으므로 Z-Score 계산에서 제외하거나 주의 필요
+        # 여기서는 최소 3건 이상인 규격만 분석 대상으로 삼음
+        stats = df_work.groupby(COL_SPEC_1)[COL_UNIT_PRICE].agg(['mean', 'std', 'count']).reset_index()
+        stats = stats[stats['count'] >= PRICE_MIN_SPEC_ROWS] 
+
+        if len(stats) == 0:
+            return pd.DataFrame()
+
+        # 원본 데이터에 통계 매핑
+        df_merged = pd.merge(df_work, stats, on=COL_SPEC_1, how='inner')
+
+        # Z-Score 계산: (단가 - 평균) / 표준편차
+        # 표준편차가 0인 경우(모든 단가가 동일)는 Z-Score 0으로 처리
+        df_merged['z_score'] = np.where(
+            df_merged['std'] > 0,
+            (df_merged[COL_UNIT_PRICE] - df_merged['mean']) / df_merged['std'],
+            0
+        )
+
+        # 이상치 필터링 (Z-Score 절대값이 1.96 이상인 경우 - 95% 신뢰구간 밖)
+        # 1.96은 통계적으로 유의미한 이상치 기준 중 하나 (약 상위/하위 2.5%)
+        threshold = PRICE_Z_THRESHOLD
+        outliers = df_merged[abs(df_merged['z_score']) > threshold].copy()
+        
+        if len(outliers) == 0:
+            return pd.DataFrame()
+
+        # 보기 좋게 반올림
+        outliers['Z-Score'] = outliers['z_score'].round(2)
+        outliers['평균단가'] = outliers['mean'].round(2)
+        outliers['표준편차'] = outliers['std'].round(2)
+        
+        # 정렬: Z-Score 절대값이 높은 순서대로 (가장 이상한 것부터)
+        outliers = outliers.sort_values(by='Z-Score', key=abs, ascending=False)
+        
+        final_cols = available_cols + ['Z-Score', '평균단가', '표준편차']
+        return outliers[final_cols]
+        
+    except Exception as e:
+        logger.error(f"단가 Risk 분석 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def create_domestic_tax_code_analysis(df):
+    """내국세구분 분석"""
+    try:
+        if COL_HS_CODE not in df.columns:
+            return pd.DataFrame()
+            
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [
+            COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+            COL_HS_CODE, COL_RATE_TYPE, COL_TARIFF_RATE, COL_INTERNAL_TAX_CODE, 
+            COL_SPEC_1, COL_SPEC_2, COL_SPEC_3, COL_COMP_1, COL_COMP_2, COL_COMP_3, 
+            COL_ACTUAL_DUTY, COL_TRADE_NAME, COL_LINE_NO, COL_ROW_NO, COL_QTY_1, 
+            COL_UNIT_1, COL_UNIT_PRICE, COL_AMOUNT, COL_LINE_PAYMENT_AMT, COL_ROW_DUTY
+        ]
+        
+        available_cols = [c for c in target_cols if c in df.columns and c not in [COL_ROW_DUTY, COL_INTERNAL_TAX_CODE]]
+        df_work = df[available_cols].copy()
+        
+        if COL_INTERNAL_TAX_CODE not in df.columns:
+            df_work[COL_INTERNAL_TAX_CODE] = ''
+        else:
+            df_work[COL_INTERNAL_TAX_CODE] = _clean_text(df[COL_INTERNAL_TAX_CODE])
+            
+        df_work[COL_HS_CODE] = df_work[COL_HS_CODE].astype(str).str.strip()
+        
+        df_filtered = df_work[
+            (df_work[COL_HS_CODE].str.len() == 10) &
+            (df_work[COL_HS_CODE].str.startswith('22')) &
+            ((df_work[COL_INTERNAL_TAX_CODE] == '') | (df_work[COL_INTERNAL_TAX_CODE].isna()))
+        ].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+            
+        df_filtered[COL_ROW_DUTY] = calculate_duty_per_row(df_filtered)
+        
+        final_cols = [c for c in target_cols if c in df_filtered.columns and c != COL_LINE_PAYMENT_AMT]
+        return _fill_missing(df_filtered[final_cols], 0).sort_values(COL_IMPORT_DEC_NO)
+        
+    except Exception as e:
+        logger.error(f"내국세구분 분석 중 오류 발생: {str(e)}")
+        return pd.DataFrame()
+
+def _import_requirement_frame(df):
+    """수입요건 분석용 (법령 컬럼을 object로 바꾼 DataFrame, 법령 컬럼 목록), 분석 불가면 (None, [])"""
+    if COL_SPEC_1 not in df.columns or COL_IMPORT_DEC_NO not in df.columns:
+        return None, []
+    
+    # 분석 대상 컬럼 확인
+    req_cols = [COL_LAW_CODE, COL_ISSUED_DOC_NAME, COL_NON_TARGET_REASON]
+    available_cols = [col for col in req_cols if col in df.columns]
+    
+    if not available_cols:
+        return None, []
+    
+    # 범주형 법령값이 섞여도 같은 값으로 비교되도록 법령 컬럼은 object로 사용
+    return df.astype({col: object for col in available_cols}), available_cols
+
+def find_import_requirement_risk_specs(df):
+    """신고별 법령 세트가 서로 다른 규격1 목록 (규격1마다 그 규격 행만으로 판정)"""
+    df_work, available_cols = _import_requirement_frame(df)
+    if df_work is None:
+        return []
+    
+    # 신고별 법령 세트: 법령 컬럼들의 결측/공백 아닌 고유값 집합 (규격1 x 신고번호 단위로 한 번에 집계)
+    values = df_work[[COL_SPEC_1, COL_IMPORT_DEC_NO] + available_cols].melt(
+        id_vars=[COL_SPEC_1, COL_IMPORT_DEC_NO], value_vars=available_cols, value_name='법령값')
+    values = values[values['법령값'].notna() & (values['법령값'].astype(str).str.strip() != '')]
+    if values.empty:
+        return []
+    declaration_sets = values.groupby([COL_SPEC_1, COL_IMPORT_DEC_NO], sort=False, observed=True)['법령값'].agg(frozenset)
+    
+    # 세트가 있는 신고가 2개 이상이고 서로 다른 세트가 존재하면 불일치
+    set_counts = declaration_sets.groupby(level=0, sort=False).nunique()
+    return set_counts[set_counts > 1].index.tolist()
+
+def create_import_requirement_risk_analysis(df, risk_specs=None):
+    """수입요건 Risk 분석: 동일 규격1 내에서 신고별 법령 세트가 다른 경우 탐지 (개선 버전)
+    
+    불일치 규격1이 한 행이라도 있는 신고는 다른 규격 행까지 모두 결과에 포함된다.
+    risk_specs를 주면 규격 판정을 건너뛰고 그 목록으로 신고를 고른다 (증분 분석에서 전체 이력 기준 판정 사용).
+    """
+    try:
+        df_work, available_cols = _import_requirement_frame(df)
+        if df_work is None:
+            return pd.DataFrame()
+        
+        if risk_specs is None:
+            risk_specs = find_import_requirement_risk_specs(df_work)
+        
+        # 불일치 규격1의 모든 신고를 위험으로 표시
+        risk_declarations = df_work.loc[df_work[COL_SPEC_1].isin(list(risk_specs)), COL_IMPORT_DEC_NO].unique()
+        
+        if not len(risk_declarations):
+            return pd.DataFrame()
+        
+        # 위험 신고들의 상세 내역 반환
+        df_result = df_work[df_work[COL_IMPORT_DEC_NO].isin(risk_declarations)].copy()
+        df_result = df_result.sort_values(by=[COL_SPEC_1, COL_IMPORT_DEC_NO])
+        
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        display_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                        COL_SPEC_1, COL_HS_CODE] + available_cols + [COL_TRADE_NAME, COL_ORIGIN_COUNTRY]
+        final_cols = [col for col in display_cols if col in df_result.columns]
+        
+        return df_result[final_cols]
+        
+    except Exception as e:
+        logger.error(f"수입요건 Risk 분석 오류: {str(e)}")
+        return pd.DataFrame()
+
+# --- New Analysis Functions (Requested 12-19) ---
+
+def create_f_rate_analysis(df):
+    """12. F세율 (F세율이 적용되는 세번 선별)"""
+    try:
+        if COL_RATE_TYPE not in df.columns:
+            return pd.DataFrame()
+            
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_HS_CODE, COL_RATE_TYPE, COL_RATE_DESC, 
+                       COL_TARIFF_RATE, COL_TRADE_NAME, COL_SPEC_1, COL_ORIGIN_COUNTRY, COL_AMOUNT]
+        available_cols = [c for c in target_cols if c in df.columns]
+        
+        # 세율구분이 정확히 'F' (한 글자)인 건만 필터링
+        df_filtered = df[df[COL_RATE_TYPE].astype(str).str.strip() == 'F'].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+        
+        # 행별관세 계산
+        df_filtered[COL_ROW_DUTY] = calculate_duty_per_row(df_filtered)
+        
+        # 최종 컬럼에 행별관세 추가
+        final_cols = available_cols + [COL_ROW_DUTY]
+        
+        return _fill_missing(df_filtered[final_cols], '')
+    except Exception as e:
+        logger.error(f"F세율 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+def create_fta_opportunity_analysis(df):
+    """13. FTA 기회 발굴 (적출국=원산지, A세율 적용 건)"""
+    try:
+        required_cols = [COL_RATE_TYPE, COL_EXPORT_COUNTRY, COL_ORIGIN_COUNTRY, COL_TARIFF_RATE]
+        if not all(c in df.columns for c in required_cols):
+            return pd.DataFrame()
+            
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_HS_CODE, COL_RATE_TYPE, COL_TARIFF_RATE, COL_EXPORT_COUNTRY, 
+                       COL_ORIGIN_COUNTRY, COL_TAXABLE_USD, COL_TRADE_NAME, COL_AMOUNT, COL_ACTUAL_DUTY]
+        available_cols = [c for c in target_cols if c in df.columns]
+        
+        # 조건: 세율구분 'A' & 적출국 == 원산지 & 관세율 > 0
+        df_work = df.copy()
+        df_work[COL_TARIFF_RATE] = safe_numeric_conversion(df_work[COL_TARIFF_RATE])
+        
+        df_filtered = df_work[
+            (df_work[COL_RATE_TYPE].astype(str).str.strip() == 'A') &
+            (_clean_text(df_work[COL_EXPORT_COUNTRY]) == _clean_text(df_work[COL_ORIGIN_COUNTRY])) &
+            (_clean_text(df_work[COL_EXPORT_COUNTRY]) != '') &
+            (df_work[COL_TARIFF_RATE] > 0)
+        ].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+            
+        # 과세가격 기준 내림차순 정렬 (우선순위)
+        if COL_TAXABLE_USD in df_filtered.columns:
+             df_filtered[COL_TAXABLE_USD] = safe_numeric_conversion(df_filtered[COL_TAXABLE_USD])
+             df_filtered = df_filtered.sort_values(by=COL_TAXABLE_USD, ascending=False)
+             
+        return df_filtered[available_cols]
+    except Exception as e:
+        logger.error(f"FTA 기회 발굴 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+def create_low_price_analysis(df, threshold=LOW_PRICE_THRESHOLD):
+    """14. 과세가격 (단가가 낮은 신고건 선별 - 저가신고 우려)"""
+    try:
+        if COL_UNIT_PRICE not in df.columns:
+            return pd.DataFrame()
+            
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_HS_CODE, COL_TRADE_NAME, COL_SPEC_1, COL_UNIT_PRICE, 
+                       COL_CURRENCY, COL_AMOUNT, COL_PAYMENT_METHOD]
+        available_cols = [c for c in target_cols if c in df.columns]
+        
+        df_work = df.copy()
+        df_work[COL_UNIT_PRICE] = safe_numeric_conversion(df_work[COL_UNIT_PRICE])
+        
+        # 단가가 threshold(기본 10) 이하인 건
+        df_filtered = df_work[df_work[COL_UNIT_PRICE] <= threshold].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+            
+        return df_filtered[available_cols].sort_values(by=COL_UNIT_PRICE)
+    except Exception as e:
+        logger.error(f"저가신고 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+def count_country_currency(df):
+    """국가-통화 조합별 행 수 (결측 포함, 통화단위 이상치점수의 집계 상태)"""
+    return df.groupby([COL_TRADE_COUNTRY, COL_CURRENCY], observed=True, dropna=False).size().reset_index(name='count')
+
+def currency_anomaly_scores(country_counts):
+    """국가-통화 조합별 이상치점수 ((1 - 국가 내 사용 비율) * 100)"""
+    counts = country_counts[country_counts[COL_TRADE_COUNTRY].notna()]
+    totals = counts.groupby(COL_TRADE_COUNTRY, observed=True)['count'].sum().reset_index(name='total')
+    merged = pd.merge(counts[counts[COL_CURRENCY].notna()], totals, on=COL_TRADE_COUNTRY)
+    merged['ratio'] = merged['count'] / merged['total']
+    merged['이상치점수'] = ((1 - merged['ratio']) * 100).round(1)
+    return merged[[COL_TRADE_COUNTRY, COL_CURRENCY, '이상치점수']]
+
+def create_currency_consistency_analysis(df, country_counts=None):
+    """15. 통화단위 (무역거래처별 통화단위 일관성 + 이상치점수)
+    
+    country_counts(count_country_currency 결과)를 주면 이상치점수를 df 대신 그 집계로 계산한다
+    (증분 분석에서 일부 거래처만 다시 계산할 때 전체 이력 기준 점수 유지).
+    """
+    try:
+        if COL_TRADE_COMPANY not in df.columns or COL_CURRENCY not in df.columns:
+            return pd.DataFrame()
+            
+        # 거래처별 사용 통화 집계
+        grouped = df.groupby(COL_TRADE_COMPANY, observed=True)[COL_CURRENCY].unique().reset_index()
+        grouped['통화개수'] = grouped[COL_CURRENCY].apply(len)
+        
+        # 통화가 2개 이상인 거래처 필터링
+        inconsistent_companies = grouped[grouped['통화개수'] > 1][COL_TRADE_COMPANY].tolist()
+        
+        if not inconsistent_companies:
+            return pd.DataFrame()
+            
+        df_filtered = df[df[COL_TRADE_COMPANY].isin(inconsistent_companies)].copy()
+        
+        # 이상치점수 계산 (거래처-통화 조합별 빈도 기반)
+        if COL_TRADE_COUNTRY in df.columns:
+            # 국가-통화 조합별 빈도 계산
+            if country_counts is None:
+                country_counts = count_country_currency(df)
+            
+            # 결과에 이상치점수 추가
+            df_filtered = pd.merge(df_filtered, 
+                                  currency_anomaly_scores(country_counts), 
+                                  on=[COL_TRADE_COUNTRY, COL_CURRENCY], 
+                                  how='left')
+        
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_CURRENCY, '이상치점수', COL_AMOUNT]
+        available_cols = [c for c in target_cols if c in df_filtered.columns]
+        
+        df_filtered = df_filtered.sort_values(by=[COL_TRADE_COMPANY, COL_CURRENCY])
+        
+        return df_filtered[available_cols]
+    except Exception as e:
+        logger.error(f"통화단위 일관성 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+# 국가별 통화단위 불일치 분석 - 제거됨 (통화단위 불일치에 통합)
+# def create_country_currency_consistency_analysis(df):
+    """국가별 통화단위 불일치 분석 (빈도 기반 이상치 탐지)"""
+    try:
+        if COL_TRADE_COUNTRY not in df.columns or COL_CURRENCY not in df.columns:
+            return pd.DataFrame()
+        
+        df_work = df.dropna(subset=[COL_TRADE_COUNTRY, COL_CURRENCY]).copy()
+        
+        # 국가별 전체 신고 건수 계산
+        country_counts = df_work[COL_TRADE_COUNTRY].value_counts().reset_index()
+        country_counts.columns = [COL_TRADE_COUNTRY, 'total_count']
+        
+        # 국가별 통화별 신고 건수 계산
+        currency_counts = df_work.groupby([COL_TRADE_COUNTRY, COL_CURRENCY]).size().reset_index(name='count')
+        
+        # 병합
+        merged = pd.merge(currency_counts, country_counts, on=COL_TRADE_COUNTRY)
+        
+        # 비율 계산
+        merged['ratio'] = merged['count'] / merged['total_count']
+        
+        # 이상치 점수 (Anomaly Score) 계산: (1 - 비율) * 100
+        # 희귀할수록 점수가 100에 가까워짐
+        merged['anomaly_score'] = (1 - merged['ratio']) * 100
+        
+        # 통화가 1개뿐인 국가는 제외 (일관성 문제 없음)
+        multi_currency_countries = merged[merged['total_count'] > merged['count']][COL_TRADE_COUNTRY].unique()
+        merged = merged[merged[COL_TRADE_COUNTRY].isin(multi_currency_countries)]
+        
+        # 이상치 필터링 (비율 10% 미만인 경우를 '튀는 것'으로 간주)
+        outliers = merged[merged['ratio'] < 0.1].copy()
+        
+        if len(outliers) == 0:
+            return pd.DataFrame()
+        
+        # 원본 데이터와 병합하여 상세 정보 표시
+        # outlier에 해당하는 국가-통화 조합만 추출
+        target_keys = outliers[[COL_TRADE_COUNTRY, COL_CURRENCY]].drop_duplicates()
+        
+        df_result = pd.merge(df_work, target_keys, on=[COL_TRADE_COUNTRY, COL_CURRENCY], how='inner')
+        
+        # 점수 정보 추가
+        df_result = pd.merge(df_result, outliers[[COL_TRADE_COUNTRY, COL_CURRENCY, 'ratio', 'anomaly_score']], on=[COL_TRADE_COUNTRY, COL_CURRENCY], how='left')
+        
+        # 보기 좋게 포맷팅
+        df_result['사용비율'] = (df_result['ratio'] * 100).round(1).astype(str) + '%'
+        df_result['이상치점수'] = df_result['anomaly_score'].round(1)
+        
+        target_cols = [COL_TRADE_COUNTRY, COL_CURRENCY, '사용비율', '이상치점수', COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_AMOUNT]
+        available_cols = [c for c in target_cols if c in df_result.columns]
+        
+        return df_result[available_cols].sort_values(by='이상치점수', ascending=False)
+        
+    except Exception as e:
+        logger.error(f"국가별 통화단위 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+# def create_trade_type_consistency_analysis(df):
+#     """특수거래 구분 분석 - 사용자 요청으로 제거됨"""
+#     return pd.DataFrame()
+
+def create_free_charge_freight_analysis(df):
+    """17. 무상 운임 누락 (인도조건 EXW/FOB이면서 입력운임이 없는 경우)"""
+    try:
+        # 인도조건 컬럼 필수
+        if COL_INCOTERMS not in df.columns:
+            return pd.DataFrame()
+            
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_PAYMENT_METHOD, COL_INCOTERMS]
+        
+        # 운임 관련 컬럼 추가
+        freight_cols = [COL_FREIGHT, COL_FREIGHT_CURRENCY, COL_INPUT_FREIGHT, COL_CALCULATED_FREIGHT_KRW]
+        for col in freight_cols:
+            if col in df.columns:
+                target_cols.append(col)
+        
+        target_cols.extend([COL_AMOUNT, COL_TRADE_NAME])
+        
+        available_cols = [c for c in target_cols if c in df.columns]
+        
+        df_work = df.copy()
+        
+        # 인도조건이 EXW 또는 FOB이면서 입력운임이 없는 경우
+        incoterms_condition = df_work[COL_INCOTERMS].astype(str).str.strip().isin(FREE_FREIGHT_INCOTERMS)
+        
+        # 입력운임 컬럼이 있는 경우
+        if COL_INPUT_FREIGHT in df_work.columns:
+            # 입력운임이 비어있거나 0인 경우
+            input_freight_missing = (
+                df_work[COL_INPUT_FREIGHT].isna() | 
+                (df_work[COL_INPUT_FREIGHT].astype(str).str.strip() == '') |
+                (safe_numeric_conversion(df_work[COL_INPUT_FREIGHT]) == 0)
+            )
+        else:
+            # 입력운임 컬럼 자체가 없으면 모두 누락으로 간주
+            input_freight_missing = True
+        
+        df_filtered = df_work[incoterms_condition & input_freight_missing].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+            
+        return df_filtered[available_cols]
+    except Exception as e:
+        logger.error(f"무상 운임 누락 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+@functools.lru_cache(maxsize=2)
+def _read_usage_rate_hsk(csv_path, mtime):
+    # 용도에 따옴표 없는 쉼표가 있는 행(예: '광산용, 토목공사용')은 첫 칸=HSK, 끝 칸=출처, 나머지=용도로 읽음
+    hsk_df = pd.read_csv(csv_path, encoding='utf-8', dtype=str, engine='python',
+                         on_bad_lines=lambda fields: [fields[0], ','.join(fields[1:-1]), fields[-1]])
+    # HSK 컬럼의 점과 하이픈 제거하여 10자리 숫자만 추출
+    hsk_df['HSK_10'] = hsk_df['HSK'].astype(str).str.replace('.', '').str.replace('-', '')
+    return dict(zip(hsk_df['HSK_10'], zip(hsk_df['용도'], hsk_df['출처'])))
+
+def load_usage_rate_hsk(csv_path=USAGE_RATE_HSK_PATH):
+    """용도세율 HSK 목록 {HSK 10자리: (용도, 출처)} (수정 시각 기준 캐시, 상주 서비스에서 재로드 방지)"""
+    return _read_usage_rate_hsk(csv_path, os.path.getmtime(csv_path))
+
+def create_usage_rate_analysis(df):
+    """19. 용도세율 (HSK 코드 기반 용도세율 적용 품목 선별)"""
+    try:
+        if COL_HS_CODE not in df.columns:
+            return pd.DataFrame()
+        
+        # CSV 파일에서 HSK 코드 목록 읽기 (파일이 바뀌지 않으면 프로세스 내 캐시 사용)
+        try:
+            if not os.path.exists(USAGE_RATE_HSK_PATH):
+                logger.warning("용도세율 HSK 파일(usage_rate_hsk.csv)을 찾을 수 없습니다.")
+                return pd.DataFrame()
+            hsk_dict = load_usage_rate_hsk()
+        except Exception as e:
+            logger.error(f"HSK CSV 파일 로드 중 오류: {str(e)}")
+            return pd.DataFrame()
+        
+        # 데이터의 세번부호 10자리 추출
+        df_work = df.copy()
+        df_work['세번부호_10'] = df_work[COL_HS_CODE].astype(str).str.replace('.', '').str.replace('-', '').str[:10]
+        
+        # HSK 목록과 매칭
+        df_work['매칭여부'] = df_work['세번부호_10'].isin(hsk_dict.keys())
+        df_filtered = df_work[df_work['매칭여부']].copy()
+        
+        if len(df_filtered) == 0:
+            return pd.DataFrame()
+        
+        # 용도 및 출처 정보 추가
+        df_filtered['용도'] = df_filtered['세번부호_10'].map(lambda x: hsk_dict.get(x, ('', ''))[0])
+        df_filtered['출처'] = df_filtered['세번부호_10'].map(lambda x: hsk_dict.get(x, ('', ''))[1])
+        
+        # 공통 최우선 컬럼 + 특정 분석 컬럼
+        target_cols = [COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+                       COL_HS_CODE, '용도', '출처', COL_RATE_TYPE, COL_RATE_DESC, COL_TARIFF_RATE, 
+                       COL_TRADE_NAME, COL_SPEC_1, COL_AMOUNT]
+        available_cols = [c for c in target_cols if c in df_filtered.columns]
+        
+        return df_filtered[available_cols]
+        
+    except Exception as e:
+        logger.error(f"용도세율 분석 중 오류: {str(e)}")
+        return pd.DataFrame()
+
+def create_summary_analysis(df_original):
+    """Summary 분석"""
+    try:
+        summary_data = {}
+        
+        if COL_IMPORT_DEC_NO in df_original.columns:
+            total_declarations = df_original[COL_IMPORT_DEC_NO].nunique()
+        else:
+            total_declarations = len(df_original)
+        summary_data['전체 신고 건수'] = total_declarations
+        
+        if COL_TRADE_TYPE in df_original.columns and COL_IMPORT_DEC_NO in df_original.columns:
+            trade_type_analysis = pd.pivot_table(df_original, 
+                index=[COL_TRADE_TYPE], values=COL_IMPORT_DEC_NO, aggfunc='nunique', observed=True,
+                margins=True, margins_name='총계'
+            ).reset_index()
+            summary_data['거래구분별'] = trade_type_analysis
+            
+        if COL_RATE_TYPE in df_original.columns and COL_IMPORT_DEC_NO in df_original.columns:
+            rate_type_analysis = pd.pivot_table(df_original,
+                index=COL_RATE_TYPE, values=COL_IMPORT_DEC_NO, aggfunc='nunique', observed=True
+            ).reset_index()
+            total_row = {COL_RATE_TYPE: '총계', COL_IMPORT_DEC_NO: rate_type_analysis[COL_IMPORT_DEC_NO].sum()}
+            rate_type_analysis = pd.concat([rate_type_analysis, pd.DataFrame([total_row])], ignore_index=True)
+            summary_data['세율구분별'] = rate_type_analysis
+            
+        # 기존 Risk Counts 계산
+        zero_risk_count = 0
+        if all(col in df_original.columns for col in [COL_TARIFF_RATE, COL_RATE_TYPE, COL_IMPORT_DEC_NO]):
+            df_original['세율구분_str'] = df_original[COL_RATE_TYPE].astype(str).str.strip()
+            zero_risk_df = df_original[
+                (df_original[COL_TARIFF_RATE] < ZERO_RISK_RATE_THRESHOLD) & 
+                (~df_original['세율구분_str'].str.match(r'^F.{3}$')) &
+                (~df_original['세율구분_str'].str.startswith('FR'))
+            ]
+            zero_risk_count = zero_risk_df[COL_IMPORT_DEC_NO].nunique()
+            
+        eight_percent_count = 0
+        if all(col in df_original.columns for col in [COL_TARIFF_RATE, COL_RATE_TYPE, COL_IMPORT_DEC_NO]):
+            eight_percent_df = df_original[
+                (df_original[COL_RATE_TYPE] == 'A') & 
+                (df_original[COL_TARIFF_RATE] >= 8)
+            ]
+            eight_percent_count = eight_percent_df[COL_IMPORT_DEC_NO].nunique()
+            
+        tariff_risk_count = 0
+        if COL_SPEC_1 in df_original.columns and COL_HS_CODE in df_original.columns:
+            risk_specs = df_original.groupby(COL_SPEC_1)[COL_HS_CODE].nunique()
+            risk_specs = risk_specs[risk_specs > 1]
+            if len(risk_specs) > 0:
+                tariff_risk_df = df_original[df_original[COL_SPEC_1].isin(risk_specs.index)]
+                tariff_risk_count = tariff_risk_df[COL_IMPORT_DEC_NO].nunique()
+        
+        domestic_tax_count = 0
+        if COL_HS_CODE in df_original.columns:
+            df_tax = df_original.copy()
+            if COL_INTERNAL_TAX_CODE not in df_tax.columns:
+                df_tax[COL_INTERNAL_TAX_CODE] = ''
+            else:
+                df_tax[COL_INTERNAL_TAX_CODE] = _clean_text(df_tax[COL_INTERNAL_TAX_CODE])
+            
+            df_tax[COL_HS_CODE] = df_tax[COL_HS_CODE].astype(str).str.strip()
+            domestic_tax_df = df_tax[
+                (df_tax[COL_HS_CODE].str.len() == 10) &
+                (df_tax[COL_HS_CODE].str.startswith('22')) &
+                ((df_tax[COL_INTERNAL_TAX_CODE] == '') | (df_tax[COL_INTERNAL_TAX_CODE].isna()))
+            ]
+            domestic_tax_count = domestic_tax_df[COL_IMPORT_DEC_NO].nunique()
+        
+        price_risk_count = 0
+        if COL_SPEC_1 in df_original.columns and COL_UNIT_PRICE in df_original.columns:
+            # Z-Score 기반 카운팅
+            df_price = df_original.copy()
+            df_price[COL_UNIT_PRICE] = safe_numeric_conversion(df_price[COL_UNIT_PRICE])
+            df_price = df_price[df_price[COL_UNIT_PRICE] > 0]
+            
+            stats = df_price.groupby(COL_SPEC_1)[COL_UNIT_PRICE].agg(['mean', 'std', 'count']).reset_index()
+            stats = stats[stats['count'] >= PRICE_MIN_SPEC_ROWS]
+            
+            if not stats.empty:
+                df_merged = pd.merge(df_price, stats, on=COL_SPEC_1, how='inner')
+                df_merged['z_score'] = np.where(
+                    df_merged['std'] > 0,
+                    (df_merged[COL_UNIT_PRICE] - df_merged['mean']) / df_merged['std'],
+                    0
+                )
+                price_risk_df = df_merged[abs(df_merged['z_score']) > PRICE_Z_THRESHOLD]
+                price_risk_count = price_risk_df[COL_IMPORT_DEC_NO].nunique()
+        
+        import_req_risk_count = 0
+        # 수입요건 Risk 탭과 같은 기준 (규격1 내 신고별 법령 세트 불일치)
+        risk_specs = find_import_requirement_risk_specs(df_original)
+        if risk_specs:
+            import_req_df = df_original[df_original[COL_SPEC_1].isin(risk_specs)]
+            import_req_risk_count = import_req_df[COL_IMPORT_DEC_NO].nunique()
+
+        # New Risk Counts
+        f_rate_count = len(create_f_rate_analysis(df_original))
+        fta_opp_count = len(create_fta_opportunity_analysis(df_original))
+        low_price_count = len(create_low_price_analysis(df_original))
+        currency_inc_count = len(create_currency_consistency_analysis(df_original))
+        # 국가별 통화단위 불일치(통화단위 불일치에 통합), 특수거래 구분(사용자 요청)은 제거됨
+        free_freight_count = len(create_free_charge_freight_analysis(df_original))
+        usage_rate_count = len(create_usage_rate_analysis(df_original))
+
+        risk_analysis = pd.DataFrame({
+            'Risk 유형': [
+                '0% 세율 위험', '8% 환급 검토', '세율 위험(HS 불일치)', '내국세 누락', '단가 위험(Z-Score)', '수입요건 불일치',
+                'F세율 적용', 'FTA 기회 발굴', '저가신고 의심', '통화단위 불일치(거래처)', '무상운임 누락', '용도세율 적용'
+            ],
+            '신고건수': [
+                zero_risk_count, eight_percent_count, tariff_risk_count, domestic_tax_count, price_risk_count, import_req_risk_count,
+                f_rate_count, fta_opp_count, low_price_count, currency_inc_count, free_freight_count, usage_rate_count
+            ],
+            '비율(%)': [
+                zero_risk_count/total_declarations*100 if total_declarations > 0 else 0,
+                eight_percent_count/total_declarations*100 if total_declarations > 0 else 0,
+                tariff_risk_count/total_declarations*100 if total_declarations > 0 else 0,
+                domestic_tax_count/total_declarations*100 if total_declarations > 0 else 0,
+                price_risk_count/total_declarations*100 if total_declarations > 0 else 0,
+                import_req_risk_count/total_declarations*100 if total_declarations > 0 else 0,
+                f_rate_count/total_declarations*100 if total_declarations > 0 else 0,
+                fta_opp_count/total_declarations*100 if total_declarations > 0 else 0,
+                low_price_count/total_declarations*100 if total_declarations > 0 else 0,
+                currency_inc_count/total_declarations*100 if total_declarations > 0 else 0,
+                free_freight_count/total_declarations*100 if total_declarations > 0 else 0,
+                usage_rate_count/total_declarations*100 if total_declarations > 0 else 0
+            ]
+        })
+        summary_data['Risk분석'] = risk_analysis
+        
+        # 월별 추이 분석
+        if COL_ACCEPTANCE_DATE in df_original.columns and COL_IMPORT_DEC_NO in df_original.columns:
+            try:
+                df_monthly = df_original.copy()
+                df_monthly[COL_ACCEPTANCE_DATE] = pd.to_numeric(
+                    df_monthly[COL_ACCEPTANCE_DATE], 
+                    errors='coerce'
+                ).fillna(0).astype(int).astype(str)
+                df_monthly = df_monthly[df_monthly[COL_ACCEPTANCE_DATE].str.len() == 8]
+                df_monthly[COL_ACCEPTANCE_DATE] = pd.to_datetime(
+                    df_monthly[COL_ACCEPTANCE_DATE], 
+                    format='%Y%m%d', 
+                    errors='coerce'
+                )
+                df_monthly = df_monthly[df_monthly[COL_ACCEPTANCE_DATE].notna()]
+                
+                if len(df_monthly) > 0:
+                    df_monthly['수리월'] = df_monthly[COL_ACCEPTANCE_DATE].dt.strftime('%Y-%m')
+                    monthly_trend = df_monthly.groupby('수리월')[COL_IMPORT_DEC_NO].nunique().reset_index()
+                    monthly_trend.columns = ['수리월', '신고건수']
+                    monthly_trend = monthly_trend.sort_values('수리월')
+                    summary_data['월별추이'] = monthly_trend
+            except Exception:
+                pass
+            
+        return summary_data
+        
+    except Exception as e:
+        logger.error(f"Summary 분석 중 오류 발생: {str(e)}")
+        return {}
+# --- Analysis Registry ---
+
+# 분석 옵션(사이드바 표시명) -> 결과 키
+ANALYSIS_KEY_MAP = {
+    "종합 분석": 'summary',
+    "8% 환급 검토": 'eight_percent',
+    "0% 세율 위험": 'zero_risk',
+    "세율 위험": 'tariff_risk',
+    "단가 위험": 'price_risk',
+    "내국세구분": 'domestic_tax',
+    "수입요건 Risk": 'import_req_risk',
+    "F세율 적용": 'f_rate',
+    "FTA 기회 발굴": 'fta_opp',
+    "저가신고 의심": 'low_price',
+    "통화단위 불일치": 'currency_inc',
+    # "국가별 통화단위 불일치" 제거됨 (통화단위 불일치에 통합)
+    # "특수거래 구분" 제거됨 (사용자 요청)
+    "무상운임 누락": 'free_freight',
+    "용도세율 적용": 'usage_rate'
+}
+
+# 결과 키 -> 분석 함수
+ANALYSIS_FUNCTIONS = {
+    'summary': create_summary_analysis,
+    'eight_percent': create_eight_percent_refund_analysis,
+    'zero_risk': create_zero_percent_risk_analysis,
+    'tariff_risk': create_tariff_risk_analysis,
+    'price_risk': create_price_risk_analysis,
+    'domestic_tax': create_domestic_tax_code_analysis,
+    'import_req_risk': create_import_requirement_risk_analysis,
+    'f_rate': create_f_rate_analysis,
+    'fta_opp': create_fta_opportunity_analysis,
+    'low_price': create_low_price_analysis,
+    'currency_inc': create_currency_consistency_analysis,
+    'free_freight': create_free_charge_freight_analysis,
+    'usage_rate': create_usage_rate_analysis
+}
+
+def make_options_key(analysis_options):
+    """선택된 분석 옵션 조합의 키 (순서 무관)"""
+    return '|'.join(sorted(analysis_options))
+
+# --- Risk Cube ---
+CUBE_DIMENSIONS = ['수리월', 'Risk 유형', COL_TRADE_COMPANY, COL_ORIGIN_COUNTRY, COL_RATE_TYPE]
+CUBE_MEASURES = ['신고건수', '행수', COL_AMOUNT, COL_ROW_DUTY]
+
+def build_risk_cube(df_original, results):
+    """Risk 결과로부터 수리월 × Risk 유형 × 거래처 × 원산지 × 세율구분 집계 큐브 생성"""
+    frames = []
+    if COL_IMPORT_DEC_NO in df_original.columns:
+        # 결과에 없는 차원은 신고번호별 대표값으로 보완
+        dim_cols = [c for c in [COL_ACCEPTANCE_DATE, COL_TRADE_COMPANY, COL_ORIGIN_COUNTRY, COL_RATE_TYPE] if c in df_original.columns]
+        decl_dims = df_original[[COL_IMPORT_DEC_NO] + dim_cols].drop_duplicates(COL_IMPORT_DEC_NO).set_index(COL_IMPORT_DEC_NO)
+        
+        for label, key in ANALYSIS_KEY_MAP.items():
+            data = results.get(key)
+            if key == 'summary' or not isinstance(data, pd.DataFrame) or data.empty or COL_IMPORT_DEC_NO not in data.columns:
+                continue
+            part = pd.DataFrame({COL_IMPORT_DEC_NO: data[COL_IMPORT_DEC_NO].to_numpy()})
+            for col in dim_cols:
+                part[col] = data[col].to_numpy() if col in data.columns else part[COL_IMPORT_DEC_NO].map(decl_dims[col]).to_numpy()
+            part[COL_AMOUNT] = safe_numeric_conversion(data[COL_AMOUNT]).to_numpy() if COL_AMOUNT in data.columns else 0.0
+            part[COL_ROW_DUTY] = safe_numeric_conversion(data[COL_ROW_DUTY]).to_numpy() if COL_ROW_DUTY in data.columns else 0.0
+            part['Risk 유형'] = label
+            frames.append(part)
+    
+    if not frames:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+    
+    rows = pd.concat(frames, ignore_index=True)
+    
+    # 수리일자(YYYYMMDD) -> 수리월(YYYY-MM), 수리일자 컬럼이 없으면 모두 '미상'
+    if COL_ACCEPTANCE_DATE in rows.columns:
+        dates = pd.to_numeric(rows[COL_ACCEPTANCE_DATE], errors='coerce').fillna(0).astype(np.int64)
+    else:
+        dates = pd.Series(0, index=rows.index, dtype=np.int64)
+    months = (dates // 10000).astype(str) + '-' + (dates // 100 % 100).astype(str).str.zfill(2)
+    rows['수리월'] = months.where((dates >= 19000101) & (dates <= 29991231), '미상')
+    
+    for col in CUBE_DIMENSIONS:
+        if col not in rows.columns:
+            rows[col] = '미상'
+        rows[col] = rows[col].where(rows[col].notna(), '미상').astype(str).str.strip()
+    
+    cube = rows.groupby(CUBE_DIMENSIONS, sort=False).agg(**{
+        '신고건수': (COL_IMPORT_DEC_NO, 'nunique'),
+        '행수': (COL_IMPORT_DEC_NO, 'size'),
+        COL_AMOUNT: (COL_AMOUNT, 'sum'),
+        COL_ROW_DUTY: (COL_ROW_DUTY, 'sum')
+    }).reset_index()
+    
+    for col in CUBE_DIMENSIONS:
+        cube[col] = cube[col].astype('category')
+    return cube
+
+def run_analyses(df_original, analysis_options, results, on_progress=None, cancel_event=None, recorder=None):
+    """선택된 분석 중 저장소에 없는 것만 실행하여 results에 추가
+    
+    on_progress(key, elapsed)는 분석 시작 시 elapsed=None, 완료 시 소요 시간(초)으로 호출됨.
+    cancel_event가 설정되면 진행 중인 분석을 마친 뒤 중단 (완료된 결과는 유지).
+    recorder(perf.StageRecorder)가 있으면 분석별/큐브 집계 단계를 계측한다.
+    """
+    computed = False
+    for option in analysis_options:
+        key = ANALYSIS_KEY_MAP.get(option)
+        if key is None or key in results:
+            continue
+        if cancel_event is not None and cancel_event.is_set():
+            return results
+        
+        if on_progress: on_progress(key, None)
+        started = time.perf_counter()
+        with stage(recorder, f"analysis:{key}", len(df_original)) as analysis_stage:
+            results[key] = ANALYSIS_FUNCTIONS[key](df_original)
+            analysis_stage.rows_out = output_size(results[key])
+        computed = True
+        if on_progress: on_progress(key, time.perf_counter() - started)
+    
+    # 대시보드 드릴다운용 큐브는 Risk 결과가 바뀔 때만 다시 집계
+    if computed or 'cube' not in results:
+        with stage(recorder, 'cube', len(df_original)) as cube_stage:
+            results['cube'] = build_risk_cube(df_original, results)
+            cube_stage.rows_out = output_size(results['cube'])
+    return results
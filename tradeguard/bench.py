@@ -0,0 +1,292 @@
+"""성능 벤치마크 (python -m tradeguard bench)
+
+합성 데이터(synthetic.py)를 크기별로 만들어 수집, 각 create_*_analysis, 요약, 보고서 생성 단계를
+시간/메모리 측정하고 JSON 이력에 쌓는다. 저장된 기준선보다 느려지거나 메모리를 더 쓰는 단계는
+회귀로 표시하고 종료 코드 1을 반환한다 (CI 등에서 사용).
+
+측정값 (단계별)
+- seconds: 경과 시간 (repeat > 1이면 최솟값)
+- rows_per_sec: 입력 행 수 / seconds
+- peak_rss_mb: 단계 중 프로세스 RSS 최댓값 (/proc/self/statm 표본)
+- rss_delta_mb: 단계 시작 대비 RSS 증가량 (회귀 판단은 이 값 기준)
+- problem: 분석이 오류를 기록했거나, 정답에 이상 건이 있는데 빈 결과를 반환한 경우의 사유
+  (이런 단계는 측정값이 의미 없으므로 회귀 비교와 기준선 저장에서 빼고 종료 코드 1로 알린다)
+"""
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .analysis import ANALYSIS_FUNCTIONS, create_summary_analysis
+from .ingest import read_excel_file
+from .perf import current_rss_mb
+from .reports import create_excel_file, create_html_report, create_word_document
+
+# --- Benchmark Settings ---
+
+BENCH_SIZES = (10000, 100000, 1000000)
+BENCH_XLSX_MAX_ROWS = 100000  # 이보다 큰 크기는 XLSX 수집을 건너뜀 (openpyxl 로드가 수 분 단위)
+BENCH_DIR = 'benchmarks'
+BENCH_HISTORY_FILE = os.path.join(BENCH_DIR, 'history.jsonl')
+BENCH_BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+BENCH_TIME_TOLERANCE = 0.3  # 기준선 대비 30% 이상 느려지면 회귀
+BENCH_MEMORY_TOLERANCE = 0.3
+BENCH_MIN_DELTA_SECONDS = 0.05  # 짧은 단계의 측정 잡음 무시
+BENCH_MIN_DELTA_MB = 32
+RSS_SAMPLE_INTERVAL = 0.005
+BENCH_STAGE_GROUPS = ('ingest', 'analysis', 'summary', 'report')
+
+class _ErrorCollector(logging.Handler):
+    """단계 실행 중 tradeguard 로거에 기록된 오류 메시지 수집"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+    def __enter__(self):
+        logging.getLogger('tradeguard').addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        logging.getLogger('tradeguard').removeHandler(self)
+        return False
+
+class RssSampler:
+    """with 블록 동안 RSS 최댓값을 백그라운드 스레드로 표본 추출"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+def measure(func, rows, repeat=1):
+    """func()를 repeat번 실행하여 (마지막 반환값, 측정값 dict)"""
+    best = None
+    value = None
+    for _ in range(max(1, repeat)):
+        with RssSampler() as sampler:
+            started = time.perf_counter()
+            value = func()
+            seconds = time.perf_counter() - started
+        sample = {'seconds': round(seconds, 4), 'peak_rss_mb': round(sampler.peak_mb, 1),
+                  'rss_delta_mb': round(sampler.peak_mb - sampler.start_mb, 1)}
+        if best is None or sample['seconds'] < best['seconds']:
+            best = sample
+    best['rows'] = rows
+    best['rows_per_sec'] = round(rows / best['seconds']) if best['seconds'] > 0 else None
+    return value, best
+
+def parse_size(value):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    value = str(value).strip().lower().replace(',', '').replace('_', '')
+    multiplier = {'k': 1000, 'm': 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+def prepare_dataset(rows, data_dir, seed=42):
+    """크기별 합성 CSV(/XLSX)와 정답 요약(truth) 경로 (data_dir에 이미 있으면 재사용)"""
+    from .synthetic import generate_synthetic_data
+    prefix = os.path.join(data_dir, f"bench_{rows}_{seed}")
+    formats = ('csv', 'xlsx') if rows <= BENCH_XLSX_MAX_ROWS else ('csv',)
+    paths = {fmt: f"{prefix}.{fmt}" for fmt in formats}
+    paths['truth'] = f"{prefix}.truth.json"
+    if not all(os.path.exists(path) for path in paths.values()):
+        generate_synthetic_data(prefix, rows, formats=formats, seed=seed)
+    return paths
+
+def _expected_rules(truth_path):
+    """정답 요약에서 이상 건이 주입된 규칙(결과 키) 집합"""
+    try:
+        with open(truth_path, encoding='utf-8') as f:
+            rules = json.load(f).get('rules', {})
+    except (OSError, ValueError):
+        return set()
+    return {rule for rule, counts in rules.items() if counts.get('rows', 0) > 0}
+
+def _bench_steps(paths, rows):
+    """(단계 이름, 그룹, 실행 함수, 검사 함수) 순서 목록. 분석/보고서 단계는 앞 단계 결과를 사용
+
+    검사 함수는 단계 실행 뒤 호출되어 측정값을 믿을 수 없는 사유(없으면 None)를 반환한다.
+    """
+    state = {'results': {}, 'errors': {}}
+    expected = _expected_rules(paths['truth']) if 'truth' in paths else set()
+
+    def ingest(path):
+        def run():
+            df = read_excel_file(path)
+            if df is None:
+                raise RuntimeError(f"파일 로드 실패: {path}")
+            state['df'] = df
+            return df
+        return run
+
+    def analysis(key, func):
+        def run():
+            with _ErrorCollector() as collector:
+                state['results'][key] = func(state['df'])
+            state['errors'][key] = collector.messages
+        return run
+
+    def check_analysis(key):
+        def check():
+            if state['errors'].get(key):
+                return f"분석 오류 기록: {state['errors'][key][0]}"
+            data = state['results'].get(key)
+            if key in expected and (data is None or len(data) == 0):
+                return "정답에 이상 건이 있는데 결과가 비어 있음"
+            return None
+        return check
+
+    def summary():
+        state['summary'] = create_summary_analysis(state['df'])
+
+    steps = []
+    if 'xlsx' in paths:
+        steps.append(('ingest_xlsx', 'ingest', ingest(paths['xlsx']), None))
+    steps.append(('ingest_csv', 'ingest', ingest(paths['csv']), None))
+    for key, func in ANALYSIS_FUNCTIONS.items():
+        if key != 'summary':
+            steps.append((f"analysis:{key}", 'analysis', analysis(key, func), check_analysis(key)))
+    steps.append(('summary', 'summary', summary, None))
+    steps.append(('report:excel', 'report',
+                  lambda: create_excel_file(state['df'], state['results'], state['summary']), None))
+    steps.append(('report:word', 'report', lambda: create_word_document(state['results'], state['summary']), None))
+    steps.append(('report:html', 'report', lambda: create_html_report(state['results'], state['summary']), None))
+    steps.append(('report:html_full', 'report',
+                  lambda: create_html_report(state['results'], state['summary'], interactive=True), None))
+    return steps
+
+def run_benchmarks(sizes=BENCH_SIZES, groups=BENCH_STAGE_GROUPS, repeat=1, data_dir=None, seed=42, on_stage=None):
+    """크기별 단계 측정 결과 {'<rows>': {stage: 측정값}}
+
+    의존 단계(수집 -> 분석 -> 요약 -> 보고서)는 groups에 없어도 실행하되 기록하지 않는다.
+    on_stage(rows, stage, sample)는 단계가 끝날 때마다 호출된다.
+    """
+    measurements = {}
+    with tempfile.TemporaryDirectory(prefix='tradeguard_bench_') as tmp_dir:
+        for rows in sizes:
+            paths = prepare_dataset(rows, data_dir or tmp_dir, seed=seed)
+            stages = measurements[str(rows)] = {}
+            for name, group, func, check in _bench_steps(paths, rows):
+                if group not in groups:
+                    func()
+                    continue
+                _, sample = measure(func, rows, repeat=repeat)
+                problem = check() if check else None
+                if problem:
+                    sample['problem'] = problem
+                stages[name] = sample
+                if on_stage: on_stage(rows, name, sample)
+    return measurements
+
+def environment_info():
+    info = {
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'platform': platform.platform(), 'cpu_count': os.cpu_count()
+    }
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                        timeout=5, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        info['commit'] = None
+    return info
+
+def find_regressions(measurements, baseline, time_tolerance=BENCH_TIME_TOLERANCE,
+                     memory_tolerance=BENCH_MEMORY_TOLERANCE):
+    """기준선 대비 회귀 목록 [{rows, stage, metric, baseline, current, ratio}]"""
+    regressions = []
+    checks = [('seconds', time_tolerance, BENCH_MIN_DELTA_SECONDS),
+              ('rss_delta_mb', memory_tolerance, BENCH_MIN_DELTA_MB)]
+    for rows, stages in measurements.items():
+        for stage, sample in stages.items():
+            reference = baseline.get(rows, {}).get(stage)
+            if not reference or 'problem' in sample or 'problem' in reference:
+                continue
+            for metric, tolerance, min_delta in checks:
+                old, new = reference.get(metric), sample.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > min_delta:
+                    regressions.append({'rows': int(rows), 'stage': stage, 'metric': metric, 'baseline': old,
+                                        'current': new, 'ratio': round(new / old, 2) if old else None})
+    return regressions
+
+def find_problems(measurements):
+    """측정값을 믿을 수 없는 단계 목록 [{rows, stage, problem}]"""
+    return [{'rows': int(rows), 'stage': stage, 'problem': sample['problem']}
+            for rows, stages in measurements.items() for stage, sample in stages.items() if 'problem' in sample]
+
+def load_baseline(path=BENCH_BASELINE_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('measurements', {})
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(record, path=BENCH_BASELINE_FILE):
+    """기존 기준선에 이번 크기/단계 측정값을 덮어써 저장"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {'measurements': {}}
+    for rows, stages in record['measurements'].items():
+        # 오류/빈 결과로 끝난 단계는 기준선으로 삼지 않음
+        baseline['measurements'].setdefault(rows, {}).update(
+            {stage: sample for stage, sample in stages.items() if 'problem' not in sample})
+    baseline.update(timestamp=record['timestamp'], environment=record['environment'])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=1)
+
+def append_history(record, path=BENCH_HISTORY_FILE):
+    """실행 기록을 JSON Lines로 추가 (실행당 한 줄)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def benchmark(sizes=BENCH_SIZES, groups=BENCH_STAGE_GROUPS, repeat=1, data_dir=None, seed=42,
+              history_path=BENCH_HISTORY_FILE, baseline_path=BENCH_BASELINE_FILE, update_baseline=False,
+              time_tolerance=BENCH_TIME_TOLERANCE, memory_tolerance=BENCH_MEMORY_TOLERANCE, on_stage=None):
+    """측정, 기준선 비교, 이력 저장을 한 번에 수행하고 실행 기록(dict) 반환"""
+    measurements = run_benchmarks(sizes, groups, repeat=repeat, data_dir=data_dir, seed=seed, on_stage=on_stage)
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'repeat': repeat,
+        'seed': seed,
+        'measurements': measurements,
+        'regressions': find_regressions(measurements, load_baseline(baseline_path), time_tolerance, memory_tolerance),
+        'problems': find_problems(measurements)
+    }
+    if history_path:
+        append_history(record, history_path)
+    if update_baseline:
+        save_baseline(record, baseline_path)
+    return record
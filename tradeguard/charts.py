@@ -0,0 +1,65 @@
+"""분석 결과 차트 (plotly는 사용 시점에 로드)"""
+import numpy as np
+import pandas as pd
+
+from .constants import *
+
+PRICE_CHART_WEBGL_THRESHOLD = 2000  # 이 점 수를 넘으면 WebGL(scattergl)로 렌더링
+PRICE_CHART_DENSITY_THRESHOLD = 50000  # 이 점 수를 넘으면 날짜 × 단가 구간 밀도로 집계
+PRICE_CHART_TOP_SPECS = 10  # 범례에 표시할 규격1 개수 (나머지는 '기타')
+PRICE_CHART_PRICE_BINS = 60
+
+def build_price_risk_chart(data):
+    """단가 이상치 차트 (점 수에 따라 SVG/WebGL 산점도 또는 밀도 히트맵)"""
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    chart_cols = [c for c in [COL_ACCEPTANCE_DATE, COL_UNIT_PRICE, COL_SPEC_1, COL_TRADE_NAME, '평균단가', 'Z-Score'] if c in data.columns]
+    chart_data = data[chart_cols].copy()
+    chart_data[COL_ACCEPTANCE_DATE] = pd.to_datetime(
+        pd.to_numeric(chart_data[COL_ACCEPTANCE_DATE], errors='coerce').fillna(0).astype(int).astype(str),
+        format='%Y%m%d', errors='coerce'
+    )
+    chart_data = chart_data[chart_data[COL_ACCEPTANCE_DATE].notna()]
+    if chart_data.empty:
+        return None, None
+    
+    num_points = len(chart_data)
+    
+    if num_points > PRICE_CHART_DENSITY_THRESHOLD:
+        # 날짜(일) × 단가 구간(로그 스케일)별 건수를 서버에서 집계
+        days = chart_data[COL_ACCEPTANCE_DATE].values.astype('datetime64[D]').astype(np.int64)
+        log_price = np.log10(chart_data[COL_UNIT_PRICE].to_numpy(dtype=float))
+        day_edges = np.arange(days.min(), days.max() + 2)
+        price_edges = np.linspace(log_price.min(), log_price.max() + 1e-9, PRICE_CHART_PRICE_BINS + 1)
+        counts, _, _ = np.histogram2d(days, log_price, bins=[day_edges, price_edges])
+        
+        fig = go.Figure(go.Heatmap(
+            x=day_edges[:-1].astype('datetime64[D]'),
+            y=10 ** ((price_edges[:-1] + price_edges[1:]) / 2),
+            z=np.where(counts.T > 0, counts.T, np.nan),
+            colorscale='YlOrRd',
+            colorbar={'title': '건수'},
+            hovertemplate='%{x|%Y-%m-%d}<br>단가 ≈ %{y:,.2f}<br>건수 %{z:,.0f}<extra></extra>'
+        ))
+        fig.update_layout(title="이상치 밀도 (수리일자 × 단가 구간)", xaxis_title=COL_ACCEPTANCE_DATE, yaxis_title=COL_UNIT_PRICE)
+        fig.update_yaxes(type='log')
+        return fig, f"이상치 {num_points:,}건을 수리일자 × 단가 구간 밀도로 집계하여 표시합니다."
+    
+    # 범례는 건수 상위 규격1만 표시하고 나머지는 '기타'로 묶음
+    top_specs = chart_data[COL_SPEC_1].value_counts().index[:PRICE_CHART_TOP_SPECS]
+    chart_data[COL_SPEC_1] = chart_data[COL_SPEC_1].where(chart_data[COL_SPEC_1].isin(top_specs), '기타').astype(str)
+    
+    use_webgl = num_points > PRICE_CHART_WEBGL_THRESHOLD
+    fig = px.scatter(
+        chart_data, 
+        x=COL_ACCEPTANCE_DATE, 
+        y=COL_UNIT_PRICE,
+        color=COL_SPEC_1,
+        size=chart_data['Z-Score'].abs(),
+        hover_data=[c for c in [COL_TRADE_NAME, '평균단가', 'Z-Score'] if c in chart_data.columns],
+        render_mode='webgl' if use_webgl else 'auto',
+        title="이상치 산점도 (점 크기: Z-Score 절대값)"
+    )
+    note = f"범례는 건수 상위 {PRICE_CHART_TOP_SPECS}개 규격1만 표시합니다." if chart_data[COL_SPEC_1].eq('기타').any() else None
+    return fig, note
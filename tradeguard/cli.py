@@ -0,0 +1,574 @@
+"""헤드리스 배치 분석 CLI (python -m tradeguard batch ...)
+
+여러 고객사 신고 파일을 Streamlit 없이 프로세스 풀에서 파일 단위로 분석하고
+파일별 Excel/HTML 보고서와 기계 판독용 요약 JSON, 전체 처리량 보고를 남긴다.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .analysis import ANALYSIS_KEY_MAP, run_analyses
+from .ingest import read_excel_file
+from .manifest import build_manifest, file_sha256
+from .perf import peak_rss_mb
+from .profiling import PROFILE_MODES, ProfileSession, profile_mode_from_env
+from .reports import create_html_report, save_excel_file, to_jsonable
+
+logger = logging.getLogger(__name__)
+
+# --- Batch Settings ---
+
+INPUT_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.parquet')
+TRUTH_MARKER = '.truth.'  # synth가 데이터 옆에 저장하는 정답 파일 (신고 데이터가 아님)
+BATCH_FORMATS = ('excel', 'html', 'html_full')
+DEFAULT_BATCH_FORMATS = ('excel', 'html')
+DEFAULT_BATCH_WORKERS = min(4, os.cpu_count() or 1)
+BATCH_SUMMARY_FILE = 'batch_summary.json'
+
+class _ListLogHandler(logging.Handler):
+    """파일 처리 중 기록된 분석 오류/경고 수집"""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def collect_input_files(inputs):
+    """디렉터리/글롭/파일 경로 목록을 분석 대상 파일 목록으로 확장 (중복 제거, 정렬)"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, name) for name in names)
+        elif glob.has_magic(item):
+            files.extend(glob.glob(item, recursive=True))
+        else:
+            files.append(item)
+
+    seen = set()
+    result = []
+    for path in sorted(files):
+        real = os.path.realpath(path)
+        name = os.path.basename(path)
+        if (real in seen or name.startswith(('~$', '.')) or TRUTH_MARKER in name.lower()
+                or not name.lower().endswith(INPUT_EXTENSIONS)):
+            continue
+        seen.add(real)
+        result.append(path)
+    return result
+
+def output_stems(files):
+    """입력 파일별 출력 파일명 (확장자 제외, 같은 이름은 _2, _3 ...)"""
+    stems = {}
+    used = set()
+    for path in files:
+        base = os.path.splitext(os.path.basename(path))[0]
+        stem, n = base, 1
+        while stem in used:
+            n += 1
+            stem = f"{base}_{n}"
+        used.add(stem)
+        stems[path] = stem
+    return stems
+
+def write_file_outputs(out_prefix, df, results, formats, meta, manifest=None):
+    """보고서를 저장하고 결과 건수/요약을 meta에 기록, 생성된 보고서 경로 목록 반환
+
+    manifest가 있으면 Excel 숨김 시트에 넣는다 (JSON 파일은 process_file이 저장).
+    """
+    summary_data = results.get('summary', {})
+    outputs = []
+
+    if 'excel' in formats:
+        # 큰 결과는 보고서 파일에 바로 스트리밍 (워크북 전체를 메모리에 두지 않음)
+        if save_excel_file(out_prefix + '.xlsx', df, results, summary_data, manifest=manifest):
+            outputs.append(out_prefix + '.xlsx')
+    for fmt, suffix, interactive in (('html', '.html', False), ('html_full', '_전체.html', True)):
+        if fmt in formats:
+            content = create_html_report(results, summary_data, interactive=interactive)
+            if content:
+                with open(out_prefix + suffix, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                outputs.append(out_prefix + suffix)
+
+    meta['outputs'] = outputs
+    meta['findings'] = {key: len(data) for key, data in results.items()
+                        if isinstance(data, pd.DataFrame) and key != 'cube'}
+    meta['summary'] = to_jsonable({k: v for k, v in summary_data.items() if k != '월별추이'})
+    return outputs
+
+def process_file(path, out_prefix, analysis_options=None, formats=DEFAULT_BATCH_FORMATS, profile_mode=None):
+    """파일 하나를 읽고 분석하여 보고서, 요약 JSON(out_prefix + '.summary.json'),
+    실행 기록(out_prefix + '.manifest.json') 저장
+
+    워커 프로세스에서 실행되며, 반환값은 요약 JSON과 같은 내용의 dict (status: done / failed).
+    profile_mode(기본: TRADEGUARD_PROFILE)가 있으면 분석 실행을 프로파일링하여
+    out_prefix + '.prof'(cprofile) 또는 '.collapsed.txt'(sample)로 저장한다.
+    """
+    analysis_options = list(analysis_options or ANALYSIS_KEY_MAP)
+    profile_mode = profile_mode or profile_mode_from_env()
+    handler = _ListLogHandler()
+    package_logger = logging.getLogger('tradeguard')
+    package_logger.addHandler(handler)
+    started = time.perf_counter()
+    meta = {'file': os.path.abspath(path), 'status': 'failed', 'rows': 0, 'columns': 0, 'timings': {}}
+    try:
+        df = read_excel_file(path)
+        if df is None or df.empty:
+            meta['error'] = '파일을 읽을 수 없거나 데이터가 없습니다'
+            return meta
+        meta.update(rows=len(df), columns=len(df.columns))
+        meta['timings']['read'] = round(time.perf_counter() - started, 3)
+
+        def on_progress(key, elapsed):
+            if elapsed is not None:
+                meta['timings'][key] = round(elapsed, 3)
+
+        if profile_mode:
+            with ProfileSession(profile_mode) as profile:
+                results = run_analyses(df, analysis_options, {}, on_progress=on_progress)
+            suffix, data = profile.export()
+            os.makedirs(os.path.dirname(out_prefix) or '.', exist_ok=True)
+            with open(out_prefix + suffix, 'wb') as f:
+                f.write(data)
+            meta['profile'] = out_prefix + suffix
+        else:
+            results = run_analyses(df, analysis_options, {}, on_progress=on_progress)
+        meta['analyses'] = [ANALYSIS_KEY_MAP[opt] for opt in analysis_options if opt in ANALYSIS_KEY_MAP]
+
+        manifest = build_manifest(df, analysis_options, results, file_name=os.path.abspath(path),
+                                  file_hash=file_sha256(path), timings=meta['timings'])
+        report_started = time.perf_counter()
+        write_file_outputs(out_prefix, df, results, formats, meta, manifest)
+        meta['timings']['reports'] = round(time.perf_counter() - report_started, 3)
+        manifest.update(timings=meta['timings'], peak_rss_mb=round(peak_rss_mb(), 1))
+        with open(out_prefix + '.manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(to_jsonable(manifest), f, ensure_ascii=False, indent=2)
+        meta['outputs'].append(out_prefix + '.manifest.json')
+        meta['status'] = 'done'
+    except Exception as e:
+        meta['error'] = str(e)
+        logger.error(f"배치 처리 오류 ({path}): {e}")
+    finally:
+        package_logger.removeHandler(handler)
+        meta['elapsed'] = round(time.perf_counter() - started, 3)
+        meta['errors'] = handler.messages
+        os.makedirs(os.path.dirname(out_prefix) or '.', exist_ok=True)
+        with open(out_prefix + '.summary.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+def run_batch(files, out_dir, analysis_options=None, formats=DEFAULT_BATCH_FORMATS, workers=DEFAULT_BATCH_WORKERS,
+              on_result=None, profile_mode=None):
+    """파일 목록을 프로세스 풀에서 파일당 워커 하나로 처리하고 처리량 보고 반환"""
+    os.makedirs(out_dir, exist_ok=True)
+    stems = output_stems(files)
+    started = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(process_file, path, os.path.join(out_dir, stems[path]), analysis_options, formats,
+                               profile_mode): path
+                   for path in files}
+        for future in as_completed(futures):
+            try:
+                meta = future.result()
+            except Exception as e:  # 워커 프로세스 비정상 종료 등
+                meta = {'file': os.path.abspath(futures[future]), 'status': 'failed', 'rows': 0, 'error': str(e)}
+            results.append(meta)
+            if on_result: on_result(meta)
+
+    elapsed = time.perf_counter() - started
+    done = [m for m in results if m['status'] == 'done']
+    total_rows = sum(m['rows'] for m in done)
+    report = {
+        'files': len(files),
+        'succeeded': len(done),
+        'failed': len(results) - len(done),
+        'rows': total_rows,
+        'elapsed': round(elapsed, 3),
+        'workers': workers,
+        'files_per_min': round(len(done) / elapsed * 60, 2) if elapsed > 0 else None,
+        'rows_per_sec': round(total_rows / elapsed, 1) if elapsed > 0 else None,
+        'results': sorted(results, key=lambda m: m['file'])
+    }
+    with open(os.path.join(out_dir, BATCH_SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+def _parse_analyses(value):
+    """--analyses 값(분석 키 또는 라벨, 쉼표 구분)을 분석 라벨 목록으로 변환"""
+    if not value:
+        return list(ANALYSIS_KEY_MAP)
+    labels_by_key = {key: label for label, key in ANALYSIS_KEY_MAP.items()}
+    labels = []
+    for item in (v.strip() for v in value.split(',')):
+        if item in ANALYSIS_KEY_MAP:
+            labels.append(item)
+        elif item in labels_by_key:
+            labels.append(labels_by_key[item])
+        elif item:
+            raise argparse.ArgumentTypeError(f"알 수 없는 분석: {item} (사용 가능: {', '.join(labels_by_key)})")
+    return labels
+
+def _parse_formats(value):
+    formats = tuple(v.strip() for v in value.split(',') if v.strip())
+    unknown = [f for f in formats if f not in BATCH_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"알 수 없는 보고서 형식: {', '.join(unknown)} (사용 가능: {', '.join(BATCH_FORMATS)})")
+    return formats
+
+def add_batch_arguments(parser):
+    """배치 공통 옵션 (batch, watch 명령에서 공유)"""
+    parser.add_argument('--analyses', type=_parse_analyses, default=list(ANALYSIS_KEY_MAP),
+                        help='실행할 분석 키 또는 라벨, 쉼표 구분 (기본: 전체)')
+    parser.add_argument('--formats', type=_parse_formats, default=DEFAULT_BATCH_FORMATS,
+                        help=f"보고서 형식, 쉼표 구분 ({', '.join(BATCH_FORMATS)}; 기본: {','.join(DEFAULT_BATCH_FORMATS)})")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                        help=f'동시에 처리할 파일 수 (기본: {DEFAULT_BATCH_WORKERS})')
+
+def cmd_batch(args):
+    files = collect_input_files(args.inputs)
+    if not files:
+        print("분석할 파일이 없습니다.", file=sys.stderr)
+        return 2
+    print(f"{len(files)}개 파일 분석 시작 (워커 {args.workers}개) -> {args.out}")
+
+    def on_result(meta):
+        mark = '✓' if meta['status'] == 'done' else '✗'
+        detail = f"{meta['rows']:,}행 {meta.get('elapsed', 0):.1f}초" if meta['status'] == 'done' else meta.get('error', '')
+        print(f"  {mark} {os.path.basename(meta['file'])}: {detail}")
+
+    report = run_batch(files, args.out, args.analyses, args.formats, args.workers, on_result=on_result,
+                       profile_mode=args.profile)
+    print(f"완료: 성공 {report['succeeded']} / 실패 {report['failed']}, "
+          f"{report['rows']:,}행, {report['elapsed']:.1f}초 "
+          f"({report['files_per_min'] or 0:,.1f} files/min, {report['rows_per_sec'] or 0:,.0f} rows/sec)")
+    print(f"요약: {os.path.join(args.out, BATCH_SUMMARY_FILE)}")
+    return 0 if report['failed'] == 0 else 1
+
+def cmd_serve(args):
+    from . import service
+    logging.getLogger('tradeguard').setLevel(logging.INFO)
+    service.serve(host=args.host or service.SERVICE_HOST,
+                  port=args.port if args.port is not None else service.SERVICE_PORT,
+                  workers=args.workers or service.JOB_MAX_WORKERS,
+                  max_upload_mb=args.max_upload_mb or service.SERVICE_MAX_UPLOAD_MB,
+                  max_pending=args.max_pending or service.SERVICE_MAX_PENDING_JOBS)
+    return 0
+
+def cmd_watch(args):
+    from .daemon import watch
+    if not os.path.isdir(args.directory):
+        print(f"디렉터리가 없습니다: {args.directory}", file=sys.stderr)
+        return 2
+    logging.getLogger('tradeguard.daemon').setLevel(logging.INFO)
+    watch(args.directory, interval=args.interval, once=args.once, analysis_options=args.analyses,
+          formats=args.formats, workers=args.workers, settle_seconds=args.settle)
+    return 0
+
+def _parse_currency_mix(value):
+    """'USD=0.6,EUR=0.2,JPY=0.2' -> {'USD': 0.6, ...}"""
+    mix = {}
+    for item in value.split(','):
+        code, _, weight = item.partition('=')
+        try:
+            mix[code.strip().upper()] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"통화 비중 형식 오류: {item} (예: USD=0.6,EUR=0.4)")
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("통화 비중 합이 0보다 커야 합니다.")
+    return mix
+
+def cmd_synth(args):
+    from .synthetic import generate_synthetic_data
+    started = time.perf_counter()
+    try:
+        paths = generate_synthetic_data(args.out, args.rows, formats=args.formats, chunk_rows=args.chunk_rows,
+                                        seed=args.seed, n_specs=args.specs, n_companies=args.companies,
+                                        anomaly_rate=args.anomaly_rate, currency_mix=args.currency_mix)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - started
+    print(f"합성 데이터 {args.rows:,}행 생성 완료 ({elapsed:.1f}초, {args.rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    for path in paths:
+        print(f"  {path}")
+    return 0
+
+def cmd_bench(args):
+    from . import bench
+    try:
+        sizes = [bench.parse_size(v) for v in args.sizes.split(',') if v.strip()]
+    except ValueError:
+        print(f"크기 형식 오류: {args.sizes} (예: 10k,100k,1m)", file=sys.stderr)
+        return 2
+    groups = [g.strip() for g in args.stages.split(',') if g.strip()]
+    unknown = [g for g in groups if g not in bench.BENCH_STAGE_GROUPS]
+    if unknown:
+        print(f"알 수 없는 단계: {', '.join(unknown)} (사용 가능: {', '.join(bench.BENCH_STAGE_GROUPS)})", file=sys.stderr)
+        return 2
+
+    def on_stage(rows, stage, sample):
+        print(f"  {rows:>9,}행  {stage:<26} {sample['seconds']:>8.3f}초  {sample['rows_per_sec'] or 0:>12,}행/초  "
+              f"RSS 최대 {sample['peak_rss_mb']:>7,.0f}MB (+{sample['rss_delta_mb']:,.0f})", flush=True)
+
+    record = bench.benchmark(sizes, groups, repeat=args.repeat, data_dir=args.data_dir, seed=args.seed,
+                             history_path=args.history, baseline_path=args.baseline,
+                             update_baseline=args.update_baseline, time_tolerance=args.tolerance,
+                             memory_tolerance=args.memory_tolerance, on_stage=on_stage)
+    print(f"이력: {args.history}")
+    if args.update_baseline:
+        print(f"기준선 갱신: {args.baseline}")
+    if record['problems']:
+        print(f"측정값을 믿을 수 없는 단계 {len(record['problems'])}건 (회귀 비교/기준선에서 제외):")
+        for p in record['problems']:
+            print(f"  {p['rows']:,}행 {p['stage']}: {p['problem']}")
+    if record['regressions']:
+        print(f"성능 회귀 {len(record['regressions'])}건:")
+        for r in record['regressions']:
+            print(f"  {r['rows']:,}행 {r['stage']} {r['metric']}: {r['baseline']} -> {r['current']} (x{r['ratio']})")
+    return 1 if record['regressions'] or record['problems'] else 0
+
+def cmd_loadtest(args):
+    from . import loadtest
+    from .bench import parse_size
+    try:
+        sessions = [int(v) for v in args.sessions.split(',') if v.strip()]
+        rows = parse_size(args.rows)
+    except ValueError:
+        print(f"세션 수/행 수 형식 오류: {args.sessions} / {args.rows} (예: --sessions 1,2,4 --rows 10k)", file=sys.stderr)
+        return 2
+    reports = [f.strip() for f in args.reports.split(',') if f.strip()]
+    unknown = [f for f in reports if f not in loadtest.SERVICE_REPORT_FORMATS]
+    if unknown or (args.url and 'word' in reports):
+        print(f"지원하지 않는 보고서 형식: {', '.join(unknown) or 'word (HTTP)'}", file=sys.stderr)
+        return 2
+
+    def on_session(record):
+        if args.verbose:
+            phases = '  '.join(f"{key} {record[key]:.2f}" for key in loadtest.LOADTEST_PHASES if record.get(key) is not None)
+            print(f"    세션 {record['session']}/{record['iteration']} {record['status']}  {phases}"
+                  f"{'  ' + record['error'] if record.get('error') else ''}", flush=True)
+
+    def on_level(level):
+        total, throughput, memory = level['latency']['total'], level['throughput'], level['memory']
+        print(f"  동시 세션 {level['sessions']:>3}  완료 {level['completed']:>3} 실패 {level['failed']:>3}  "
+              f"전체 p50 {total.get('p50', 0):>7.2f}초 p95 {total.get('p95', 0):>7.2f}초 최대 {total.get('max', 0):>7.2f}초  "
+              f"{throughput['sessions_per_minute'] or 0:>6.2f}세션/분 {throughput['rows_per_second'] or 0:>9,}행/초  "
+              f"RSS 최대 {memory['peak_rss_mb'] or 0:>7,.0f}MB", flush=True)
+        queue = level['latency']['queue']
+        if queue.get('count'):
+            print(f"    대기 p95 {queue['p95']:.2f}초, 최대 실행 {memory['peak_running_jobs']}개 / 대기 {memory['peak_pending_jobs']}개")
+        for error in level['errors'][:5]:
+            print(f"    오류: {error}")
+
+    print(f"부하 시험: {args.url or '프로세스 내 스케줄러'}, {rows:,}행 {args.format} 파일, 세션 {args.sessions}")
+    record = loadtest.load_test(sessions, rows, args.analyses, reports, iterations=args.iterations,
+                                ramp_seconds=args.ramp, url=args.url, workers=args.workers, data_dir=args.data_dir,
+                                fmt=args.format, seed=args.seed, shared_file=args.shared_file,
+                                on_session=on_session, on_level=on_level)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+        print(f"결과: {args.out}")
+    return 1 if any(level['failed'] for level in record['levels']) else 0
+
+def cmd_store(args):
+    from .incremental import IncrementalAnalyzer
+    from .store import STORE_DIR, DeclarationStore
+    root = args.root or STORE_DIR
+    store = DeclarationStore(root)
+
+    if args.action == 'add':
+        files = collect_input_files(args.inputs)
+        if not files:
+            print("추가할 파일이 없습니다.", file=sys.stderr)
+            return 2
+        analyzer = IncrementalAnalyzer(store, args.client, args.analyses) if args.incremental else None
+        failed = 0
+        for path in files:
+            df = read_excel_file(path)
+            if df is None or df.empty:
+                print(f"  ✗ {path}: 파일을 읽을 수 없거나 데이터가 없습니다", file=sys.stderr)
+                failed += 1
+                continue
+            started = time.perf_counter()
+            if analyzer is not None:
+                record, results = analyzer.append(df, source=os.path.abspath(path), replace=not args.keep_existing)
+            else:
+                record = store.append(df, args.client, source=os.path.abspath(path), replace=not args.keep_existing)
+            print(f"  ✓ {path}: {record['rows']:,}행 -> 신규 {record['added']:,} / 교체 {record['replaced']:,} / "
+                  f"제외 {record['skipped']:,} ({', '.join(record['partitions'])})"
+                  f"{'' if record['deduplicated'] else '  ⚠ 란번호/행번호가 없어 중복 제거 안 함'}")
+            if analyzer is not None:
+                info = record['incremental']
+                scope = '전체 이력' if info['mode'] == 'full' else \
+                    ', '.join(f"{column} {count:,}개" for column, count in info['groups'].items())
+                print(f"    증분 분석: {scope}, {info['recomputed_rows']:,}행 재계산 ({time.perf_counter() - started:.1f}초)")
+        return 0 if failed == 0 else 1
+
+    if args.action == 'list':
+        partitions = store.partitions()
+        if partitions.empty:
+            print(f"저장소가 비어 있습니다: {root}")
+        else:
+            print(partitions.to_string(index=False))
+        return 0
+
+    # analyze
+    clients = [c.strip() for c in args.client.split(',') if c.strip()] if args.client else None
+    if args.incremental and (not clients or len(clients) != 1 or args.start or args.end):
+        print("--incremental은 고객사 하나의 전체 이력에만 쓸 수 있습니다 (--client 하나, --from/--to 없이).", file=sys.stderr)
+        return 2
+    try:
+        df = store.load(clients, start=args.start, end=args.end)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    if df.empty:
+        print("조건에 맞는 신고가 없습니다.", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    meta = {'store': os.path.abspath(root), 'clients': clients, 'start': args.start, 'end': args.end,
+            'rows': len(df), 'timings': {}}
+
+    def on_progress(key, elapsed):
+        if elapsed is not None:
+            meta['timings'][key] = round(elapsed, 3)
+
+    results = {}
+    if args.incremental:
+        # 저장된 증분 결과를 쓰고 종합 분석 등 나머지만 계산 (이력은 보고서 원본 시트용으로 읽음)
+        stored = IncrementalAnalyzer(store, clients[0], args.analyses).current_results()
+        results = {key: stored[key] for key in ANALYSIS_KEY_MAP.values() if key in stored}
+        meta['incremental'] = True
+    results = run_analyses(df, args.analyses, results, on_progress=on_progress)
+    source = f"{os.path.abspath(root)} ({','.join(clients or ['전체'])}, {args.start or '처음'}~{args.end or '끝'})"
+    manifest = build_manifest(df, args.analyses, results, file_name=source, timings=meta['timings'])
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    write_file_outputs(args.out, df, results, args.formats, meta, manifest)
+    with open(args.out + '.manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(to_jsonable(manifest), f, ensure_ascii=False, indent=2)
+    print(f"{len(df):,}행 분석 완료 ({time.perf_counter() - started:.1f}초)")
+    for key, count in meta['findings'].items():
+        print(f"  {key}: {count:,}건")
+    for path in meta['outputs'] + [args.out + '.manifest.json']:
+        print(f"  {path}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m tradeguard', description='TradeGuard 수입신고 Risk 분석 (헤드리스)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='디렉터리/글롭의 파일을 일괄 분석')
+    batch.add_argument('inputs', nargs='+', help='입력 파일, 디렉터리 또는 글롭 패턴 (예: "exports/**/*.xlsx")')
+    batch.add_argument('-o', '--out', default='tradeguard_output', help='출력 디렉터리 (기본: tradeguard_output)')
+    add_batch_arguments(batch)
+    batch.add_argument('--profile', choices=PROFILE_MODES, default=None,
+                       help='분석 실행 프로파일을 파일별로 저장 (cprofile: .prof, sample: .collapsed.txt; 기본: TRADEGUARD_PROFILE)')
+    batch.set_defaults(func=cmd_batch)
+
+    serve = commands.add_parser('serve', help='로컬 HTTP 분석 서비스 실행')
+    serve.add_argument('--host', default=None, help='바인드 주소 (기본: TRADEGUARD_SERVICE_HOST 또는 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=None, help='포트 (기본: TRADEGUARD_SERVICE_PORT 또는 8765)')
+    serve.add_argument('-j', '--workers', type=int, default=None, help='동시 분석 작업 수 (기본: TRADEGUARD_MAX_WORKERS 또는 2)')
+    serve.add_argument('--max-upload-mb', type=float, default=None, help='업로드 최대 크기 MB (기본: TRADEGUARD_MAX_UPLOAD_MB 또는 200)')
+    serve.add_argument('--max-pending', type=int, default=None, help='최대 대기 작업 수 (기본: TRADEGUARD_MAX_PENDING_JOBS 또는 16)')
+    serve.set_defaults(func=cmd_serve)
+
+    watch = commands.add_parser('watch', help='폴더를 감시하여 새/변경 파일만 분석 (결과는 입력 파일 옆에 저장)')
+    watch.add_argument('directory', help='감시할 디렉터리')
+    watch.add_argument('--interval', type=float, default=30, help='스캔 간격(초, 기본: 30)')
+    watch.add_argument('--settle', type=float, default=10, help='수정 후 이 시간(초)이 지난 파일만 처리 (기본: 10)')
+    watch.add_argument('--once', action='store_true', help='한 번 스캔하여 처리하고 종료 (cron 등)')
+    add_batch_arguments(watch)
+    watch.set_defaults(func=cmd_watch)
+
+    synth = commands.add_parser('synth', help='정답 라벨이 있는 합성 수입신고 데이터 생성 (성능/정확도 시험용)')
+    synth.add_argument('--rows', type=int, default=100000, help='생성 행 수 (기본: 100000)')
+    synth.add_argument('-o', '--out', default='synthetic/declarations', help='출력 경로 접두사 (기본: synthetic/declarations)')
+    synth.add_argument('--formats', type=lambda v: tuple(f.strip() for f in v.split(',') if f.strip()), default=('csv',),
+                       help='출력 형식 (csv, xlsx, parquet; 쉼표 구분, 기본: csv)')
+    synth.add_argument('--seed', type=int, default=42, help='난수 시드 (같은 시드면 같은 데이터, 기본: 42)')
+    synth.add_argument('--specs', type=int, default=None, help='규격1 종류 수 (기본: 행 수/200)')
+    synth.add_argument('--companies', type=int, default=None, help='거래처 수 (기본: 규격 수/5)')
+    synth.add_argument('--anomaly-rate', type=float, default=0.01, help='규칙별 이상 건 비율 (기본: 0.01)')
+    synth.add_argument('--currency-mix', type=_parse_currency_mix, default=None,
+                       help='결제통화 비중 (예: USD=0.6,EUR=0.15,JPY=0.1,CNY=0.1,GBP=0.05)')
+    synth.add_argument('--chunk-rows', type=int, default=250000, help='청크 크기(행, 기본: 250000)')
+    synth.set_defaults(func=cmd_synth)
+
+    bench = commands.add_parser('bench', help='수집/분석/보고서 단계별 성능 측정 및 기준선 대비 회귀 확인')
+    bench.add_argument('--sizes', default='10k,100k,1m', help='데이터 크기 (쉼표 구분, 기본: 10k,100k,1m)')
+    bench.add_argument('--stages', default='ingest,analysis,summary,report',
+                       help='측정 단계 그룹 (ingest, analysis, summary, report; 기본: 전체)')
+    bench.add_argument('--repeat', type=int, default=1, help='단계별 반복 횟수, 최솟값 기록 (기본: 1)')
+    bench.add_argument('--seed', type=int, default=42, help='합성 데이터 시드 (기본: 42)')
+    bench.add_argument('--data-dir', default=None, help='합성 데이터 보관 디렉터리 (지정 시 재사용, 기본: 임시 디렉터리)')
+    bench.add_argument('--history', default='benchmarks/history.jsonl', help='이력 파일 (기본: benchmarks/history.jsonl)')
+    bench.add_argument('--baseline', default='benchmarks/baseline.json', help='기준선 파일 (기본: benchmarks/baseline.json)')
+    bench.add_argument('--update-baseline', action='store_true', help='이번 측정값으로 기준선 갱신')
+    bench.add_argument('--tolerance', type=float, default=0.3, help='시간 회귀 허용 비율 (기본: 0.3 = 30%%)')
+    bench.add_argument('--memory-tolerance', type=float, default=0.3, help='메모리 회귀 허용 비율 (기본: 0.3)')
+    bench.set_defaults(func=cmd_bench)
+
+    load = commands.add_parser('loadtest', help='동시 세션 부하 시험 (업로드 -> 분석 -> 보고서 지연 백분위수, 처리량, 메모리)')
+    load.add_argument('--sessions', default='1,2,4', help='동시 세션 수 단계 (쉼표 구분, 기본: 1,2,4)')
+    load.add_argument('--rows', default='10k', help='세션별 업로드 파일 행 수 (기본: 10k)')
+    load.add_argument('--format', choices=('csv', 'xlsx', 'parquet'), default='csv', help='업로드 파일 형식 (기본: csv)')
+    load.add_argument('--analyses', type=_parse_analyses, default=list(ANALYSIS_KEY_MAP),
+                      help='실행할 분석 키 또는 라벨, 쉼표 구분 (기본: 전체)')
+    load.add_argument('--reports', default='excel,html', help='세션별로 받을 보고서 (excel, word, html, html_full; 기본: excel,html)')
+    load.add_argument('--iterations', type=int, default=1, help='세션별 반복 업로드 횟수 (기본: 1)')
+    load.add_argument('--ramp', type=float, default=0.0, help='세션 시작을 분산할 시간(초, 기본: 0 = 동시에)')
+    load.add_argument('--url', default=None, help='HTTP 분석 서비스 주소 (예: http://127.0.0.1:8765; 기본: 프로세스 내)')
+    load.add_argument('-j', '--workers', type=int, default=None, help='프로세스 내 분석 워커 수 (기본: TRADEGUARD_MAX_WORKERS 또는 2)')
+    load.add_argument('--shared-file', action='store_true', help='모든 세션이 같은 파일을 업로드')
+    load.add_argument('--seed', type=int, default=42, help='합성 데이터 시드 (세션 i는 seed+i, 기본: 42)')
+    load.add_argument('--data-dir', default=None, help='합성 데이터 보관 디렉터리 (지정 시 재사용)')
+    load.add_argument('-o', '--out', default=None, help='세션별 기록/시간대별 메모리를 포함한 결과 JSON 경로')
+    load.add_argument('-v', '--verbose', action='store_true', help='세션이 끝날 때마다 구간별 시간 출력')
+    load.set_defaults(func=cmd_loadtest)
+
+    store = commands.add_parser('store', help='고객사/수리월별 신고 이력 저장소 (Parquet) 추가, 조회, 기간 분석')
+    store_actions = store.add_subparsers(dest='action', required=True)
+    store_add = store_actions.add_parser('add', help='파일을 정규화하여 저장소에 추가 (수입신고번호/란번호/행번호 중복 제거)')
+    store_add.add_argument('inputs', nargs='+', help='입력 파일, 디렉터리 또는 글롭 패턴')
+    store_add.add_argument('--client', required=True, help='고객사 이름 (파티션 키)')
+    store_add.add_argument('--keep-existing', action='store_true', help='이미 저장된 신고 행은 새 값으로 바꾸지 않음')
+    store_add.add_argument('--incremental', action='store_true',
+                           help='추가한 행이 속한 신고/규격/거래처만 다시 분석하여 저장된 결과에 병합')
+    store_add.add_argument('--analyses', type=_parse_analyses, default=list(ANALYSIS_KEY_MAP),
+                           help='증분 분석할 분석 키 또는 라벨, 쉼표 구분 (기본: 전체, 종합 분석은 제외)')
+    store_list = store_actions.add_parser('list', help='파티션별 행 수/크기')
+    store_analyze = store_actions.add_parser('analyze', help='기간/고객사를 골라 저장소 데이터로 분석')
+    store_analyze.add_argument('--client', default=None, help='고객사 (쉼표 구분, 기본: 전체)')
+    store_analyze.add_argument('--from', dest='start', default=None, help='시작 수리월/일 (예: 2024-01 또는 2024-01-15)')
+    store_analyze.add_argument('--to', dest='end', default=None, help='끝 수리월/일 (포함)')
+    store_analyze.add_argument('-o', '--out', default='tradeguard_output/store', help='보고서 경로 접두사 (기본: tradeguard_output/store)')
+    store_analyze.add_argument('--analyses', type=_parse_analyses, default=list(ANALYSIS_KEY_MAP),
+                               help='실행할 분석 키 또는 라벨, 쉼표 구분 (기본: 전체)')
+    store_analyze.add_argument('--formats', type=_parse_formats, default=DEFAULT_BATCH_FORMATS,
+                               help=f"보고서 형식, 쉼표 구분 ({', '.join(BATCH_FORMATS)}; 기본: {','.join(DEFAULT_BATCH_FORMATS)})")
+    store_analyze.add_argument('--incremental', action='store_true',
+                               help='store add --incremental로 갱신된 결과 사용 (고객사 하나, 전체 기간; 상태가 없으면 새로 계산)')
+    for sub in (store_add, store_list, store_analyze):
+        sub.add_argument('--root', default=None, help='저장소 디렉터리 (기본: TRADEGUARD_STORE_DIR 또는 tradeguard_store)')
+    store.set_defaults(func=cmd_store)
+    return parser
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,54 @@
+"""수입신고 데이터 컬럼명 및 공용 상수"""
+import os
+
+# --- Constants ---
+COL_TARIFF_RATE = '관세실행세율'
+COL_RATE_TYPE = '세율구분'
+COL_TAX_CLASSIFICATION = '세율구분'  # COL_RATE_TYPE과 동일
+COL_IMPORT_DEC_NO = '수입신고번호'
+COL_ACCEPTANCE_DATE = '수리일자'
+COL_BL_NO = 'B/L번호'
+COL_HS_CODE = '세번부호'
+COL_RATE_DESC = '세율설명'
+COL_EXPORT_COUNTRY = '적출국코드'
+COL_ORIGIN_COUNTRY = '원산지코드'
+COL_SPEC_1 = '규격1'
+COL_SPEC_2 = '규격2'
+COL_SPEC_3 = '규격3'
+COL_COMP_1 = '성분1'
+COL_COMP_2 = '성분2'
+COL_COMP_3 = '성분3'
+COL_ACTUAL_DUTY = '실제관세액'
+COL_PAYMENT_METHOD = '결제방법'
+COL_CURRENCY = '결제통화단위'
+COL_TRADE_COMPANY = '무역거래처상호'
+COL_TRADE_COUNTRY = '무역거래처국가코드'
+COL_TRADE_NAME = '거래품명'
+COL_LINE_NO = '란번호'
+COL_ROW_NO = '행번호'
+COL_QTY_1 = '수량_1'
+COL_UNIT_1 = '수량단위_1'
+COL_UNIT_PRICE = '단가'
+COL_AMOUNT = '금액'
+COL_LINE_PAYMENT_AMT = '란결제금액'
+COL_ROW_DUTY = '행별관세'
+COL_FTA_REVIEW = 'FTA사후환급 검토'
+COL_TRADE_TYPE = '거래구분'
+COL_INTERNAL_TAX_CODE = '내국세부호'
+COL_TAXABLE_KRW = '과세가격원화'
+COL_TAXABLE_USD = '과세가격달러'
+COL_LAW_CODE = '법령코드'
+COL_ISSUED_DOC_NAME = '발급서류명'
+COL_NON_TARGET_REASON = '비대상사유'
+COL_FREIGHT = '운임'
+COL_FREIGHT_CURRENCY = '운임통화단위'
+COL_INPUT_FREIGHT = '입력운임'
+COL_CALCULATED_FREIGHT_KRW = '계산된운임원화'
+COL_INCOTERMS = '인도조건'
+COL_TARIFF_EXEMPTION_CODE = '관세감면분납부호'
+COL_TARIFF_EXEMPTION_RATE = '관세감면율'
+
+# --- Reference Data ---
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(PACKAGE_DIR)
+USAGE_RATE_HSK_PATH = os.path.join(PROJECT_DIR, 'usage_rate_hsk.csv')
@@ -0,0 +1,177 @@
+"""폴더 감시 데몬 (python -m tradeguard watch <dir>)
+
+공유 폴더를 주기적으로 스캔하여 새로 들어오거나 내용이 바뀐 신고 파일만 배치 파이프라인
+(cli.process_file)으로 분석하고, 결과를 입력 파일 옆에 '<이름>.tradeguard.*'로 저장한다.
+
+- 크기/수정 시각이 그대로인 파일은 해시도 계산하지 않는다.
+- 수정 시각만 바뀐 파일, 다른 이름으로 복사된 같은 내용은 SHA-256으로 걸러낸다.
+- 분석은 작업 수 제한이 있는 워커 프로세스에서 실행되어 데몬 프로세스 메모리는 일정하다.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import ANALYSIS_KEY_MAP
+from .cli import DEFAULT_BATCH_FORMATS, DEFAULT_BATCH_WORKERS, collect_input_files, process_file
+from .manifest import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# --- Watch Settings ---
+
+WATCH_INTERVAL_SECONDS = 30
+WATCH_SETTLE_SECONDS = 10  # 수정 후 이 시간이 지나야 처리 (복사 중인 파일 제외)
+WATCH_TASKS_PER_CHILD = 20  # 워커 프로세스 재시작 주기 (장기 실행 시 메모리 누적 방지)
+WATCH_STATE_FILE = '.tradeguard_watch.json'
+OUTPUT_MARKER = '.tradeguard'
+
+def output_prefix_for(path):
+    """입력 파일 옆 결과 경로 접두사 (신고.xlsx -> 신고.tradeguard)"""
+    return os.path.splitext(path)[0] + OUTPUT_MARKER
+
+class FolderWatcher:
+    """폴링 기반 폴더 감시와 증분 처리 상태 관리
+
+    state['files']: 입력 경로 -> {size, mtime_ns, sha256, status, processed_at, duplicate_of}
+    상태는 감시 폴더의 WATCH_STATE_FILE에 저장되어 재시작 후에도 이미 처리한 파일을 건너뛴다.
+    """
+
+    def __init__(self, directory, analysis_options=None, formats=DEFAULT_BATCH_FORMATS,
+                 workers=DEFAULT_BATCH_WORKERS, settle_seconds=WATCH_SETTLE_SECONDS):
+        self.directory = os.path.abspath(directory)
+        self.analysis_options = list(analysis_options or ANALYSIS_KEY_MAP)
+        self.formats = tuple(formats)
+        self.workers = max(1, workers)
+        self.settle_seconds = settle_seconds
+        self.state_path = os.path.join(self.directory, WATCH_STATE_FILE)
+        self.state = self._load_state()
+        self.in_flight = {}  # 입력 경로 -> (future, stat, sha256)
+        self.stop_event = threading.Event()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            state.setdefault('files', {})
+            return state
+        except FileNotFoundError:
+            return {'files': {}}
+        except Exception as e:
+            logger.warning(f"감시 상태 파일을 읽을 수 없어 새로 시작합니다: {e}")
+            return {'files': {}}
+
+    def _save_state(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def scan(self):
+        """처리할 (경로, stat, sha256) 목록 (상태 갱신 포함)"""
+        files = self.state['files']
+        now = time.time()
+        present = set()
+        todo = []
+        for path in collect_input_files([self.directory]):
+            if OUTPUT_MARKER not in os.path.basename(path):
+                present.add(os.path.abspath(path))
+
+        # 사라진 파일의 상태는 먼저 정리 (상태 파일이 계속 커지지 않도록, 이름이 바뀐 파일이 옛 경로의 중복이 되지 않도록)
+        for path in [p for p in files if p not in present]:
+            del files[path]
+        known_hashes = {info['sha256']: path for path, info in files.items()
+                        if info.get('sha256') and info.get('status') == 'done'}
+        known_hashes.update((sha256, path) for path, (_, _, sha256) in self.in_flight.items())
+
+        for path in sorted(present):
+            if path in self.in_flight:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            info = files.get(path)
+            if info and info.get('status') == 'duplicate' and info.get('duplicate_of') not in present:
+                info = None  # 원본이 사라진 중복 파일은 다시 판단
+            if info and info['size'] == stat.st_size and info['mtime_ns'] == stat.st_mtime_ns:
+                continue  # 변경 없음: 해시 계산도 생략
+            if now - stat.st_mtime < self.settle_seconds:
+                continue  # 아직 복사/저장 중일 수 있음
+
+            try:
+                sha256 = file_sha256(path)
+            except OSError as e:
+                logger.warning(f"파일 해시 계산 실패 ({path}): {e}")
+                continue
+            if info and info.get('sha256') == sha256:
+                # 수정 시각만 바뀜 (실패한 파일도 내용이 바뀔 때까지 다시 처리하지 않음)
+                info.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                continue
+            duplicate_of = known_hashes.get(sha256)
+            if duplicate_of and duplicate_of != path:
+                files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256,
+                               'status': 'duplicate', 'duplicate_of': duplicate_of, 'processed_at': now}
+                logger.info(f"중복 파일 건너뜀: {path} (= {duplicate_of})")
+                continue
+            known_hashes[sha256] = path
+            todo.append((path, stat, sha256))
+
+        return todo
+
+    def _collect_finished(self):
+        files = self.state['files']
+        for path, (future, stat, sha256) in list(self.in_flight.items()):
+            if not future.done():
+                continue
+            del self.in_flight[path]
+            if future.cancelled():
+                continue  # 종료 시 시작 전 취소된 파일은 다음 실행에서 다시 처리
+            try:
+                meta = future.result()
+            except Exception as e:
+                meta = {'status': 'failed', 'error': str(e), 'rows': 0}
+            files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256,
+                           'status': meta['status'], 'rows': meta.get('rows', 0), 'error': meta.get('error'),
+                           'processed_at': time.time()}
+            if meta['status'] == 'done':
+                logger.info(f"분석 완료: {path} ({meta['rows']:,}행, {meta.get('elapsed', 0):.1f}초)")
+            else:
+                logger.warning(f"분석 실패: {path}: {meta.get('error')}")
+
+    def poll(self, pool):
+        """한 번 스캔하여 새 작업 제출, 끝난 작업 반영"""
+        self._collect_finished()
+        for path, stat, sha256 in self.scan():
+            logger.info(f"분석 시작: {path}")
+            future = pool.submit(process_file, path, output_prefix_for(path), self.analysis_options, self.formats)
+            self.in_flight[path] = (future, stat, sha256)
+        self._save_state()
+
+    def run(self, interval=WATCH_INTERVAL_SECONDS, once=False):
+        """감시 루프 (once=True면 한 번 스캔하고 제출한 작업이 끝나면 종료)"""
+        with ProcessPoolExecutor(max_workers=self.workers, max_tasks_per_child=WATCH_TASKS_PER_CHILD) as pool:
+            self.poll(pool)
+            while not once and not self.stop_event.wait(interval):
+                self.poll(pool)
+            if not once:
+                for future, _, _ in self.in_flight.values():
+                    future.cancel()
+        # 풀 종료 시 실행 중인 파일은 끝까지 처리됨
+        self._collect_finished()
+        self._save_state()
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+def watch(directory, interval=WATCH_INTERVAL_SECONDS, once=False, **kwargs):
+    """폴더 감시 실행 (SIGINT/SIGTERM 시 진행 중인 파일을 마치고 종료)"""
+    watcher = FolderWatcher(directory, **kwargs)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, watcher.stop)
+    print(f"폴더 감시 시작: {watcher.directory} ({interval}초 간격, 워커 {watcher.workers}개)")
+    watcher.run(interval=interval, once=once)
+    return watcher
@@ -0,0 +1,349 @@
+"""이력 저장소 증분 분석 (새 달이 추가될 때 영향받은 그룹만 재계산)
+
+Risk 규칙은 모두 아래 그룹 중 하나 안에서만 결과가 정해지므로, 추가된 행이 속한 그룹만
+저장소에서 다시 읽어 분석하고 저장된 결과의 같은 그룹 행을 바꿔 끼운다.
+
+- 신고 단위 (수입신고번호): 8% 환급, 0% 세율, 내국세, F세율, FTA 기회, 저가, 무상운임, 용도세율
+- 규격 단위 (규격1): 세율 위험(규격별 세번부호 수), 단가 위험(규격별 Z-Score)
+- 수입요건: 불일치 판정은 규격 단위지만 결과는 불일치 규격이 있는 신고의 모든 행이므로,
+  불일치 규격 목록을 상태로 두고 영향 규격만 다시 판정한 뒤 그 규격이 들어 있는 신고를 재계산한다.
+- 거래처 단위 (무역거래처상호): 통화단위 불일치. 이상치점수는 국가-통화 집계를 상태로 두고
+  추가된 행의 국가만 다시 센 뒤, 점수가 바뀐 국가를 쓰는 거래처도 함께 재계산한다.
+
+정정 신고로 교체된 행은 교체 전 규격/거래처/국가도 영향 그룹에 넣는다.
+상태는 <저장소>/_incremental/client=<고객사>/ 에 저장된다.
+
+    results.pkl             분석 키 -> 결과 DataFrame (큐브 포함)
+    country_currency.parquet  국가-통화 조합별 행 수
+    declarations.parquet    신고번호별 큐브 차원 (수리일자, 거래처, 원산지, 세율구분)
+    state.json              분석 목록, 기준값, 수입요건 불일치 규격, 마지막 갱신 정보
+
+Summary(종합 분석)는 전체 신고 수/월별 추이 등 전체 집계라서 증분 대상이 아니다 (보고서를 만들 때
+불러온 이력으로 run_analyses가 채움).
+결과 행 순서는 분석 함수의 정렬 기준을 따르며, 정렬이 없는 분석은 수리일자/신고번호 순이다.
+"""
+import datetime
+import json
+import logging
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+from .analysis import (ANALYSIS_FUNCTIONS, ANALYSIS_KEY_MAP, ANALYSIS_THRESHOLDS, build_risk_cube,
+                       count_country_currency, create_currency_consistency_analysis,
+                       create_import_requirement_risk_analysis, find_import_requirement_risk_specs, run_analyses)
+from .constants import *
+from .perf import output_size, stage
+from .store import STORE_UPLOAD_LOG, DeclarationStore, to_store_frame
+
+logger = logging.getLogger(__name__)
+
+# --- Incremental Settings ---
+
+INCREMENTAL_DIR = '_incremental'
+INCREMENTAL_STATE_VERSION = 1
+
+# 결과 키 -> 결과가 정해지는 그룹 컬럼
+INCREMENTAL_GROUPS = {
+    'eight_percent': COL_IMPORT_DEC_NO,
+    'zero_risk': COL_IMPORT_DEC_NO,
+    'tariff_risk': COL_SPEC_1,
+    'price_risk': COL_SPEC_1,
+    'domestic_tax': COL_IMPORT_DEC_NO,
+    'import_req_risk': COL_IMPORT_DEC_NO,
+    'f_rate': COL_IMPORT_DEC_NO,
+    'fta_opp': COL_IMPORT_DEC_NO,
+    'low_price': COL_IMPORT_DEC_NO,
+    'currency_inc': COL_TRADE_COMPANY,
+    'free_freight': COL_IMPORT_DEC_NO,
+    'usage_rate': COL_IMPORT_DEC_NO
+}
+
+# 결과 키 -> (정렬 컬럼, 오름차순, 정렬 key) (분석 함수의 정렬 기준과 동일)
+INCREMENTAL_ORDER = {
+    'tariff_risk': ([COL_SPEC_1, COL_HS_CODE], True, None),
+    'price_risk': (['Z-Score'], False, abs),
+    'domestic_tax': ([COL_IMPORT_DEC_NO], True, None),
+    'import_req_risk': ([COL_SPEC_1, COL_IMPORT_DEC_NO], True, None),
+    'fta_opp': ([COL_TAXABLE_USD], False, None),
+    'low_price': ([COL_UNIT_PRICE], True, None),
+    'currency_inc': ([COL_TRADE_COMPANY, COL_CURRENCY], True, None)
+}
+DEFAULT_ORDER = ([COL_ACCEPTANCE_DATE, COL_IMPORT_DEC_NO], True, None)
+
+# 영향 그룹을 찾을 때 읽는 컬럼 (교체 전 값 포함)
+GROUP_COLUMNS = [COL_IMPORT_DEC_NO, COL_SPEC_1, COL_TRADE_COMPANY, COL_TRADE_COUNTRY]
+# 큐브 보완용 신고번호별 대표값 컬럼 (build_risk_cube와 동일)
+DECLARATION_DIM_COLUMNS = [COL_ACCEPTANCE_DATE, COL_TRADE_COMPANY, COL_ORIGIN_COUNTRY, COL_RATE_TYPE]
+
+def _values(frame, column):
+    """컬럼의 결측 아닌 고유값 (문자열 집합, 컬럼이 없으면 빈 집합)"""
+    if frame is None or column not in frame.columns:
+        return set()
+    return {str(v) for v in frame[column].dropna().unique()}
+
+def _in_groups(frame, column, values):
+    """column 값이 values(문자열 집합)에 속하는 행 마스크"""
+    return frame[column].notna() & frame[column].astype(str).isin(values)
+
+def _order(frame, key):
+    """분석 함수와 같은 기준으로 정렬 (값 타입이 섞여 비교할 수 없으면 문자열 기준)"""
+    by, ascending, sort_key = INCREMENTAL_ORDER.get(key, DEFAULT_ORDER)
+    by = [c for c in by if c in frame.columns]
+    if not by:
+        return frame.reset_index(drop=True)
+    try:
+        ordered = frame.sort_values(by=by, ascending=ascending, key=sort_key, kind='stable')
+    except TypeError:
+        ordered = frame.sort_values(by=by, ascending=ascending, key=lambda s: s.astype(str), kind='stable')
+    return ordered.reset_index(drop=True)
+
+def merge_group_results(old, new, column, values, key):
+    """저장된 결과에서 영향 그룹(column in values) 행을 새 결과로 교체"""
+    frames = []
+    if isinstance(old, pd.DataFrame) and not old.empty:
+        frames.append(old[~_in_groups(old, column, values)] if column in old.columns else old)
+    if isinstance(new, pd.DataFrame) and not new.empty:
+        frames.append(new)
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return _order(merged, key)
+
+def _distinct_rows(frames):
+    """여러 그룹 컬럼으로 읽은 프레임들의 서로 다른 행 수 (같은 행이 여러 번 읽혀도 한 번만 셈)"""
+    hashes = set()
+    for frame in frames:
+        if len(frame):
+            hashes.update(pd.util.hash_pandas_object(frame[sorted(frame.columns)].astype(str), index=False).tolist())
+    return len(hashes)
+
+def _declaration_dims(df):
+    dims = [c for c in DECLARATION_DIM_COLUMNS if c in df.columns]
+    if COL_IMPORT_DEC_NO not in df.columns:
+        return pd.DataFrame(columns=[COL_IMPORT_DEC_NO] + dims)
+    return df[[COL_IMPORT_DEC_NO] + dims].drop_duplicates(COL_IMPORT_DEC_NO).reset_index(drop=True)
+
+class IncrementalAnalyzer:
+    """고객사 하나의 저장소 이력에 대한 증분 분석 상태
+
+        analyzer = IncrementalAnalyzer(store, 'A상사', analysis_options)
+        record, results = analyzer.append(df_2024_07, source='2024-07.xlsx')
+
+    상태가 없거나 분석 목록/기준값이 바뀌었거나, 증분 분석을 거치지 않고 저장소에 추가된 업로드가
+    있으면(_uploads.jsonl 기준) 첫 갱신 때 전체 이력으로 다시 만든다(rebuild).
+    """
+
+    def __init__(self, store, client, analysis_options=None):
+        self.store = store if isinstance(store, DeclarationStore) else DeclarationStore(store)
+        self.client = str(client).strip()
+        if not self.client:
+            raise ValueError("고객사 이름이 필요합니다.")
+        self.analysis_options = [o for o in (analysis_options or ANALYSIS_KEY_MAP)
+                                 if ANALYSIS_KEY_MAP.get(o) in INCREMENTAL_GROUPS]
+        self.keys = [ANALYSIS_KEY_MAP[o] for o in self.analysis_options]
+        self.directory = os.path.join(self.store.root, INCREMENTAL_DIR, f"client={quote(self.client, safe='')}")
+        self.state = None
+        self.results = None
+        self.country_counts = None
+        self.declarations = None
+        self.import_req_specs = set()
+
+    # --- State ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _signature(self):
+        return {'version': INCREMENTAL_STATE_VERSION, 'analyses': sorted(self.keys),
+                'thresholds': json.loads(json.dumps(ANALYSIS_THRESHOLDS))}
+
+    def _upload_count(self):
+        """저장소 추가 이력 중 이 고객사 건수 (상태 이후 다른 경로로 추가되었는지 확인용)"""
+        try:
+            with open(os.path.join(self.store.root, STORE_UPLOAD_LOG), encoding='utf-8') as f:
+                return sum(1 for line in f if line.strip() and json.loads(line).get('client') == self.client)
+        except FileNotFoundError:
+            return 0
+
+    def load_state(self):
+        """저장된 상태를 읽어 현재 분석 설정/저장소 이력과 맞으면 True"""
+        try:
+            with open(self._path('state.json'), encoding='utf-8') as f:
+                state = json.load(f)
+            if {k: state.get(k) for k in self._signature()} != self._signature():
+                logger.info(f"증분 분석 설정이 바뀌어 전체 이력으로 다시 계산합니다 ({self.client})")
+                return False
+            if state.get('uploads') != self._upload_count():
+                logger.info(f"증분 분석 이후 저장소에 추가된 업로드가 있어 전체 이력으로 다시 계산합니다 ({self.client})")
+                return False
+            self.results = pd.read_pickle(self._path('results.pkl'))
+            self.country_counts = pd.read_parquet(self._path('country_currency.parquet'))
+            self.declarations = pd.read_parquet(self._path('declarations.parquet'))
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"증분 분석 상태를 읽을 수 없어 전체 이력으로 다시 계산합니다: {e}")
+            return False
+        self.state = state
+        self.import_req_specs = set(state.get('import_req_specs', []))
+        return True
+
+    def _save_state(self, **info):
+        os.makedirs(self.directory, exist_ok=True)
+        files = {
+            'results.pkl': lambda path: pd.to_pickle(self.results, path),
+            'country_currency.parquet': lambda path: self.country_counts.to_parquet(path, index=False),
+            'declarations.parquet': lambda path: self.declarations.to_parquet(path, index=False)
+        }
+        for name, write in files.items():
+            temp_path = self._path(f".{name}.tmp")
+            write(temp_path)
+            os.replace(temp_path, self._path(name))
+        self.state = dict(self._signature(), client=self.client, uploads=self._upload_count(),
+                          import_req_specs=sorted(self.import_req_specs),
+                          updated_at=datetime.datetime.now().isoformat(timespec='seconds'), **info)
+        temp_path = self._path('.state.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self._path('state.json'))
+
+    # --- Full ---
+
+    def rebuild(self, recorder=None):
+        """전체 이력으로 결과와 그룹 상태를 다시 만들고 결과 dict 반환"""
+        with stage(recorder, 'incremental:load') as load_stage:
+            df = self.store.load([self.client])
+            load_stage.rows_out = len(df)
+        if COL_TRADE_COUNTRY in df.columns and COL_CURRENCY in df.columns:
+            self.country_counts = count_country_currency(df)
+        else:
+            self.country_counts = pd.DataFrame(columns=[COL_TRADE_COUNTRY, COL_CURRENCY, 'count'])
+        self.declarations = to_store_frame(_declaration_dims(df))
+        self.results = {}
+        if 'import_req_risk' in self.keys and len(df):
+            # 불일치 규격 목록은 증분 갱신에 필요하므로 직접 판정한 뒤 결과에 넣어 둠
+            with stage(recorder, 'analysis:import_req_risk', len(df)) as analysis_stage:
+                self.import_req_specs = {str(spec) for spec in find_import_requirement_risk_specs(df)}
+                self.results['import_req_risk'] = create_import_requirement_risk_analysis(df, risk_specs=self.import_req_specs)
+                analysis_stage.rows_out = output_size(self.results['import_req_risk'])
+        if len(df):
+            run_analyses(df, self.analysis_options, self.results, recorder=recorder)
+            self.results = {key: self.results[key] for key in self.keys + ['cube'] if key in self.results}
+        self._save_state(mode='full', rows=len(df), recomputed_rows=len(df))
+        return self.results
+
+    # --- Incremental ---
+
+    def append(self, df, source=None, replace=True, recorder=None):
+        """df를 저장소에 추가하고 영향받은 그룹만 재분석, (저장 결과 dict, 분석 결과 dict) 반환
+
+        저장 결과 dict에는 'incremental'(영향 그룹 수, 다시 읽은 행 수, 모드)이 추가된다.
+        """
+        has_state = self.load_state()
+        delta = to_store_frame(df[[c for c in GROUP_COLUMNS if c in df.columns]])
+        if has_state and (COL_IMPORT_DEC_NO not in delta.columns or delta[COL_IMPORT_DEC_NO].isna().any()):
+            # 신고번호가 없는 행은 신고 단위 그룹으로 묶을 수 없음
+            logger.warning(f"수입신고번호가 없는 행이 있어 전체 이력으로 다시 계산합니다 ({self.client})")
+            has_state = False
+
+        previous = None
+        if has_state:
+            # 교체될 행의 이전 그룹 값 (정정으로 규격/거래처가 바뀐 경우 이전 그룹도 다시 계산)
+            with stage(recorder, 'incremental:previous') as previous_stage:
+                previous = self.store.load([self.client], columns=GROUP_COLUMNS, optimize=False,
+                                           filters=[(COL_IMPORT_DEC_NO, 'in', sorted(_values(delta, COL_IMPORT_DEC_NO)))])
+                previous_stage.rows_out = len(previous)
+
+        with stage(recorder, 'incremental:append', len(df)):
+            record = self.store.append(df, self.client, source=source, replace=replace)
+
+        if not has_state:
+            self.rebuild(recorder=recorder)
+            record['incremental'] = {'mode': 'full', 'recomputed_rows': self.state['recomputed_rows']}
+            return record, self.results
+
+        groups = {column: _values(delta, column) | _values(previous, column) for column in GROUP_COLUMNS}
+        recomputed = self._update(groups, recorder=recorder)
+        rows = self.state.get('rows', 0) + record['added']
+        self._save_state(mode='incremental', rows=rows, recomputed_rows=recomputed,
+                         groups={column: len(values) for column, values in groups.items()})
+        record['incremental'] = {'mode': 'incremental', 'recomputed_rows': recomputed,
+                                 'groups': self.state['groups']}
+        return record, self.results
+
+    def _load_groups(self, column, values, recorder=None):
+        with stage(recorder, f"incremental:load:{column}") as load_stage:
+            frame = self.store.load([self.client], filters=[(column, 'in', sorted(values))]) if values else pd.DataFrame()
+            load_stage.rows_out = len(frame)
+        return frame
+
+    def _update(self, groups, recorder=None):
+        """영향 그룹 재분석 후 결과/상태 병합, 다시 읽은 서로 다른 행 수 반환"""
+        countries = groups[COL_TRADE_COUNTRY]
+        if countries:
+            # 국가-통화 집계는 추가/교체된 행의 국가만 다시 셈
+            with stage(recorder, 'incremental:country_currency') as count_stage:
+                fresh = self.store.load([self.client], columns=[COL_TRADE_COUNTRY, COL_CURRENCY], optimize=False,
+                                        filters=[(COL_TRADE_COUNTRY, 'in', sorted(countries))])
+                count_stage.rows_out = len(fresh)
+            if COL_TRADE_COUNTRY in fresh.columns and COL_CURRENCY in fresh.columns:
+                kept = self.country_counts[~_in_groups(self.country_counts, COL_TRADE_COUNTRY, countries)]
+                self.country_counts = pd.concat([kept, count_country_currency(fresh)], ignore_index=True)
+
+        if 'currency_inc' in self.keys:
+            # 점수가 바뀐 국가를 쓰는 기존 결과의 거래처도 다시 계산
+            current = self.results.get('currency_inc')
+            if isinstance(current, pd.DataFrame) and COL_TRADE_COUNTRY in current.columns and countries:
+                hit = _in_groups(current, COL_TRADE_COUNTRY, countries)
+                groups[COL_TRADE_COMPANY] = groups[COL_TRADE_COMPANY] | _values(current[hit], COL_TRADE_COMPANY)
+
+        frames = {}
+        if 'import_req_risk' in self.keys:
+            # 영향 규격의 불일치 여부를 다시 판정하고, 그 규격이 들어 있는 신고를 모두 재계산 대상으로
+            frames[COL_SPEC_1] = self._load_groups(COL_SPEC_1, groups[COL_SPEC_1], recorder)
+            with stage(recorder, 'incremental:import_req_specs', len(frames[COL_SPEC_1])):
+                fresh = {str(spec) for spec in find_import_requirement_risk_specs(frames[COL_SPEC_1])}
+            self.import_req_specs = {spec for spec in self.import_req_specs if spec not in groups[COL_SPEC_1]} | fresh
+            groups[COL_IMPORT_DEC_NO] = groups[COL_IMPORT_DEC_NO] | _values(frames[COL_SPEC_1], COL_IMPORT_DEC_NO)
+
+        for column in {INCREMENTAL_GROUPS[key] for key in self.keys} - set(frames):
+            frames[column] = self._load_groups(column, groups[column], recorder)
+        # 분석 함수가 보조 컬럼을 붙이기 전에 셈
+        recomputed = _distinct_rows(frames.values())
+
+        for key in self.keys:
+            column = INCREMENTAL_GROUPS[key]
+            subset = frames[column]
+            with stage(recorder, f"analysis:{key}", len(subset)) as analysis_stage:
+                if not len(subset):
+                    part = pd.DataFrame()
+                elif key == 'currency_inc':
+                    part = create_currency_consistency_analysis(subset, country_counts=self.country_counts)
+                elif key == 'import_req_risk':
+                    part = create_import_requirement_risk_analysis(subset, risk_specs=self.import_req_specs)
+                else:
+                    part = ANALYSIS_FUNCTIONS[key](subset)
+                self.results[key] = merge_group_results(self.results.get(key), part, column, groups[column], key)
+                analysis_stage.rows_out = output_size(self.results[key])
+
+        # 큐브는 신고번호별 대표값 상태와 병합된 결과로 다시 집계
+        decls = frames.get(COL_IMPORT_DEC_NO)
+        if decls is None:
+            decls = self._load_groups(COL_IMPORT_DEC_NO, groups[COL_IMPORT_DEC_NO], recorder)
+        touched = groups[COL_IMPORT_DEC_NO]
+        kept = self.declarations[~_in_groups(self.declarations, COL_IMPORT_DEC_NO, touched)]
+        fresh = to_store_frame(_declaration_dims(decls))
+        self.declarations = pd.concat([f for f in (kept, fresh) if len(f)] or [kept], ignore_index=True)
+        with stage(recorder, 'cube', len(self.declarations)) as cube_stage:
+            self.results['cube'] = build_risk_cube(self.declarations, self.results)
+            cube_stage.rows_out = output_size(self.results['cube'])
+        return recomputed
+
+    def current_results(self, recorder=None):
+        """저장된 결과 (상태가 없거나 설정이 바뀌었으면 전체 이력으로 다시 계산)"""
+        if self.results is None and not self.load_state():
+            return self.rebuild(recorder=recorder)
+        return self.results
@@ -0,0 +1,307 @@
+"""파일 로드 및 컬럼 정규화"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+from .perf import stage
+
+logger = logging.getLogger(__name__)
+
+# --- Memory Footprint ---
+
+DOWNCAST_THRESHOLD_MB = float(os.environ.get('TRADEGUARD_DOWNCAST_MB', 256))  # 이 크기(deep)를 넘는 프레임만 다운캐스팅
+DOWNCAST_RATE_COLUMNS = [COL_TARIFF_RATE, COL_TARIFF_EXEMPTION_RATE]  # float64 -> float32 (값이 그대로 보존될 때만)
+DOWNCAST_COUNT_COLUMNS = [COL_LINE_NO, COL_ROW_NO, COL_QTY_1]  # 정수 컬럼 -> 가장 작은 정수 타입
+CATEGORY_COLUMNS = [
+    COL_RATE_TYPE, COL_RATE_DESC, COL_TRADE_TYPE, COL_CURRENCY, COL_PAYMENT_METHOD, COL_INCOTERMS,
+    COL_ORIGIN_COUNTRY, COL_EXPORT_COUNTRY, COL_TRADE_COUNTRY, COL_UNIT_1, COL_FREIGHT_CURRENCY,
+    COL_LAW_CODE, COL_ISSUED_DOC_NAME, COL_NON_TARGET_REASON, COL_INTERNAL_TAX_CODE, COL_TARIFF_EXEMPTION_CODE
+]
+CATEGORY_MAX_RATIO = 0.5  # 고유값 비율이 이 값 이하일 때만 범주형으로 변환
+ARROW_TEXT_COLUMNS = [COL_TRADE_NAME, COL_SPEC_1, COL_SPEC_2, COL_SPEC_3, COL_COMP_1, COL_COMP_2, COL_COMP_3]
+
+def safe_numeric_conversion(series):
+    """Safely convert a series to numeric, handling commas and NaNs."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0)
+    return pd.to_numeric(
+        series.astype(str).str.replace(',', '').fillna('0'),
+        errors='coerce'
+    ).fillna(0)
+
+def normalize_column_names(df):
+    """Strip whitespace from column names and handle duplicates."""
+    df.columns = df.columns.str.strip()
+    
+    # Handle duplicate columns
+    cols = pd.Series(df.columns)
+    for dup in cols[cols.duplicated()].unique():
+        dup_indices = cols[cols == dup].index.tolist()
+        for i, idx in enumerate(dup_indices):
+            if i > 0:
+                cols.iloc[idx] = f"{dup}_{i}"
+    df.columns = cols.tolist()
+    return df
+
+def map_columns(df):
+    """Ensure required columns exist, mapping them if necessary.
+    
+    선택된 매핑은 df.attrs['column_mapping']에 대상 컬럼 -> {'source', 'method'} JSON 문자열로 남긴다
+    (method: exact 원본 그대로, keyword 키워드로 찾은 컬럼, default 기본값으로 생성).
+    pandas는 연산마다 attrs를 deepcopy하므로 dict 대신 문자열로 보관한다. 읽을 때는 get_column_mapping().
+    """
+    mapping = {}
+    
+    def rename(candidates, target):
+        df.rename(columns={candidates[0]: target}, inplace=True)
+        mapping[target] = {'source': candidates[0], 'method': 'keyword'}
+    
+    # 1. Check for exact matches first
+    has_rate_type = COL_RATE_TYPE in df.columns
+    has_tariff_rate = COL_TARIFF_RATE in df.columns
+    for col in (COL_RATE_TYPE, COL_TARIFF_RATE, COL_FREIGHT, COL_TRADE_COUNTRY):
+        if col in df.columns:
+            mapping[col] = {'source': col, 'method': 'exact'}
+    
+    # 2. Try to find by keywords if missing
+    if not has_rate_type:
+        candidates = [c for c in df.columns if '세율' in c and '구분' in c]
+        if candidates:
+            rename(candidates, COL_RATE_TYPE)
+            has_rate_type = True
+            
+    if not has_tariff_rate:
+        candidates = [c for c in df.columns if '관세' in c and '율' in c and c != COL_RATE_TYPE]
+        if candidates:
+             rename(candidates, COL_TARIFF_RATE)
+             has_tariff_rate = True
+             
+    # 운임 컬럼 매핑 시도
+    if COL_FREIGHT not in df.columns:
+        candidates = [c for c in df.columns if '운임' in c]
+        if candidates:
+            rename(candidates, COL_FREIGHT)
+            
+    # 무역거래처국가코드 매핑 시도 (해외공급자 국가코드 등)
+    if COL_TRADE_COUNTRY not in df.columns:
+        candidates = [c for c in df.columns if '국가코드' in c and '거래처' in c] # 거래처국가코드
+        if not candidates:
+            candidates = [c for c in df.columns if '해외공급자' in c and '국가' in c] # 해외공급자 국가코드
+        if not candidates:
+            candidates = [c for c in df.columns if '적출국' in c] # 차선책: 적출국
+            
+        if candidates:
+            rename(candidates, COL_TRADE_COUNTRY)
+
+    # 3. Set defaults if still missing
+    if not has_rate_type:
+        df[COL_RATE_TYPE] = 'A'
+        mapping[COL_RATE_TYPE] = {'source': None, 'method': 'default', 'value': 'A'}
+        
+    if not has_tariff_rate:
+        df[COL_TARIFF_RATE] = 0
+        mapping[COL_TARIFF_RATE] = {'source': None, 'method': 'default', 'value': 0}
+        
+    if COL_FREIGHT not in df.columns:
+        df[COL_FREIGHT] = 0 # Default if not found
+        mapping[COL_FREIGHT] = {'source': None, 'method': 'default', 'value': 0}
+    
+    df.attrs['column_mapping'] = json.dumps(mapping, ensure_ascii=False)
+    return df
+
+def get_column_mapping(df):
+    """map_columns가 선택한 컬럼 매핑 dict (기록이 없으면 빈 dict)"""
+    value = df.attrs.get('column_mapping')
+    return json.loads(value) if value else {}
+
+def get_input_columns(df):
+    """read_excel_file 직후의 컬럼 목록 (기록이 없으면 현재 컬럼)"""
+    value = df.attrs.get('input_columns')
+    return json.loads(value) if value else [str(c) for c in df.columns]
+
+def calculate_duty_per_row(df):
+    """Calculate '행별관세': (실제관세액 * 금액) / 란결제금액"""
+    required = [COL_ACTUAL_DUTY, COL_AMOUNT, COL_LINE_PAYMENT_AMT]
+    if all(col in df.columns for col in required):
+        for col in required:
+            df[col] = safe_numeric_conversion(df[col])
+            
+        return np.where(
+            df[COL_LINE_PAYMENT_AMT] != 0,
+            (df[COL_ACTUAL_DUTY] * df[COL_AMOUNT]) / df[COL_LINE_PAYMENT_AMT],
+            0
+        )
+    return 0
+
+def format_date_columns(df):
+    """날짜 컬럼을 정수 형식으로 포맷팅 (20250102.0 -> 20250102)"""
+    df_display = df.copy()
+    date_columns = [COL_ACCEPTANCE_DATE]  # 수리일자
+    
+    for col in date_columns:
+        if col in df_display.columns:
+            # 숫자형이면 정수로 변환 후 문자열로
+            try:
+                df_display[col] = pd.to_numeric(df_display[col], errors='coerce').fillna(0).astype(int).astype(str)
+                # 0을 빈 문자열로 변경
+                df_display[col] = df_display[col].replace('0', '')
+            except:
+                pass
+    
+    return df_display
+
+def column_memory_mb(df):
+    """컬럼별 deep 메모리 사용량(MB) Series (인덱스 제외)"""
+    return df.memory_usage(deep=True, index=False) / 1048576
+
+def _arrow_string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return pd.StringDtype('pyarrow')
+
+def downcast_dtypes(df):
+    """메모리 절감을 위한 타입 축소 (제자리 변경). 변경된 {컬럼: 새 dtype 문자열} 반환
+
+    - 세율: float64 -> float32 (모든 값이 float32로 정확히 표현될 때만)
+    - 란번호/행번호/수량: 정수 컬럼을 가장 작은 정수 타입으로
+    - 코드성 문자열(CATEGORY_COLUMNS): 고유값 비율이 CATEGORY_MAX_RATIO 이하이면 범주형
+    - 자유 텍스트(거래품명, 규격, 성분): 결측이 없으면 Arrow 문자열 (결측이 있으면 비교 결과에 NA가
+      생겨 필터링이 실패하므로 object 유지)
+    """
+    changed = {}
+    for col in DOWNCAST_RATE_COLUMNS:
+        if col in df.columns and df[col].dtype == np.float64:
+            values = df[col].to_numpy()
+            narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                df[col] = narrowed
+                changed[col] = 'float32'
+    for col in DOWNCAST_COUNT_COLUMNS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col].dtype):
+            narrowed = pd.to_numeric(df[col], downcast='integer')
+            if narrowed.dtype != df[col].dtype:
+                df[col] = narrowed
+                changed[col] = str(narrowed.dtype)
+    rows = len(df)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object and rows:
+            if df[col].nunique(dropna=True) <= rows * CATEGORY_MAX_RATIO:
+                df[col] = df[col].astype('category')
+                changed[col] = 'category'
+    string_dtype = _arrow_string_dtype()
+    if string_dtype is not None:
+        for col in ARROW_TEXT_COLUMNS:
+            if col not in df.columns or df[col].dtype != object or df[col].isna().any():
+                continue
+            if not pd.api.types.infer_dtype(df[col], skipna=False) == 'string':
+                continue
+            df[col] = df[col].astype(string_dtype)
+            changed[col] = str(string_dtype)
+    return changed
+
+def optimize_memory(df, threshold_mb=None):
+    """컬럼별 메모리를 측정하고 threshold_mb(기본 DOWNCAST_THRESHOLD_MB)를 넘으면 다운캐스팅
+
+    결과 보고서(dict)를 df.attrs['memory_report']에 JSON 문자열로 남기고 반환한다.
+    threshold_mb가 음수면 측정만 한다.
+    """
+    threshold_mb = DOWNCAST_THRESHOLD_MB if threshold_mb is None else threshold_mb
+    before = column_memory_mb(df)
+    before_dtypes = df.dtypes.astype(str)
+    changed = {}
+    if 0 <= threshold_mb <= before.sum():
+        changed = downcast_dtypes(df)
+    after = column_memory_mb(df[list(changed)]) if changed else pd.Series(dtype=float)
+    columns = []
+    for col in df.columns:
+        columns.append({
+            'column': str(col),
+            'dtype_before': before_dtypes[col],
+            'dtype_after': changed.get(col, before_dtypes[col]),
+            'mb_before': round(float(before[col]), 3),
+            'mb_after': round(float(after.get(col, before[col])), 3)
+        })
+    report = {
+        'threshold_mb': threshold_mb,
+        'downcast': bool(changed),
+        'total_mb_before': round(float(before.sum()), 2),
+        'total_mb_after': round(sum(c['mb_after'] for c in columns), 2),
+        'columns': columns
+    }
+    df.attrs['memory_report'] = json.dumps(report, ensure_ascii=False)
+    return report
+
+def get_memory_report(df):
+    """수집 시 기록된 메모리 보고서 (없으면 None)"""
+    value = df.attrs.get('memory_report')
+    return json.loads(value) if value else None
+
+# --- Main Logic ---
+
+def read_excel_file(uploaded_file, progress_bar=None, status_text=None, recorder=None, downcast_mb=None):
+    """Read and preprocess an Excel/CSV/Parquet file (path or file-like object with .name).
+    
+    progress_bar/status_text는 .progress(int), .text(str)를 가진 객체 (Streamlit 위젯 등).
+    recorder(perf.StageRecorder)가 있으면 로드/정리/매핑/변환/메모리 단계를 계측한다.
+    downcast_mb는 optimize_memory()의 다운캐스팅 기준 (None이면 DOWNCAST_THRESHOLD_MB).
+    실패 시 None 반환.
+    """
+    try:
+        if status_text: status_text.text("📂 엑셀 파일 로드 중...")
+        if progress_bar: progress_bar.progress(20)
+        
+        # 파일 확장자 확인 및 로드 방식 결정
+        file_name = getattr(uploaded_file, 'name', None) or str(uploaded_file)
+        with stage(recorder, 'ingest:load') as load_stage:
+            if file_name.lower().endswith('.csv'):
+                 df = pd.read_csv(uploaded_file)
+            elif file_name.lower().endswith('.parquet'):
+                 df = pd.read_parquet(uploaded_file)
+            else:
+                 df = pd.read_excel(uploaded_file)
+            load_stage.rows_out = len(df)
+        
+        if status_text: status_text.text(f"📊 데이터 로드 완료: {len(df):,}행, {len(df.columns)}열")
+        if progress_bar: progress_bar.progress(40)
+        
+        # Normalize columns
+        if status_text: status_text.text("🔧 컬럼명 정리 중...")
+        with stage(recorder, 'ingest:normalize', len(df)) as normalize_stage:
+            df = normalize_column_names(df)
+            normalize_stage.rows_out = len(df)
+        if progress_bar: progress_bar.progress(60)
+        
+        # Map columns
+        if status_text: status_text.text("🏷️ 컬럼 매핑 중...")
+        with stage(recorder, 'ingest:map', len(df)) as map_stage:
+            df = map_columns(df)
+            map_stage.rows_out = len(df)
+        if progress_bar: progress_bar.progress(80)
+        
+        # Convert types
+        if status_text: status_text.text("🔢 데이터 타입 변환 중...")
+        with stage(recorder, 'ingest:convert', len(df)) as convert_stage:
+            if COL_TARIFF_RATE in df.columns:
+                df[COL_TARIFF_RATE] = safe_numeric_conversion(df[COL_TARIFF_RATE])
+            convert_stage.rows_out = len(df)
+        # 분석 단계에서 보조 컬럼이 추가되기 전의 컬럼 목록 (실행 기록용)
+        df.attrs['input_columns'] = json.dumps([str(c) for c in df.columns], ensure_ascii=False)
+        
+        with stage(recorder, 'ingest:memory', len(df)) as memory_stage:
+            optimize_memory(df, downcast_mb)
+            memory_stage.rows_out = len(df)
+            
+        if progress_bar: progress_bar.progress(100)
+        if status_text: status_text.text("✅ 데이터 처리 완료!")
+        
+        return df
+    except Exception as e:
+        if status_text: status_text.text(f"❌ 오류 발생: {str(e)}")
+        logger.error(f"파일 읽기 실패: {str(e)}")
+        return None
@@ -0,0 +1,269 @@
+"""백그라운드 분석 작업과 프로세스 공용 스케줄러"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import pandas as pd
+
+from .analysis import ANALYSIS_KEY_MAP, make_options_key, run_analyses
+from .manifest import build_manifest
+from .profiling import ProfileSession
+
+logger = logging.getLogger(__name__)
+
+JOB_MAX_WORKERS = int(os.environ.get('TRADEGUARD_MAX_WORKERS', 2))  # 프로세스 공용 분석 워커 수
+JOB_MEMORY_BUDGET_MB = float(os.environ.get('TRADEGUARD_MEMORY_BUDGET_MB', 4096))  # 동시 실행 작업 전체 메모리 예산
+SESSION_MEMORY_BUDGET_MB = float(os.environ.get('TRADEGUARD_SESSION_MEMORY_BUDGET_MB', 2048))  # 세션당 메모리 예산
+JOB_MEMORY_FACTOR = 4  # 분석 중 복사본을 고려한 작업 메모리 배수 (원본 deep 메모리 기준)
+MAX_FINISHED_JOBS = 8  # 프로세스에 보관할 완료 작업 수 (결과 메모리는 예산에 포함, 부족하면 오래된 것부터 제거)
+JOB_MAX_WAIT_SECONDS = float(os.environ.get('TRADEGUARD_JOB_MAX_WAIT_SECONDS', 60))  # 이보다 오래 기다린 작업은 뒤 작업이 앞지르지 못함
+DEFAULT_SECONDS_PER_ROW = 2e-5  # 처리 이력이 없는 분석의 ETA 추정치
+TIMING_EMA_ALPHA = 0.3
+
+class _JobLogHandler(logging.Handler):
+    """작업 스레드에서 기록된 분석 오류/경고를 해당 작업의 errors에 모음"""
+    
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.jobs = {}  # 스레드 ID -> 작업
+    
+    def emit(self, record):
+        job = self.jobs.get(record.thread)
+        if job is not None:
+            job.errors.append(record.getMessage())
+
+_job_log_handler = _JobLogHandler()
+logging.getLogger('tradeguard').addHandler(_job_log_handler)
+
+class AnalysisJob:
+    """백그라운드 분석 작업 (분석별 진행 이벤트, ETA, 취소)"""
+    
+    def __init__(self, file_hash, df_original, analysis_options, results, session_id=None, recorder=None,
+                 profile_mode=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.file_hash = file_hash
+        self.session_id = session_id
+        self.df = df_original
+        self.rows = len(df_original)
+        self.memory_bytes = int(df_original.memory_usage(deep=True).sum() * JOB_MEMORY_FACTOR)
+        self.analysis_options = list(analysis_options)
+        self.options_key = make_options_key(analysis_options)
+        self.owns_results = results is None  # None이면 작업 전용 결과, 아니면 세션 저장소와 공유
+        self.results = {} if results is None else results
+        self.keys = [ANALYSIS_KEY_MAP[opt] for opt in analysis_options
+                     if opt in ANALYSIS_KEY_MAP and ANALYSIS_KEY_MAP[opt] not in self.results]
+        self.labels = {key: label for label, key in ANALYSIS_KEY_MAP.items()}
+        self.status = 'queued'  # queued -> running -> done / cancelled / failed
+        self.events = []  # (분석 키, 소요 시간)
+        self.current = None
+        self.current_started_at = None
+        self.error = None
+        self.errors = []  # 개별 분석에서 기록된 오류 메시지
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.queue_reason = None
+        self.recorder = recorder  # perf.StageRecorder (계측 사용 시)
+        self.profile_mode = profile_mode  # 'cprofile' / 'sample' / None
+        self.profile = None  # 완료 후 profiling.ProfileSession
+        self.manifest = None  # 완료 후 실행 기록 (원본 DataFrame은 완료 시 해제되므로 미리 생성)
+    
+    @property
+    def finished(self):
+        return self.status in ('done', 'cancelled', 'failed')
+    
+    def progress(self):
+        return len(self.events) / len(self.keys) if self.keys else 1.0
+    
+    def eta_seconds(self, timings):
+        """남은 분석의 예상 소요 시간 (분석별 행당 처리 시간 이력 × 행 수)"""
+        remaining = self.keys[len(self.events):]
+        estimate = sum(timings.get(key, DEFAULT_SECONDS_PER_ROW) * self.rows for key in remaining)
+        if self.current_started_at is not None:
+            estimate -= time.time() - self.current_started_at
+        return max(estimate, 0.0)
+    
+    def release_input(self):
+        """완료 후 원본 DataFrame 참조를 놓고, 보관 메모리를 작업을 제거하면 풀리는 크기로 다시 잡음
+        
+        작업 전용 결과는 이 작업이 만든 결과 크기만 센다. 세션 저장소와 공유하는 결과와 원본은
+        세션이 계속 보관하므로 작업을 제거해도 풀리지 않아 예산에 넣지 않는다.
+        """
+        self.df = None
+        if not self.owns_results:
+            self.memory_bytes = 0
+            return
+        self.memory_bytes = sum(int(self.results[key].memory_usage(deep=True).sum()) for key in self.keys
+                                if isinstance(self.results.get(key), pd.DataFrame))
+    
+    def run(self, timings):
+        """작업 스레드에서 실행"""
+        self.status = 'running'
+        self.started_at = time.time()
+        _job_log_handler.jobs[threading.get_ident()] = self
+        
+        def on_progress(key, elapsed):
+            if elapsed is None:
+                self.current, self.current_started_at = key, time.time()
+                return
+            self.events.append((key, elapsed))
+            self.current, self.current_started_at = None, None
+            if self.rows > 0:
+                per_row = elapsed / self.rows
+                previous = timings.get(key)
+                timings[key] = per_row if previous is None else previous + TIMING_EMA_ALPHA * (per_row - previous)
+        
+        status = 'failed'
+        try:
+            self.profile = ProfileSession(self.profile_mode) if self.profile_mode else None
+            with self.profile or nullcontext():
+                run_analyses(self.df, self.analysis_options, self.results, on_progress, self.cancel_event,
+                             self.recorder)
+            self.manifest = build_manifest(self.df, self.analysis_options, self.results, file_hash=self.file_hash,
+                                           timings={key: round(elapsed, 3) for key, elapsed in self.events})
+            status = 'cancelled' if self.cancel_event.is_set() else 'done'
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            _job_log_handler.jobs.pop(threading.get_ident(), None)
+            self.current, self.current_started_at = None, None
+            # 다른 스레드가 finished를 보는 시점에 finished_at이 이미 있도록 상태는 마지막에 설정
+            self.finished_at = time.time()
+            self.status = status
+
+class JobScheduler:
+    """프로세스 공용 작업 스케줄러
+    
+    모든 세션이 하나의 제한된 워커 풀을 공유하며, 작업 메모리 추정치
+    (df.memory_usage(deep=True) × JOB_MEMORY_FACTOR)가 전체/세션 예산을 넘으면
+    실행하지 않고 대기열에 둔다. 세션/브라우저가 끊겨도 작업과 결과는 유지된다.
+    완료된 작업은 원본 DataFrame 참조를 놓는다. 작업 전용 결과(서비스/부하 테스트)는 예산에
+    포함되어 새 작업을 실행할 자리가 없으면 오래된 완료 작업부터 결과와 함께 제거되고,
+    세션 저장소와 공유하는 결과(앱)는 세션이 보관하므로 세지도 제거하지도 않는다.
+    """
+    
+    def __init__(self, max_workers=JOB_MAX_WORKERS, memory_budget_mb=JOB_MEMORY_BUDGET_MB,
+                 session_budget_mb=SESSION_MEMORY_BUDGET_MB):
+        self.max_workers = max_workers
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.session_budget = int(session_budget_mb * 1024 * 1024)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tradeguard-job')
+        self.jobs = {}
+        self.pending = []  # 제출 순서대로 대기 중인 작업
+        self.running = {}  # 작업 ID -> 작업
+        self.timings = {}  # 분석 키 -> 행당 처리 시간(초) 이동평균
+        self.lock = threading.Lock()
+    
+    def submit(self, job):
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+            if job.memory_bytes > min(self.memory_budget, self.session_budget):
+                # 단독으로도 예산을 넘는 작업은 서버 보호를 위해 거절
+                job.error = (f"예상 메모리 {job.memory_bytes / 1024 ** 2:,.0f}MB가 "
+                             f"허용 예산 {min(self.memory_budget, self.session_budget) / 1024 ** 2:,.0f}MB를 초과합니다.")
+                job.finished_at = time.time()
+                job.status = 'failed'
+                job.release_input()
+                return job
+            self.pending.append(job)
+            self._dispatch()
+        return job
+    
+    def cancel(self, job):
+        """작업 취소 (대기 중이면 즉시, 실행 중이면 진행 중인 분석 후 중단)"""
+        with self.lock:
+            job.cancel_event.set()
+            if job in self.pending:
+                self.pending.remove(job)
+                job.finished_at = time.time()
+                job.status = 'cancelled'
+                job.release_input()
+    
+    def get(self, job_id):
+        return self.jobs.get(job_id) if job_id else None
+    
+    def find_active(self, file_hash, options_key):
+        """같은 파일/옵션으로 대기/진행 중인 작업 (중복 제출 방지)"""
+        for job in list(self.jobs.values()):
+            if job.file_hash == file_hash and job.options_key == options_key and not job.finished:
+                return job
+        return None
+    
+    def queue_position(self, job):
+        with self.lock:
+            return self.pending.index(job) + 1 if job in self.pending else 0
+    
+    def memory_in_use(self, session_id=None):
+        """실행 중 작업의 추정 메모리 + 보관 중인 완료 작업의 결과 메모리"""
+        return sum(job.memory_bytes for job in list(self.jobs.values())
+                   if (job.id in self.running or job.finished)
+                   and (session_id is None or job.session_id == session_id))
+    
+    def _fits(self, job, budget, session_id=None):
+        """job이 예산 안에 들어가는지 (모자라면 결과를 보관 중인 오래된 완료 작업부터 제거, lock 보유 상태에서 호출)"""
+        finished = sorted((j for j in self.jobs.values()
+                           if j.finished and j.memory_bytes > 0
+                           and (session_id is None or j.session_id == session_id)),
+                          key=lambda j: j.finished_at)
+        while self.memory_in_use(session_id) + job.memory_bytes > budget:
+            if not finished:
+                return False
+            del self.jobs[finished.pop(0).id]
+        return True
+    
+    def _dispatch(self):
+        """예산과 워커 여유가 있는 대기 작업을 제출 순서대로 실행 (lock 보유 상태에서 호출)
+        
+        앞선 작업이 예산 부족으로 기다리는 동안 뒤의 작은 작업이 먼저 실행될 수 있지만,
+        JOB_MAX_WAIT_SECONDS 이상 기다린 작업이 있으면 그 뒤의 작업은 앞지르지 못한다.
+        """
+        now = time.time()
+        blocked = False
+        for job in list(self.pending):
+            if len(self.running) >= self.max_workers:
+                job.queue_reason = "분석 워커가 모두 사용 중입니다."
+            elif blocked:
+                job.queue_reason = "오래 기다린 앞선 작업이 먼저 실행됩니다."
+            elif not self._fits(job, self.memory_budget):
+                job.queue_reason = "서버 메모리 예산이 부족합니다."
+            elif not self._fits(job, self.session_budget, job.session_id):
+                job.queue_reason = "세션 메모리 예산이 부족합니다."
+            else:
+                job.queue_reason = None
+            if job.queue_reason is not None:
+                blocked = blocked or now - job.submitted_at >= JOB_MAX_WAIT_SECONDS
+                continue
+            self.pending.remove(job)
+            self.running[job.id] = job
+            self.executor.submit(self._run, job)
+    
+    def _run(self, job):
+        try:
+            job.run(self.timings)
+        finally:
+            with self.lock:
+                job.release_input()
+                self.running.pop(job.id, None)
+                self._dispatch()
+    
+    def _prune(self):
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - MAX_FINISHED_JOBS + 1, 0)]:
+            del self.jobs[job.id]
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """프로세스 공용 작업 스케줄러 (최초 호출 시 생성)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
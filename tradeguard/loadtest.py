@@ -0,0 +1,343 @@
+"""동시 세션 부하 시험 (python -m tradeguard loadtest)
+
+한 서버가 동시에 몇 명의 분석 담당자를 감당할 수 있는지 수치로 보기 위한 도구.
+세션마다 합성 파일을 올리고(수집) 분석 작업을 제출해 끝날 때까지 기다린 뒤 보고서를 받는
+화면 흐름을 스레드로 재현하고, 구간별 지연 백분위수, 처리량, 시간에 따른 메모리를 기록한다.
+
+- 프로세스 내(기본): Streamlit 앱과 같은 JobScheduler/보고서 스레드 풀 구성을 한 프로세스에 띄워 측정
+- HTTP(url 지정): 실행 중인 분석 서비스(python -m tradeguard serve)에 실제 요청을 보내 측정
+
+세션 수를 여러 단계(예: 1,2,4,8)로 주면 단계별로 새 스케줄러에서 차례로 실행하여
+지연이 급격히 늘어나는 지점을 비교할 수 있다.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+
+from .analysis import ANALYSIS_KEY_MAP
+from .bench import environment_info
+from .perf import current_rss_mb
+
+# --- Load Test Settings ---
+
+LOADTEST_SESSIONS = (1, 2, 4)
+LOADTEST_ROWS = 10000
+LOADTEST_FORMAT = 'csv'
+LOADTEST_REPORTS = ('excel', 'html')
+LOADTEST_POLL_INTERVAL = 0.2  # 작업 상태 확인 간격(초)
+LOADTEST_SAMPLE_INTERVAL = 0.5  # 메모리/대기열 표본 간격(초)
+LOADTEST_REPORT_WORKERS = 2  # 앱의 보고서 백그라운드 스레드 수와 동일
+LOADTEST_PERCENTILES = (50, 90, 95, 99)
+LOADTEST_PHASES = ('ingest', 'queue', 'analysis', 'report', 'total')
+LOADTEST_TIMEOUT = 3600  # 세션 하나의 최대 대기 시간(초)
+
+# 보고서 형식 -> HTTP 서비스 결과 형식 (word는 프로세스 내에서만)
+SERVICE_REPORT_FORMATS = {'excel': 'xlsx', 'word': None, 'html': 'html', 'html_full': 'html_full'}
+
+def prepare_files(count, rows, data_dir, fmt=LOADTEST_FORMAT, seed=42):
+    """세션별 합성 파일 경로 목록 (seed를 달리하여 서로 다른 파일, data_dir에 있으면 재사용)"""
+    from .synthetic import generate_synthetic_data
+    paths = []
+    for index in range(count):
+        prefix = os.path.join(data_dir, f"loadtest_{rows}_{seed + index}")
+        if not os.path.exists(f"{prefix}.{fmt}"):
+            generate_synthetic_data(prefix, rows, formats=(fmt,), seed=seed + index)
+        paths.append(f"{prefix}.{fmt}")
+    return paths
+
+def latency_stats(values):
+    """지연 목록 -> {count, mean, p50, p90, p95, p99, max} (초)"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return {'count': 0}
+    stats = {'count': len(values), 'mean': round(float(np.mean(values)), 3)}
+    for p in LOADTEST_PERCENTILES:
+        stats[f"p{p}"] = round(float(np.percentile(values, p)), 3)
+    stats['max'] = round(float(max(values)), 3)
+    return stats
+
+class TimelineSampler:
+    """부하 시험 동안 (경과 시간, RSS, 실행/대기 작업 수, 활성 세션 수)를 주기적으로 기록"""
+
+    def __init__(self, probe, interval=LOADTEST_SAMPLE_INTERVAL):
+        self.probe = probe  # () -> {'rss_mb', 'running', 'pending'}
+        self.interval = interval
+        self.samples = []
+        self.active_sessions = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def _sample(self):
+        try:
+            sample = self.probe()
+        except Exception:
+            sample = {}
+        sample.update(t=round(time.perf_counter() - self._started, 2), active_sessions=self.active_sessions)
+        self.samples.append(sample)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='tradeguard-loadtest-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+    def peak(self, key):
+        values = [s[key] for s in self.samples if s.get(key) is not None]
+        return max(values) if values else None
+
+class InProcessTarget:
+    """앱과 같은 구성(공용 JobScheduler + 보고서 스레드 풀)을 이 프로세스에 띄워 세션 흐름을 재현"""
+
+    name = 'inprocess'
+
+    def __init__(self, workers=None):
+        from .jobs import JOB_MAX_WORKERS, JobScheduler
+        self.scheduler = JobScheduler(max_workers=workers or JOB_MAX_WORKERS)
+        self.report_executor = ThreadPoolExecutor(max_workers=LOADTEST_REPORT_WORKERS,
+                                                  thread_name_prefix='tradeguard-loadtest-report')
+
+    def close(self):
+        self.report_executor.shutdown(wait=True)
+        self.scheduler.executor.shutdown(wait=True)
+
+    def probe(self):
+        return {'rss_mb': round(current_rss_mb(), 1), 'running': len(self.scheduler.running),
+                'pending': len(self.scheduler.pending)}
+
+    def run_session(self, session_id, data, file_name, analysis_options, report_formats):
+        from .ingest import read_excel_file
+        from .jobs import AnalysisJob
+        record = {}
+        started = time.perf_counter()
+        upload = io.BytesIO(data)
+        upload.name = file_name
+        file_hash = hashlib.sha256(data).hexdigest()
+        df = read_excel_file(upload)
+        if df is None:
+            raise RuntimeError(f"파일 로드 실패: {file_name}")
+        record['ingest'] = time.perf_counter() - started
+
+        job = self.scheduler.submit(AnalysisJob(file_hash, df, analysis_options, None, session_id=session_id))
+        deadline = time.time() + LOADTEST_TIMEOUT
+        while not job.finished:
+            if time.time() > deadline:
+                self.scheduler.cancel(job)
+                raise TimeoutError(f"작업 {job.id}이 {LOADTEST_TIMEOUT}초 안에 끝나지 않았습니다.")
+            time.sleep(LOADTEST_POLL_INTERVAL)
+        if job.status != 'done':
+            raise RuntimeError(job.error or f"작업 상태: {job.status}")
+        record['queue'] = (job.started_at - job.submitted_at) if job.started_at else None
+        record['analysis'] = job.finished_at - job.started_at
+
+        report_started = time.perf_counter()
+        futures = [self.report_executor.submit(self._build_report, fmt, job) for fmt in report_formats]
+        record['report_bytes'] = sum(f.result() for f in futures)
+        record['report'] = time.perf_counter() - report_started
+        record['rows'] = job.rows
+        return record
+
+    @staticmethod
+    def _build_report(fmt, job):
+        from .reports import create_excel_file, create_html_report, create_word_document
+        results = job.results
+        summary_data = results.get('summary', {})
+        if fmt == 'excel':
+            data = create_excel_file(None, results, summary_data, manifest=job.manifest)
+        elif fmt == 'word':
+            data = create_word_document(results, summary_data)
+        else:
+            data = create_html_report(results, summary_data, interactive=(fmt == 'html_full'))
+        return len(data) if data else 0
+
+class ServiceTarget:
+    """실행 중인 HTTP 분석 서비스 대상 (메모리는 /health의 서버 RSS)
+
+    대기(queue) 시간은 클라이언트에서 본 완료까지의 시간 - 서버 분석 시간이므로 상태 확인 간격만큼 오차가 있다.
+    """
+
+    name = 'http'
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def close(self):
+        pass
+
+    def _request(self, method, path, body=None, headers=None, timeout=600):
+        request = urllib.request.Request(self.url + path, data=body, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def _json(self, method, path, **kwargs):
+        status, body = self._request(method, path, **kwargs)
+        payload = json.loads(body.decode('utf-8')) if body else {}
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status}: {payload.get('error') or payload}")
+        return payload
+
+    def probe(self):
+        health = self._json('GET', '/health', timeout=5)
+        return {'rss_mb': health.get('rss_mb'), 'running': health.get('running'), 'pending': health.get('pending')}
+
+    def run_session(self, session_id, data, file_name, analysis_options, report_formats):
+        record = {}
+        started = time.perf_counter()
+        analyses = ','.join(ANALYSIS_KEY_MAP[opt] for opt in analysis_options)
+        status = self._json('POST', f"/jobs?filename={quote(file_name)}&analyses={quote(analyses)}", body=data,
+                            headers={'Content-Type': 'application/octet-stream'})
+        record['ingest'] = time.perf_counter() - started  # 업로드 + 서버 파싱
+
+        submitted = time.perf_counter()
+        deadline = time.time() + LOADTEST_TIMEOUT
+        while status['status'] in ('queued', 'running'):
+            if time.time() > deadline:
+                self._request('DELETE', status['status_url'])
+                raise TimeoutError(f"작업 {status['id']}이 {LOADTEST_TIMEOUT}초 안에 끝나지 않았습니다.")
+            time.sleep(LOADTEST_POLL_INTERVAL)
+            status = self._json('GET', status['status_url'])
+        if status['status'] != 'done':
+            raise RuntimeError(status.get('error') or f"작업 상태: {status['status']}")
+        record['analysis'] = status.get('elapsed')
+        waited = time.perf_counter() - submitted
+        record['queue'] = max(waited - record['analysis'], 0.0) if record['analysis'] is not None else None
+
+        report_started = time.perf_counter()
+        record['report_bytes'] = 0
+        for fmt in report_formats:
+            code, body = self._request('GET', f"{status['result_url']}?format={SERVICE_REPORT_FORMATS[fmt]}")
+            if code >= 400:
+                raise RuntimeError(f"보고서({fmt}) HTTP {code}")
+            record['report_bytes'] += len(body)
+        record['report'] = time.perf_counter() - report_started
+        record['rows'] = status.get('rows')
+        return record
+
+def run_level(target, files, sessions, analysis_options, report_formats=LOADTEST_REPORTS, iterations=1,
+              ramp_seconds=0.0, on_session=None):
+    """세션 sessions개를 동시에 실행한 한 단계의 결과 dict
+
+    세션 i는 files[i % len(files)]를 iterations번 차례로 올린다. ramp_seconds 동안 세션 시작을 고르게 분산한다.
+    on_session(record)는 세션 한 번이 끝날 때마다 호출된다.
+    """
+    payloads = []
+    for path in files:
+        with open(path, 'rb') as f:
+            payloads.append((os.path.basename(path), f.read()))
+    runs = []
+    runs_lock = threading.Lock()
+    sampler = TimelineSampler(target.probe)
+
+    def session(index):
+        if ramp_seconds and sessions > 1:
+            time.sleep(ramp_seconds * index / (sessions - 1))
+        file_name, data = payloads[index % len(payloads)]
+        for iteration in range(iterations):
+            with runs_lock:
+                sampler.active_sessions += 1
+            started = time.perf_counter()
+            record = {'session': index, 'iteration': iteration, 'file': file_name,
+                      'started_at': round(started - level_started, 3)}
+            try:
+                record.update(target.run_session(f"loadtest-{index}", data, file_name, analysis_options, report_formats))
+                record['status'] = 'ok'
+            except Exception as e:
+                record.update(status='failed', error=str(e))
+            finally:
+                with runs_lock:
+                    sampler.active_sessions -= 1
+            record['total'] = time.perf_counter() - started
+            for key in LOADTEST_PHASES:
+                if record.get(key) is not None:
+                    record[key] = round(record[key], 3)
+            with runs_lock:
+                runs.append(record)
+            if on_session: on_session(record)
+
+    with sampler:
+        level_started = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(i,), name=f"tradeguard-loadtest-{i}") for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - level_started
+
+    ok = [r for r in runs if r['status'] == 'ok']
+    rows_done = sum(r.get('rows') or 0 for r in ok)
+    return {
+        'sessions': sessions,
+        'iterations': iterations,
+        'completed': len(ok),
+        'failed': len(runs) - len(ok),
+        'duration_seconds': round(duration, 3),
+        'throughput': {
+            'sessions_per_minute': round(len(ok) / duration * 60, 2) if duration else None,
+            'rows_per_second': round(rows_done / duration) if duration else None
+        },
+        'latency': {phase: latency_stats([r.get(phase) for r in ok]) for phase in LOADTEST_PHASES},
+        'memory': {'start_rss_mb': sampler.samples[0].get('rss_mb'), 'peak_rss_mb': sampler.peak('rss_mb'),
+                   'peak_running_jobs': sampler.peak('running'), 'peak_pending_jobs': sampler.peak('pending')},
+        'errors': sorted({r['error'] for r in runs if r.get('error')}),
+        'timeline': sampler.samples,
+        'runs': sorted(runs, key=lambda r: r['started_at'])
+    }
+
+def load_test(sessions=LOADTEST_SESSIONS, rows=LOADTEST_ROWS, analysis_options=None, report_formats=LOADTEST_REPORTS,
+              iterations=1, ramp_seconds=0.0, url=None, workers=None, data_dir=None, fmt=LOADTEST_FORMAT, seed=42,
+              shared_file=False, on_session=None, on_level=None):
+    """세션 수 단계별 부하 시험 실행 기록 dict
+
+    url이 없으면 단계마다 새 프로세스 내 스케줄러(workers개)를 만들고, 있으면 해당 서비스에 요청한다.
+    shared_file이면 모든 세션이 같은 파일을 올린다 (기본은 세션별로 다른 파일이라 중복 작업 재사용이 없음).
+    """
+    from .jobs import JOB_MAX_WORKERS
+    analysis_options = list(analysis_options or ANALYSIS_KEY_MAP)
+    if not url:
+        workers = workers or JOB_MAX_WORKERS
+    levels = []
+    with tempfile.TemporaryDirectory(prefix='tradeguard_loadtest_') as tmp_dir:
+        files = prepare_files(1 if shared_file else max(sessions), rows, data_dir or tmp_dir, fmt, seed)
+        for count in sessions:
+            target = ServiceTarget(url) if url else InProcessTarget(workers)
+            try:
+                level = run_level(target, files, count, analysis_options, report_formats, iterations,
+                                  ramp_seconds, on_session)
+            finally:
+                target.close()
+            levels.append(level)
+            if on_level: on_level(level)
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'config': {
+            'target': url or 'inprocess', 'workers': workers, 'rows': rows, 'format': fmt, 'seed': seed,
+            'analyses': [ANALYSIS_KEY_MAP[opt] for opt in analysis_options], 'reports': list(report_formats),
+            'iterations': iterations, 'ramp_seconds': ramp_seconds, 'shared_file': shared_file
+        },
+        'levels': levels
+    }
@@ -0,0 +1,97 @@
+"""실행 기록(manifest): 보고서가 어떤 입력/설정/환경에서 만들어졌는지
+
+느린 실행을 데이터 모양과 연결하고 같은 조건으로 재현할 수 있도록 입력 파일 해시, 행/열 수,
+map_columns가 선택한 컬럼 매핑, 선택한 분석, 분석 기준값, 단계별 소요 시간, 최대 메모리,
+라이브러리 버전을 기록한다. Excel 보고서에는 숨김 시트로, 배치 출력에는 JSON 파일로 저장된다.
+"""
+import datetime
+import hashlib
+import json
+import platform
+from importlib import metadata
+
+from .analysis import ANALYSIS_KEY_MAP, ANALYSIS_THRESHOLDS
+from .ingest import get_column_mapping, get_input_columns, get_memory_report
+from .perf import peak_rss_mb
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+MANIFEST_LIBRARIES = ['pandas', 'numpy', 'xlsxwriter', 'openpyxl', 'python-docx', 'pyarrow', 'streamlit', 'plotly']
+
+def library_versions():
+    """설치된 주요 라이브러리 버전 (없는 것은 None)"""
+    versions = {'python': platform.python_version()}
+    for name in MANIFEST_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+def file_sha256(source):
+    """경로, bytes 또는 getvalue()가 있는 업로드 객체의 SHA-256"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    if hasattr(source, 'getvalue'):
+        return hashlib.sha256(source.getvalue()).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_manifest(df_original, analysis_options, results=None, file_name=None, file_hash=None,
+                   timings=None, recorder=None):
+    """실행 기록 dict
+
+    timings는 {단계: 초}, recorder(perf.StageRecorder)가 있으면 그 기록이 우선한다.
+    analysis_options는 분석 라벨 또는 키 목록.
+    """
+    analyses = [ANALYSIS_KEY_MAP.get(opt, opt) for opt in analysis_options]
+    if recorder is not None and recorder.records():
+        timings = {}
+        for record in recorder.records():  # 같은 단계가 여러 번이면 마지막 실행
+            timings[record['stage']] = {k: record[k] for k in ('wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out',
+                                                              'memory_delta_mb')}
+    columns = get_input_columns(df_original)
+    memory = get_memory_report(df_original)
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'input': {
+            'file': file_name,
+            'sha256': file_hash,
+            'rows': len(df_original),
+            'columns': len(columns),
+            'column_names': columns,
+            'column_mapping': get_column_mapping(df_original),
+            'memory': memory and {
+                'mb_before': memory['total_mb_before'],
+                'mb_after': memory['total_mb_after'],
+                'downcast_columns': {c['column']: c['dtype_after'] for c in memory['columns']
+                                     if c['dtype_after'] != c['dtype_before']}
+            }
+        },
+        'analyses': analyses,
+        'thresholds': ANALYSIS_THRESHOLDS,
+        'timings': timings or {},
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'environment': library_versions()
+    }
+    if results is not None:
+        manifest['findings'] = {key: len(data) for key, data in results.items()
+                                if key in analyses and key != 'summary' and hasattr(data, '__len__')}
+    return manifest
+
+def flatten_manifest(manifest, prefix=''):
+    """중첩 dict를 ('input.rows', 값) 쌍 목록으로 (리스트/기본형 값은 JSON 문자열)"""
+    items = []
+    for key, value in manifest.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            items.extend(flatten_manifest(value, path + '.'))
+        elif isinstance(value, (list, dict)):
+            items.append((path, json.dumps(value, ensure_ascii=False)))
+        else:
+            items.append((path, value))
+    return items
@@ -0,0 +1,133 @@
+"""분석 실행 프로파일링 (cProfile 또는 샘플링)
+
+운영 중 느린 건을 재현 없이 분석하기 위해 분석 실행 전체를 프로파일러로 감싸고,
+결과를 pstats 파일(cProfile) 또는 flamegraph.pl/speedscope용 collapsed stack 텍스트(샘플링)로 내보낸다.
+
+- cprofile: 모든 함수 호출을 기록 (정확하지만 실행이 1.5~3배 느려짐)
+- sample: 대상 스레드의 호출 스택을 주기적으로 수집 (부하가 작아 운영 환경에 적합)
+
+환경 변수 TRADEGUARD_PROFILE=cprofile|sample로 기본값을 켤 수 있다.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# --- Profiling Settings ---
+
+PROFILE_MODES = ('cprofile', 'sample')
+PROFILE_ENV = 'TRADEGUARD_PROFILE'
+SAMPLE_INTERVAL_SECONDS = 0.005
+PROFILE_SUMMARY_LIMIT = 30
+
+def profile_mode_from_env():
+    """TRADEGUARD_PROFILE 값 -> 'cprofile' / 'sample' / None (1, true, on은 cprofile)"""
+    value = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if value in ('1', 'true', 'on', 'yes'):
+        return 'cprofile'
+    return value if value in PROFILE_MODES else None
+
+def _frame_label(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+class ProfileSession:
+    """with 블록을 현재 스레드 기준으로 프로파일링
+
+    블록이 끝나면 pstats_bytes()(cprofile) 또는 collapsed_text()(sample)로 결과를 꺼낸다.
+    summary_text()는 두 모드 모두에서 사람이 읽을 수 있는 상위 함수 목록을 돌려준다.
+    """
+
+    def __init__(self, mode='cprofile', interval=SAMPLE_INTERVAL_SECONDS):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"지원하지 않는 프로파일 모드: {mode} (사용 가능: {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.interval = interval
+        self.elapsed = None
+        self.samples = Counter()  # collapsed stack -> 표본 수
+        self._profiler = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._target = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._target = threading.get_ident()
+            self._thread = threading.Thread(target=self._sample_loop, name='tradeguard-profiler', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return False
+
+    def _sample_loop(self):
+        current_frames = sys._current_frames
+        while not self._stop.wait(self.interval):
+            frame = current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    # --- Export ---
+
+    def pstats_bytes(self):
+        """cProfile 결과를 pstats 파일 형식(bytes)으로 (python -m pstats, snakeviz 등에서 열기)"""
+        if self._profiler is None:
+            return None
+        fd, path = tempfile.mkstemp(suffix='.prof')
+        os.close(fd)
+        try:
+            self._profiler.dump_stats(path)
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def collapsed_text(self):
+        """샘플링 결과를 'a;b;c 표본수' 형식으로 (flamegraph.pl, speedscope, inferno 입력)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def summary_text(self, limit=PROFILE_SUMMARY_LIMIT):
+        """상위 함수 요약 (cprofile: 누적 시간순, sample: 포함/자체 표본 비율)"""
+        if self._profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            return out.getvalue()
+        total = sum(self.samples.values())
+        if not total:
+            return "수집된 표본이 없습니다."
+        inclusive, exclusive = Counter(), Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(';')
+            exclusive[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        lines = [f"표본 {total:,}개 ({self.interval * 1000:.0f}ms 간격, {self.elapsed or 0:.1f}초)",
+                 f"{'포함%':>7} {'자체%':>7}  함수"]
+        for frame, count in inclusive.most_common(limit):
+            lines.append(f"{count / total * 100:>6.1f}% {exclusive[frame] / total * 100:>6.1f}%  {frame}")
+        return '\n'.join(lines)
+
+    def export(self):
+        """(파일 확장자, 내용 bytes) - cprofile은 .prof, sample은 .collapsed.txt"""
+        if self.mode == 'cprofile':
+            return '.prof', self.pstats_bytes()
+        return '.collapsed.txt', self.collapsed_text().encode('utf-8')
@@ -0,0 +1,796 @@
+"""Excel/Word/HTML 보고서 생성 (python-docx, xlsxwriter는 사용 시점에 로드)"""
+import base64
+import datetime
+import gzip
+import html
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+from .ingest import format_date_columns
+
+logger = logging.getLogger(__name__)
+
+def create_verification_methods_excel_sheet(writer):
+    """검증방법 시트 생성 (엑셀용)"""
+    try:
+        worksheet = writer.book.add_worksheet('검증방법')
+        workbook = writer.book
+        
+        title_format = workbook.add_format({
+            'font_name': 'Arial', 'font_size': 14, 'bold': True,
+            'align': 'center', 'valign': 'vcenter', 'bg_color': '#4472C4',
+            'font_color': 'white', 'border': 1
+        })
+        
+        subtitle_format = workbook.add_format({
+            'font_name': 'Arial', 'font_size': 12, 'bold': True,
+            'align': 'left', 'valign': 'vcenter', 'bg_color': '#D9E1F2', 'border': 1
+        })
+        
+        content_format = workbook.add_format({
+            'font_name': 'Arial', 'font_size': 10, 'align': 'left',
+            'valign': 'top', 'border': 1, 'text_wrap': True
+        })
+        
+        highlight_format = workbook.add_format({
+            'font_name': 'Arial', 'font_size': 10, 'align': 'left',
+            'valign': 'top', 'border': 1, 'text_wrap': True, 'bg_color': '#FFFF00'
+        })
+        
+        worksheet.set_column(0, 0, 25)
+        worksheet.set_column(1, 1, 60)
+        worksheet.set_column(2, 2, 40)
+        
+        current_row = 0
+        worksheet.merge_range(current_row, 0, current_row, 2, '수입신고 분석 검증방법', title_format)
+        worksheet.set_row(current_row, 30)
+        current_row += 2
+        
+        sections = [
+            ('1. 8% 환급 검토', '• 필터링 조건: 세율구분 = "A" AND 관세실행세율 ≥ 8%\n• 목적: 8% 환급 검토가 필요한 수입신고 건들 식별', '• 세율구분 "A"는 일반적으로 가장 관세율이 높은 구분'),
+            ('2. 0% Risk', '• 필터링 조건: 관세실행세율 < 8% AND 세율구분 ≠ F*** AND 세율구분 ≠ FR*', '• 관세율이 낮은데도 특별한 세율구분이 아닌 경우 주의 필요'),
+            ('3. 세율 Risk', '• 분석 방법: 규격1 기준으로 그룹화하여 세번부호의 고유값 개수 확인', '• 동일 상품인데 다른 세번부호가 적용되면 관세율 차이 발생'),
+            ('4. 단가 Risk (Z-Score)', '• 분석 방법: 규격1별 단가의 표준점수(Z-Score) 산출\n• 기준: |Z-Score| > 1.96 (신뢰구간 95% 밖)', '• 통계적으로 유의미한 단가 이상치 탐지'),
+            ('5. 내국세구분', '• 필터링 조건: 세번부호 10자리 AND 22로 시작 AND 내국세부호 없음', '• 주류 수입 시 내국세부호 누락은 세금 신고 오류'),
+            ('6. F세율 적용', '• 필터링 조건: 세율구분이 "F"로 시작하는 건', '• FTA 등 협정세율 적용 적정성 확인'),
+            ('7. FTA 기회 발굴', '• 필터링 조건: A세율 적용 & 적출국=원산지 & 관세율 > 0', '• FTA 미적용 건 중 적용 가능성 있는 건 발굴'),
+            ('8. 저가신고 의심', '• 필터링 조건: 단가 $10 이하', '• 저가 신고로 인한 관세 탈루 리스크 점검'),
+            ('9. 통화단위 불일치', '• 거래처별: 동일 거래처 내 통화단위 2개 이상 존재 여부 확인\n• 국가별: 동일 국가 내 통화단위 사용 빈도 분석 (하위 10% 미만 이상치 탐지)', '• 신고 오류 가능성 점검'),
+            ('10. 특수거래 구분', '• 필터링 조건: 일반수입(11) 외 거래구분', '• 재수출, 감면 등 특수 거래의 사후관리 필요성 점검'),
+            ('11. 무상운임 누락', '• 필터링 조건: 결제방법 "GN"(무상) & 운임 0원', '• 무상 수입 시 운임 누락 여부 점검'),
+            ('12. 용도세율 적용', '• 필터링 조건: 세율구분 "C"', '• 용도세율 적용 물품의 사후관리 이행 여부 점검'),
+            ('13. 원본데이터', '• 분석에 사용된 원본 엑셀 파일의 모든 데이터', '• 원본 데이터와 분석 결과 비교 검토 가능')
+        ]
+        
+        for title, content, note in sections:
+            worksheet.write(current_row, 0, title, subtitle_format)
+            worksheet.write(current_row, 1, content, content_format)
+            worksheet.write(current_row, 2, note, highlight_format)
+            worksheet.set_row(current_row, 80)
+            current_row += 1
+            
+        return True
+    except Exception as e:
+        logger.error(f"검증방법 시트 생성 중 오류 발생: {str(e)}")
+        return False
+
+# 결과 키 -> 엑셀 시트명
+EXCEL_SHEET_MAP = {
+    'eight_percent': '8% 환급 검토',
+    'zero_risk': '0% 세율 위험',
+    'tariff_risk': '세율 위험',
+    'price_risk': '단가 위험',
+    'domestic_tax': '내국세구분',
+    'import_req_risk': '수입요건 Risk',
+    'f_rate': 'F세율 적용',
+    'fta_opp': 'FTA 기회 발굴',
+    'low_price': '저가신고 의심',
+    'currency_inc': '통화단위 불일치',
+    'trade_type': '특수거래 구분',
+    'free_freight': '무상운임 누락',
+    'usage_rate': '용도세율 적용'
+}
+
+# 중요 컬럼 정의 (파란색 헤더)
+EXCEL_KEY_COLUMNS = {
+    'eight_percent': ['수입신고번호', '관세실행세율'],
+    'zero_risk': ['수입신고번호', '관세실행세율'],
+    'tariff_risk': ['규격1', '세번부호', '관세실행세율'],
+    'price_risk': ['수입신고번호', 'Z-Score'],
+    'domestic_tax': ['수입신고번호', '세번부호'],
+    'import_req_risk': ['규격1', '법령코드'],
+    'f_rate': ['수입신고번호', '세율구분'],
+    'fta_opp': ['수입신고번호', '관세실행세율'],
+    'low_price': ['수입신고번호', '단가'],
+    'currency_inc': ['무역거래처상호', '결제통화단위', '이상치점수'],
+    'free_freight': ['수입신고번호', '운임'],
+    'usage_rate': ['수입신고번호', '세율구분']
+}
+
+EXCEL_MAX_ROWS = 1048576  # 엑셀 시트당 최대 행 수 (헤더 포함)
+EXCEL_STREAMING_ROW_THRESHOLD = 100000  # 결과 행 합계가 이를 넘으면 스트리밍 모드로 생성
+EXCEL_WRITE_BLOCK_ROWS = 10000  # 스트리밍 모드에서 한 번에 셀 값으로 변환하는 행 수
+EXCEL_MANIFEST_SHEET = '_manifest'  # 실행 기록 숨김 시트
+
+def _add_sheet_formats(workbook):
+    """결과 시트 공용 서식"""
+    return {
+        'header_blue': workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1, 'align': 'center'}),
+        'header_gray': workbook.add_format({'bold': True, 'bg_color': '#D9E1F2', 'border': 1, 'align': 'center'}),
+        'red': workbook.add_format({'bg_color': '#FF0000', 'font_color': 'white', 'border': 1}),
+        'yellow': workbook.add_format({'bg_color': '#FFFF00', 'border': 1}),
+        'orange': workbook.add_format({'bg_color': '#FFA500', 'border': 1}),
+        'text': workbook.add_format({'num_format': '@'}),  # 텍스트 포맷
+        'date': workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+    }
+
+def _write_sheet_header(worksheet, key, columns, formats):
+    """헤더 행 쓰기 (중요 컬럼은 파란색)"""
+    key_cols = EXCEL_KEY_COLUMNS.get(key, [])
+    for col_idx, col_name in enumerate(columns):
+        worksheet.write(0, col_idx, col_name, formats['header_blue'] if col_name in key_cols else formats['header_gray'])
+
+def _format_result_sheet(worksheet, key, data, num_rows, formats):
+    """결과 시트 컬럼 서식과 특이값 조건부 서식 적용"""
+    columns = list(data.columns)
+    
+    # 세번부호와 수입신고번호 컬럼을 텍스트로 포맷 (소수점 방지)
+    for col_name in ['세번부호', '수입신고번호']:
+        if col_name in columns:
+            col_idx = columns.index(col_name)
+            worksheet.set_column(col_idx, col_idx, None, formats['text'])
+    
+    if num_rows == 0:
+        return
+    
+    # 각 시트별 특이값 색상 규칙 (빠른 조건부 서식만 사용)
+    if key == 'eight_percent' and '관세실행세율' in columns:
+        col_idx = columns.index('관세실행세율')
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx, 
+            {'type': 'cell', 'criteria': '>=', 'value': 8, 'format': formats['orange']})
+    
+    elif key == 'zero_risk' and '관세실행세율' in columns:
+        col_idx = columns.index('관세실행세율')
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx,
+            {'type': 'cell', 'criteria': '<', 'value': 8, 'format': formats['red']})
+    
+    elif key == 'fta_opp' and '관세실행세율' in columns:
+        col_idx = columns.index('관세실행세율')
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx,
+            {'type': 'cell', 'criteria': '>', 'value': 0, 'format': formats['orange']})
+    
+    elif key == 'low_price' and '단가' in columns:
+        col_idx = columns.index('단가')
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx,
+            {'type': 'cell', 'criteria': '<=', 'value': 10, 'format': formats['yellow']})
+    
+    elif key == 'currency_inc' and '이상치점수' in columns:
+        col_idx = columns.index('이상치점수')
+        # 이상치점수 컬럼에 색상 적용
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx,
+            {'type': 'cell', 'criteria': '>', 'value': 80, 'format': formats['yellow']})
+        
+        # 이상치점수가 높은 행 전체를 강조 (행 단위 수식 조건부 서식, 90 초과: 주황색 배경)
+        from xlsxwriter.utility import xl_col_to_name
+        score_cell = f"${xl_col_to_name(col_idx)}2"
+        worksheet.conditional_format(1, 0, num_rows, len(columns) - 1,
+            {'type': 'formula', 'criteria': f'=AND(ISNUMBER({score_cell}),{score_cell}>90)', 'format': formats['orange']})
+    
+    elif key == 'free_freight' and '운임' in columns:
+        col_idx = columns.index('운임')
+        worksheet.conditional_format(1, col_idx, num_rows, col_idx,
+            {'type': 'cell', 'criteria': '==', 'value': 0, 'format': formats['yellow']})
+
+def _write_summary_sheet(workbook, summary_data, write_frame):
+    """Summary 시트 쓰기 (write_frame(worksheet, df, startrow)로 표 출력)"""
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#D9E1F2', 'border': 1, 'align': 'center'})
+    summary_sheet = workbook.add_worksheet('Summary')
+    row = 0
+    summary_sheet.merge_range(row, 0, row, 3, '수입신고 분석 보고서', workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center'}))
+    row += 2
+    summary_sheet.write(row, 0, '전체 신고 건수', header_format)
+    summary_sheet.write(row, 1, summary_data.get('전체 신고 건수', 0))
+    row += 2
+    
+    for key in ['거래구분별', '세율구분별', 'Risk분석']:
+        if key in summary_data:
+            summary_sheet.write(row, 0, f'{key} 분석', header_format)
+            row += 1
+            write_frame(summary_sheet, summary_data[key], row)
+            row += len(summary_data[key]) + 2
+
+def _write_manifest_sheet(workbook, manifest):
+    """실행 기록(manifest)을 숨김 시트에 키/값 행으로 기록 (다른 시트가 있을 때만 숨김)"""
+    from .manifest import flatten_manifest
+    worksheet = workbook.add_worksheet(EXCEL_MANIFEST_SHEET)
+    worksheet.write_row(0, 0, ['key', 'value'])
+    for row, (key, value) in enumerate(flatten_manifest(manifest), start=1):
+        worksheet.write_row(row, 0, [key, value if isinstance(value, (int, float, bool)) or value is None else str(value)])
+    worksheet.set_column(0, 0, 36)
+    worksheet.set_column(1, 1, 80)
+    if len(workbook.worksheets()) > 1:
+        worksheet.hide()
+
+def _column_cells(series):
+    """컬럼을 셀 값 리스트로 변환 (결측은 빈 셀, 타입은 유지)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.tz_localize(None).dt.to_pydatetime() if series.dt.tz is not None else series.dt.to_pydatetime()
+        values = values.astype(object)
+    elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=object)
+    else:
+        values = series.to_numpy(dtype=object, na_value=None)
+    mask = pd.isna(series).to_numpy()
+    if mask.any():
+        values = values.copy()
+        values[mask] = None
+    return values.tolist()
+
+def _iter_rows(data, block_rows=EXCEL_WRITE_BLOCK_ROWS):
+    """표의 행을 셀 값 튜플로 순서대로 생성 (block_rows 행씩만 변환하여 메모리 사용량 일정)"""
+    for start in range(0, len(data), block_rows):
+        block = data.iloc[start:start + block_rows]
+        yield from zip(*[_column_cells(block[col]) for col in block.columns])
+
+def _stream_frame(worksheet, data, startrow, header_format=None):
+    """표를 행 단위로 스트리밍 쓰기 (constant_memory 모드는 행 순서대로만 쓸 수 있음)"""
+    worksheet.write_row(startrow, 0, [str(c) for c in data.columns], header_format)
+    for row_idx, row in enumerate(_iter_rows(data), start=startrow + 1):
+        worksheet.write_row(row_idx, 0, row)
+
+def _split_sheet_names(sheet_name, num_rows):
+    """엑셀 행 제한을 넘는 결과를 나눌 시트명과 행 범위"""
+    chunk_rows = EXCEL_MAX_ROWS - 1
+    chunks = max((num_rows - 1) // chunk_rows + 1, 1)
+    for part in range(chunks):
+        name = sheet_name if part == 0 else f"{sheet_name} ({part + 1})"
+        yield name[:31], part * chunk_rows, min((part + 1) * chunk_rows, num_rows)
+
+def write_excel_report(path, results, summary_data, manifest=None):
+    """스트리밍 엑셀 보고서를 파일로 생성 (xlsxwriter constant_memory, 시트당 행 제한 자동 분할)
+    
+    행 데이터는 EXCEL_WRITE_BLOCK_ROWS 행씩 변환하여 행 순서대로 기록하므로
+    결과 크기와 관계없이 워크북과 셀 값을 메모리에 쌓지 않는다.
+    manifest(manifest.build_manifest)가 있으면 숨김 시트 EXCEL_MANIFEST_SHEET로 추가한다.
+    """
+    import xlsxwriter
+    
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': tempfile.gettempdir()})
+    try:
+        formats = _add_sheet_formats(workbook)
+        
+        if summary_data:
+            _write_summary_sheet(workbook, summary_data, lambda sheet, df, row: _stream_frame(sheet, df, row, formats['header_gray']))
+        
+        for key, sheet_name in EXCEL_SHEET_MAP.items():
+            data = results.get(key)
+            if data is None or data.empty:
+                continue
+            for part_name, start, end in _split_sheet_names(sheet_name, len(data)):
+                chunk = data.iloc[start:end]
+                worksheet = workbook.add_worksheet(part_name)
+                _format_result_sheet(worksheet, key, chunk, len(chunk), formats)
+                for col_idx, col_name in enumerate(chunk.columns):
+                    if pd.api.types.is_datetime64_any_dtype(chunk[col_name]):
+                        worksheet.set_column(col_idx, col_idx, None, formats['date'])
+                _write_sheet_header(worksheet, key, chunk.columns, formats)
+                for row_idx, row in enumerate(_iter_rows(chunk), start=1):
+                    worksheet.write_row(row_idx, 0, row)
+        
+        if manifest:
+            _write_manifest_sheet(workbook, manifest)
+    finally:
+        workbook.close()
+    return path
+
+def excel_needs_streaming(results):
+    """결과 행 합계가 EXCEL_STREAMING_ROW_THRESHOLD를 넘거나 시트 행 제한을 넘는 결과가 있는지"""
+    row_counts = [len(data) for key, data in results.items() if key in EXCEL_SHEET_MAP and data is not None]
+    return sum(row_counts) > EXCEL_STREAMING_ROW_THRESHOLD or any(n >= EXCEL_MAX_ROWS for n in row_counts)
+
+def save_excel_file(path, df_original, results, summary_data, manifest=None):
+    """Excel 보고서를 path에 저장하고 성공 여부 반환
+    
+    스트리밍 대상이면 write_excel_report로 바로 파일에 쓰므로 완성된 워크북을 bytes로 들고 있지 않는다.
+    """
+    if excel_needs_streaming(results):
+        try:
+            write_excel_report(path, results, summary_data, manifest)
+            return True
+        except Exception as e:
+            logger.error(f"엑셀 생성 오류: {e}")
+            return False
+    data = create_excel_file(df_original, results, summary_data, streaming=False, manifest=manifest)
+    if not data:
+        return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def create_excel_file(df_original, results, summary_data, streaming=None, manifest=None):
+    """Excel 파일 생성 (모든 결과 포함)
+    
+    streaming=None이면 결과 행 합계가 EXCEL_STREAMING_ROW_THRESHOLD를 넘거나 시트 행 제한을
+    넘는 결과가 있을 때 임시 파일 기반 스트리밍 모드(write_excel_report)를 사용한다.
+    manifest가 있으면 실행 기록 숨김 시트를 추가한다.
+    """
+    try:
+        if streaming is None:
+            streaming = excel_needs_streaming(results)
+        
+        if streaming:
+            fd, path = tempfile.mkstemp(suffix='.xlsx')
+            os.close(fd)
+            try:
+                write_excel_report(path, results, summary_data, manifest)
+                with open(path, 'rb') as f:
+                    return f.read()
+            finally:
+                os.remove(path)
+        
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            workbook = writer.book
+            
+            if summary_data:
+                _write_summary_sheet(workbook, summary_data,
+                    lambda sheet, df, row: df.to_excel(writer, sheet_name='Summary', startrow=row, startcol=0, index=False))
+
+            # 모든 결과 시트 저장
+            formats = _add_sheet_formats(workbook)
+
+            for key, sheet_name in EXCEL_SHEET_MAP.items():
+                data = results.get(key)
+                if data is not None and not data.empty:
+                    # 데이터 먼저 쓰기
+                    data.to_excel(writer, sheet_name=sheet_name, index=False)
+                    worksheet = writer.sheets[sheet_name]
+                    
+                    # 헤더 색상 및 특이값 서식 적용
+                    _write_sheet_header(worksheet, key, data.columns, formats)
+                    _format_result_sheet(worksheet, key, data, len(data), formats)
+
+            # create_verification_methods_excel_sheet(writer)  # 속도 개선을 위해 제거
+            
+            if manifest:
+                _write_manifest_sheet(workbook, manifest)
+            
+            
+        output.seek(0)
+        return output.getvalue()
+    except Exception as e:
+        logger.error(f"엑셀 생성 오류: {e}")
+        return None
+
+# --- JSON ---
+
+def to_jsonable(value):
+    """요약 데이터(DataFrame, numpy 값)를 JSON 직렬화 가능한 값으로 변환"""
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records', force_ascii=False, date_format='iso'))
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+# --- Word Table Engine ---
+
+WORD_TABLE_STYLE = 'Light Grid Accent 1'
+WORD_DECIMAL_COLUMNS = ['Z-Score', '평균단가', '표준편차', '사용비율', '이상치점수']
+WORD_TABLE_PLACEHOLDER = '__TRADEGUARD_TABLE_{}__'
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _word_cell_texts(series, col_name):
+    """컬럼 값을 워드 셀 문자열 리스트로 변환 (컬럼 단위 일괄 포맷)"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        spec = '{:.2f}' if col_name in WORD_DECIMAL_COLUMNS else '{:,.0f}'
+        return ['' if pd.isna(v) else spec.format(v) for v in series.tolist()]
+    return ['' if v is None or (isinstance(v, float) and pd.isna(v)) else str(v) for v in series.tolist()]
+
+def _word_cell_xml(text, width, bold=False):
+    """셀 하나의 WordprocessingML"""
+    if not text:
+        return f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr><w:p/></w:tc>'
+    text = escape(_XML_INVALID_CHARS.sub('', text))
+    run_props = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    return (f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr>'
+            f'<w:p><w:r>{run_props}<w:t xml:space="preserve">{text}</w:t></w:r></w:p></w:tc>')
+
+def add_word_table(doc, data, columns, tables):
+    """표 자리표시 문단을 추가하고 표 XML은 tables에 모아 둔다 (저장 후 _fill_word_tables로 치환)
+    
+    python-docx의 table.add_row()나 lxml 트리 삽입은 행 수에 비례해 느려지므로
+    add_table과 같은 구조(스타일, 열 너비, 머리글 굵게)의 표 XML을 문자열로 일괄 생성한다.
+    """
+    section = doc.sections[-1]
+    block_width = section.page_width - section.left_margin - section.right_margin
+    width = int(block_width / len(columns)) // 635  # EMU -> twip
+    style_id = doc.styles[WORD_TABLE_STYLE].style_id
+    
+    parts = [f'<w:tbl><w:tblPr><w:tblStyle w:val="{style_id}"/><w:tblW w:type="auto" w:w="0"/>'
+             '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>'
+             '</w:tblPr><w:tblGrid>']
+    parts.append(f'<w:gridCol w:w="{width}"/>' * len(columns))
+    parts.append('</w:tblGrid><w:tr>')
+    parts.extend(_word_cell_xml(str(col_name), width, bold=True) for col_name in columns)
+    parts.append('</w:tr>')
+    
+    cell_texts = [_word_cell_texts(data[col_name], col_name) for col_name in columns]
+    for row in zip(*cell_texts):
+        parts.append('<w:tr>')
+        parts.extend(_word_cell_xml(text, width) for text in row)
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    
+    doc.add_paragraph(WORD_TABLE_PLACEHOLDER.format(len(tables)))
+    tables.append(''.join(parts))
+
+def _fill_word_tables(docx_bytes, tables):
+    """저장된 docx의 자리표시 문단을 표 XML로 치환"""
+    if not tables:
+        return docx_bytes
+    placeholder = re.compile(r'<w:p>(?:(?!</w:p>).)*?' + WORD_TABLE_PLACEHOLDER.format(r'(\d+)') + r'.*?</w:p>', re.S)
+    
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as src, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            content = src.read(item.filename)
+            if item.filename == 'word/document.xml':
+                content = placeholder.sub(lambda m: tables[int(m.group(1))], content.decode('utf-8')).encode('utf-8')
+            dst.writestr(item, content)
+    return output.getvalue()
+
+def create_word_document(results, summary_data, max_rows=None):
+    """워드 문서 생성 (특이건 전체 상세 포함, max_rows 지정 시 섹션별 상위 max_rows건)"""
+    try:
+        from docx import Document
+        
+        doc = Document()
+        tables = []
+        doc.add_heading('수입신고 RISK 분석 보고서', 0)
+        doc.add_paragraph(datetime.datetime.now().strftime("%Y-%m-%d"))
+        
+        if summary_data:
+            doc.add_heading('종합 요약', level=1)
+            p = doc.add_paragraph()
+            p.add_run(f"전체 신고 건수: {summary_data.get('전체 신고 건수', 0):,} 건").bold = True
+            
+            if 'Risk분석' in summary_data:
+                risk_df = summary_data['Risk분석']
+                risk_found = risk_df[risk_df['신고건수'] > 0]
+                
+                if len(risk_found) > 0:
+                    p.add_run(f"\n\n⚠️ 발견된 Risk 유형: {len(risk_found)}건").bold = True
+                    for _, row in risk_found.iterrows():
+                        p.add_run(f"\n- {row['Risk 유형']}: {row['신고건수']:,} 건 ({row['비율(%)']:.1f}%)")
+                else:
+                    p.add_run("\n\n✅ 특이사항이 발견되지 않았습니다.").bold = True
+        
+        section_titles = {
+            'eight_percent': ('8% 환급 검토', '8% 환급 검토  대상', ['수입신고번호', '세번부호', '관세실행세율', '금액', '거래품명']),
+            'zero_risk': ('0% 세율 위험', '0% 세율 위험', ['수입신고번호', '세번부호', '세율구분', '관세실행세율', '거래품명']),
+            'tariff_risk': ('세율 위험', '세율 위험(세번부호 불일치)', ['규격1', '세번부호', '세율구분', '거래품명']),
+            'price_risk': ('단가 위험', '단가 이상치 (Z-Score)', ['수입신고번호', '규격1', '단가', 'Z-Score', '평균단가']),
+            'domestic_tax': ('내국세구분 누락', '내국세구분 누락', ['수입신고번호', '세번부호', '거래품명', '금액']),
+            'import_req_risk': ('수입요건 Risk', '수입요건 불일치', ['규격1', '수입신고번호', '법령코드', '발급서류명']),
+            'f_rate': ('F세율 적용', 'F세율 적용 건', ['수입신고번호', '세번부호', '세율구분', '세율설명', '거래품명']),
+            'fta_opp': ('FTA 기회 발굴', 'FTA 적용 기회', ['수입신고번호', '세번부호', '관세실행세율', '적출국코드', '원산지코드']),
+            'low_price': ('저가신고 의심', '저가신고 의심 건', ['수입신고번호', '거래품명', '단가', '금액', '결제통화단위']),
+            'currency_inc': ('통화단위 불일치', '통화단위 불일치 건', ['무역거래처상호', '결제통화단위', '수입신고번호', '금액']),
+            'country_curr_inc': ('국가별 통화단위 불일치', '국가별 희귀 통화단위 사용', ['무역거래처국가코드', '결제통화단위', '사용비율', '이상치점수']),
+            'trade_type': ('특수거래 구분', '특수거래 구분 건', ['수입신고번호', '거래구분', '세번부호', '거래품명', '금액']),
+            'free_freight': ('무상운임 누락', '무상운임 누락 의심', ['수입신고번호', '결제방법', '운임', '금액', '거래품명']),
+            'usage_rate': ('용도세율 적용', '용도세율 적용 건', ['수입신고번호', '세번부호', '세율구분', '세율설명', '거래품명'])
+        }
+
+        has_findings = False
+        for key, (title, desc, display_cols) in section_titles.items():
+            data =  results.get(key)
+            if data is not None and not data.empty:
+                has_findings = True
+                doc.add_heading(title, level=1)
+                doc.add_paragraph(f'총 {len(data):,} 건의 {desc}이(가) 식별되었습니다.')
+                
+                if max_rows is not None and len(data) > max_rows:
+                    doc.add_paragraph(f'📋 상위 {max_rows:,}건:', style='Heading 2')
+                    data = data.head(max_rows)
+                else:
+                    doc.add_paragraph('📋 상세 내역:', style='Heading 2')
+                
+                available_cols = [col for col in display_cols if col in data.columns]
+                if len(available_cols) == 0:
+                    available_cols = data.columns[:5].tolist()
+                
+                add_word_table(doc, format_date_columns(data[available_cols]), available_cols, tables)
+                
+                doc.add_paragraph()
+        
+        if not has_findings:
+            doc.add_heading('분석 결과', level=1)
+            doc.add_paragraph('✅ 검토가 필요한 특이사항이 발견되지 않았습니다.')
+        
+        doc.add_paragraph()
+        footer = doc.add_paragraph('Generated by 관세법인 우신')
+        footer.alignment = 1
+        
+        doc_output = io.BytesIO()
+        doc.save(doc_output)
+        return _fill_word_tables(doc_output.getvalue(), tables)
+    except Exception as e:
+        logger.error(f"워드 문서 생성 중 오류 발생: {str(e)}")
+        return None
+
+# --- HTML Report ---
+
+HTML_SECTION_TITLES = {
+    'eight_percent': '8% 환급 검토 대상',
+    'zero_risk': '0% 세율 위험',
+    'tariff_risk': '세율 위험(세번부호 불일치)',
+    'price_risk': '단가 변동성 위험',
+    'domestic_tax': '내국세구분 누락',
+    'import_req_risk': '수입요건 불일치',
+    'f_rate': 'F세율 적용',
+    'fta_opp': 'FTA 적용 기회',
+    'low_price': '저가신고 의심',
+    'currency_inc': '통화단위 불일치',
+    'country_curr_inc': '국가별 통화단위 불일치',
+    'trade_type': '특수거래 구분',
+    'free_freight': '무상운임 누락',
+    'usage_rate': '용도세율 적용'
+}
+
+HTML_STYLE = """
+        body { font-family: 'Malgun Gothic', 'Segoe UI', sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; }
+        .container { max-width: 1200px; margin: 0 auto; background: white; padding: 40px; border-radius: 10px; box-shadow: 0 10px 40px rgba(0,0,0,0.1); }
+        h1 { color: #2c3e50; text-align: center; font-size: 2.5em; margin-bottom: 10px; border-bottom: 3px solid #667eea; padding-bottom: 15px; }
+        .date { text-align: center; color: #7f8c8d; font-size: 1.1em; margin-bottom: 30px; }
+        .summary-box { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 10px; margin: 30px 0; box-shadow: 0 5px 20px rgba(102, 126, 234, 0.3); }
+        .metric { display: inline-block; background: rgba(255,255,255,0.2); padding: 15px 25px; border-radius: 8px; margin: 10px; backdrop-filter: blur(10px); }
+        .metric-value { font-size: 2em; font-weight: bold; display: block; }
+        .section { margin: 40px 0; padding: 25px; background: #f8f9fa; border-radius: 8px; border-left: 5px solid #dc3545; }
+        .section h2 { color: #dc3545; margin-top: 0; }
+        table { width: 100%; border-collapse: collapse; margin: 15px 0; }
+        th { background: #667eea; color: white; padding: 12px; text-align: left; font-weight: bold; }
+        td { padding: 10px; border-bottom: 1px solid #ddd; }
+        tr:hover { background-color: #f5f5f5; }
+        .no-findings { text-align: center; color: #28a745; font-size: 1.3em; padding: 40px; }
+        .footer { text-align: center; margin-top: 50px; padding-top: 20px; border-top: 2px solid #ecf0f1; color: #7f8c8d; }
+"""
+
+# 인터랙티브 모드 전용 (가상 스크롤 그리드)
+HTML_GRID_STYLE = """
+        .grid-tools { display: flex; gap: 10px; align-items: center; margin: 10px 0; }
+        .grid-tools input { flex: 1; padding: 8px; border: 1px solid #ccc; border-radius: 4px; }
+        .grid-count { color: #7f8c8d; white-space: nowrap; }
+        .grid-viewport { height: 420px; overflow: auto; position: relative; background: white; border: 1px solid #ddd; }
+        .grid-viewport table { margin: 0; table-layout: fixed; position: absolute; top: 0; left: 0; }
+        .grid-viewport th { cursor: pointer; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; padding: 0 8px; height: 32px; }
+        .grid-viewport td { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; padding: 0 8px; height: 27px; }
+        .grid-viewport td.num { text-align: right; }
+"""
+
+# 압축 컬럼형 JSON을 풀어 가상 스크롤/정렬/필터로 그리는 클라이언트 코드 (외부 의존성 없음)
+HTML_GRID_SCRIPT = """
+const ROW_HEIGHT = 28, OVERSCAN = 10;
+async function loadColumns(el) {
+    const bytes = Uint8Array.from(atob(el.textContent.trim()), c => c.charCodeAt(0));
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return await new Response(stream).json();
+}
+function formatCell(v, numeric) {
+    if (v === null || v === undefined) return '';
+    if (numeric) return v.toLocaleString('ko-KR', {maximumFractionDigits: 2});
+    return String(v);
+}
+function escapeHtml(s) {
+    return s.replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+}
+async function initGrid(section) {
+    const data = await loadColumns(section.querySelector('script.grid-data'));
+    const cols = data.columns, values = data.data, n = data.rows;
+    const numeric = values.map(col => col.every(v => v === null || typeof v === 'number'));
+    const viewport = section.querySelector('.grid-viewport');
+    const filterInput = section.querySelector('input');
+    const countEl = section.querySelector('.grid-count');
+    const spacer = document.createElement('div');
+    const table = document.createElement('table');
+    viewport.append(spacer, table);
+    const colWidth = Math.max(120, Math.floor(viewport.clientWidth / cols.length));
+    table.style.width = spacer.style.width = (colWidth * cols.length) + 'px';
+    let order = Array.from({length: n}, (_, i) => i), sortCol = -1, sortDir = 1, rowText = null;
+
+    function header() {
+        return '<thead><tr>' + cols.map((c, j) =>
+            `<th data-col="${j}" style="width:${colWidth}px">${escapeHtml(String(c))}${j === sortCol ? (sortDir > 0 ? ' ▲' : ' ▼') : ''}</th>`
+        ).join('') + '</tr></thead>';
+    }
+    function render() {
+        const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.min(order.length, first + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+        const rows = [];
+        for (let k = first; k < last; k++) {
+            const i = order[k];
+            rows.push('<tr>' + values.map((col, j) =>
+                `<td class="${numeric[j] ? 'num' : ''}">${escapeHtml(formatCell(col[i], numeric[j]))}</td>`).join('') + '</tr>');
+        }
+        table.style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+        table.innerHTML = header() + '<tbody>' + rows.join('') + '</tbody>';
+        table.querySelector('thead').style.transform = `translateY(${viewport.scrollTop - first * ROW_HEIGHT}px)`;
+    }
+    function refresh() {
+        spacer.style.height = (order.length * ROW_HEIGHT + 32) + 'px';
+        countEl.textContent = `${order.length.toLocaleString()} / ${n.toLocaleString()} 건`;
+        render();
+    }
+    function applyFilter() {
+        const q = filterInput.value.trim().toLowerCase();
+        if (q && rowText === null) {
+            rowText = Array.from({length: n}, (_, i) => values.map(col => col[i] === null ? '' : String(col[i])).join('\\u0001').toLowerCase());
+        }
+        order = [];
+        for (let i = 0; i < n; i++) if (!q || rowText[i].includes(q)) order.push(i);
+        if (sortCol >= 0) sortOrder();
+        viewport.scrollTop = 0;
+        refresh();
+    }
+    function sortOrder() {
+        const col = values[sortCol], isNum = numeric[sortCol];
+        order.sort((a, b) => {
+            const x = col[a], y = col[b];
+            if (x === y) return a - b;
+            if (x === null) return 1;
+            if (y === null) return -1;
+            return (isNum ? x - y : String(x).localeCompare(String(y), 'ko')) * sortDir;
+        });
+    }
+    table.addEventListener('click', e => {
+        const th = e.target.closest('th');
+        if (!th) return;
+        const j = Number(th.dataset.col);
+        sortDir = j === sortCol ? -sortDir : 1;
+        sortCol = j;
+        sortOrder();
+        render();
+    });
+    let pending = null;
+    filterInput.addEventListener('input', () => { clearTimeout(pending); pending = setTimeout(applyFilter, 200); });
+    viewport.addEventListener('scroll', () => requestAnimationFrame(render));
+    refresh();
+}
+document.querySelectorAll('.section[data-grid]').forEach(section =>
+    initGrid(section).catch(err => { section.querySelector('.grid-count').textContent = '데이터를 불러올 수 없습니다: ' + err; }));
+"""
+
+def _json_column(series):
+    """컬럼을 JSON 직렬화 가능한 리스트로 변환 (결측은 null)"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(object).where(series.notna(), None).tolist()
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype('float64').round(6)
+        return [None if v != v else (int(v) if v.is_integer() else v) for v in values.tolist()]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+    return [None if v is None or (isinstance(v, float) and v != v) else str(v) for v in series.tolist()]
+
+def encode_columnar_json(data):
+    """결과 표를 gzip + base64 컬럼형 JSON으로 인코딩 ({"columns", "rows", "data": [컬럼별 값]})"""
+    payload = {
+        'columns': [str(col) for col in data.columns],
+        'rows': len(data),
+        'data': [_json_column(data[col]) for col in data.columns]
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    return base64.b64encode(gzip.compress(raw, compresslevel=6)).decode('ascii')
+
+def _html_sample_table(parts, data):
+    """상위 5건, 앞 6개 컬럼 정적 표"""
+    sample_data = format_date_columns(data.head(5))
+    cols_to_show = list(sample_data.columns[:6])
+    parts.append('<table><thead><tr>')
+    parts.extend(f"<th>{html.escape(str(col))}</th>" for col in cols_to_show)
+    parts.append('</tr></thead><tbody>')
+    for row in sample_data[cols_to_show].itertuples(index=False):
+        parts.append('<tr>')
+        for value in row:
+            if isinstance(value, (int, float)) and not pd.isna(value):
+                parts.append(f"<td>{value:,.2f}</td>")
+            else:
+                parts.append(f"<td>{html.escape(str(value))}</td>")
+        parts.append('</tr>')
+    parts.append('</tbody></table>')
+
+def create_html_report(results, summary_data, interactive=False):
+    """HTML 보고서 생성 (특이건만 상세 포함)
+    
+    interactive=True이면 각 결과 전체를 gzip + base64 컬럼형 JSON으로 내장하고
+    브라우저에서 가상 스크롤/정렬/필터로 표시한다 (오프라인 단일 파일).
+    """
+    try:
+        parts = [f"""
+<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>수입신고 RISK 분석 보고서</title>
+    <style>{HTML_STYLE}{HTML_GRID_STYLE if interactive else ''}    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>📊 수입신고 RISK 분석 보고서</h1>
+        <div class="date">{datetime.datetime.now().strftime("%Y-%m-%d %H:%M")}</div>
+        
+        <div class="summary-box">
+            <h2>종합 요약</h2>
+"""]
+        if summary_data:
+            total_count = summary_data.get('전체 신고 건수', 0)
+            parts.append(f"""
+            <div class="metric">
+                <span class="metric-value">{total_count:,}</span>
+                <span class="metric-label">전체 신고 건수</span>
+            </div>
+""")
+            if 'Risk분석' in summary_data:
+                risk_df = summary_data['Risk분석']
+                risk_found = risk_df[risk_df['신고건수'] > 0]
+                for _, row in risk_found.iterrows():
+                    parts.append(f"""
+            <div class="metric">
+                <span class="metric-value">{row['신고건수']:,}</span>
+                <span class="metric-label">{row['Risk 유형']} ({row['비율(%)']:.1f}%)</span>
+            </div>
+""")
+        parts.append("</div>")
+        
+        has_findings = False
+        for key, desc in HTML_SECTION_TITLES.items():
+            data = results.get(key)
+            if data is not None and not data.empty:
+                has_findings = True
+                parts.append(f"""
+        <div class="section"{' data-grid' if interactive else ''}>
+            <h2>⚠️ {desc}</h2>
+            <p>총 <strong>{len(data):,}</strong> 건의 {desc}이(가) 식별되었습니다.</p>
+""")
+                if interactive:
+                    parts.append('<div class="grid-tools"><input type="search" placeholder="🔍 필터 (모든 컬럼 포함 검색)">'
+                                 '<span class="grid-count">불러오는 중...</span></div><div class="grid-viewport"></div>'
+                                 '<script type="application/gzip;base64" class="grid-data">')
+                    parts.append(encode_columnar_json(format_date_columns(data)))
+                    parts.append('</script>')
+                else:
+                    _html_sample_table(parts, data)
+                parts.append("</div>")
+        
+        if not has_findings:
+            parts.append('<div class="no-findings">✅ 검토가 필요한 특이사항이 발견되지 않았습니다.</div>')
+        
+        parts.append("""
+        <div class="footer">
+            <p><strong>Generated by 관세법인 우신</strong></p>
+        </div>
+    </div>
+""")
+        if interactive:
+            parts.append(f"<script>{HTML_GRID_SCRIPT}</script>\n")
+        parts.append("""</body>
+</html>
+""")
+        return ''.join(parts)
+    except Exception as e:
+        logger.error(f"HTML 보고서 생성 중 오류 발생: {str(e)}")
+        return None
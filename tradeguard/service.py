@@ -0,0 +1,322 @@
+"""로컬 HTTP 분석 서비스 (python -m tradeguard serve)
+
+ERP 등 내부 시스템이 신고 파일을 올리고 작업 상태/결과를 조회하는 JSON API.
+프로세스가 상주하므로 분석 워커 풀(JobScheduler)과 참조 데이터(usage_rate_hsk.csv)가
+요청마다 다시 준비되지 않는다.
+
+    POST   /jobs?filename=신고.xlsx&analyses=eight_percent,fta_opp   (본문: 파일 바이트)
+    GET    /jobs/<id>                                                 상태/진행률/ETA
+    GET    /jobs/<id>/result?format=json|xlsx|html|html_full&limit=N  결과
+    DELETE /jobs/<id>                                                 취소
+    GET    /analyses, /health
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .analysis import ANALYSIS_KEY_MAP, load_usage_rate_hsk, make_options_key
+from .ingest import read_excel_file
+from .jobs import JOB_MAX_WORKERS, AnalysisJob, JobScheduler
+from .perf import current_rss_mb
+from .reports import create_excel_file, create_html_report, to_jsonable
+
+logger = logging.getLogger(__name__)
+
+# --- Service Settings ---
+
+SERVICE_HOST = os.environ.get('TRADEGUARD_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.environ.get('TRADEGUARD_SERVICE_PORT', 8765))
+SERVICE_MAX_UPLOAD_MB = float(os.environ.get('TRADEGUARD_MAX_UPLOAD_MB', 200))  # 요청 본문 최대 크기
+SERVICE_MAX_PENDING_JOBS = int(os.environ.get('TRADEGUARD_MAX_PENDING_JOBS', 16))  # 대기열이 이보다 길면 503
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# 결과 다운로드 형식 -> (MIME, 확장자)
+RESULT_FORMATS = {
+    'xlsx': ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", '.xlsx'),
+    'html': ("text/html; charset=utf-8", '.html'),
+    'html_full': ("text/html; charset=utf-8", '_전체.html')
+}
+
+class ServiceError(Exception):
+    """HTTP 상태 코드를 가진 요청 오류"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class AnalysisService:
+    """업로드 파싱, 작업 제출/조회, 결과 직렬화 (HTTP 처리와 분리)"""
+
+    def __init__(self, workers=JOB_MAX_WORKERS, max_upload_mb=SERVICE_MAX_UPLOAD_MB, max_pending=SERVICE_MAX_PENDING_JOBS):
+        self.scheduler = JobScheduler(max_workers=workers)
+        self.max_upload_bytes = int(max_upload_mb * 1024 * 1024)
+        self.max_pending = max_pending
+        self.parse_slots = threading.BoundedSemaphore(max(1, workers))  # 동시 파일 파싱 수 제한
+        self.labels_by_key = {key: label for label, key in ANALYSIS_KEY_MAP.items()}
+        self.reference_errors = {}  # 참조 데이터 이름 -> 사전 로드 오류 (/health에 표시)
+
+    def warm_up(self):
+        """참조 데이터 미리 로드 (실패해도 서비스는 시작하되 오류로 기록하고 /health 상태를 degraded로 표시)"""
+        self.reference_errors.clear()
+        try:
+            if not load_usage_rate_hsk():
+                raise ValueError("HSK 목록이 비어 있습니다.")
+        except Exception as e:
+            logger.error(f"용도세율 HSK 파일 사전 로드 실패: {e}")
+            self.reference_errors['usage_rate_hsk'] = str(e)
+
+    def parse_analyses(self, value):
+        if not value:
+            return list(ANALYSIS_KEY_MAP)
+        labels = []
+        for item in (v.strip() for v in value.split(',')):
+            if item in ANALYSIS_KEY_MAP:
+                labels.append(item)
+            elif item in self.labels_by_key:
+                labels.append(self.labels_by_key[item])
+            elif item:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"알 수 없는 분석: {item}")
+        return labels
+
+    def parse_limit(self, value):
+        """결과 행 수 제한 (없으면 None, 0 이상의 정수만 허용)"""
+        if value is None or value == '':
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"limit은 0 이상의 정수여야 합니다: {value}") from None
+        if limit < 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"limit은 0 이상의 정수여야 합니다: {value}")
+        return limit
+
+    def submit(self, body, filename, analyses, client=None):
+        """업로드 본문을 파싱하여 작업 제출 (같은 파일/옵션의 진행 중 작업이 있으면 재사용)"""
+        if len(self.scheduler.pending) >= self.max_pending:
+            raise ServiceError(HTTPStatus.SERVICE_UNAVAILABLE, "대기 중인 작업이 너무 많습니다. 잠시 후 다시 시도하세요.")
+        analysis_options = self.parse_analyses(analyses)
+        file_hash = hashlib.sha256(body).hexdigest()
+
+        job = self.scheduler.find_active(file_hash, make_options_key(analysis_options))
+        if job is not None:
+            return job
+
+        if not filename:
+            filename = 'upload.xlsx' if body[:2] == b'PK' else 'upload.csv'
+        upload = io.BytesIO(body)
+        upload.name = filename
+        with self.parse_slots:
+            df = read_excel_file(upload)
+        if df is None or df.empty:
+            raise ServiceError(HTTPStatus.UNPROCESSABLE_ENTITY, "파일을 읽을 수 없거나 데이터가 없습니다.")
+        return self.scheduler.submit(AnalysisJob(file_hash, df, analysis_options, None, session_id=client))
+
+    def get_job(self, job_id):
+        job = self.scheduler.get(job_id)
+        if job is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, "작업을 찾을 수 없습니다 (만료되었거나 잘못된 ID).")
+        return job
+
+    def job_status(self, job):
+        status = {
+            'id': job.id,
+            'status': job.status,
+            'rows': job.rows,
+            'analyses': job.keys,
+            'completed': [key for key, _ in job.events],
+            'current': job.current,
+            'progress': round(job.progress(), 4),
+            'eta_seconds': None if job.finished else round(job.eta_seconds(self.scheduler.timings), 1),
+            'queue_position': self.scheduler.queue_position(job),
+            'queue_reason': job.queue_reason if job.status == 'queued' else None,
+            'error': job.error,
+            'errors': job.errors,
+            'status_url': f"/jobs/{job.id}",
+            'result_url': f"/jobs/{job.id}/result"
+        }
+        if job.started_at and job.finished_at:
+            status['elapsed'] = round(job.finished_at - job.started_at, 3)
+        return status
+
+    def job_result(self, job, fmt='json', limit=None):
+        """(MIME, 본문 bytes, 파일 확장자) 반환"""
+        if job.status != 'done':
+            raise ServiceError(HTTPStatus.CONFLICT, f"작업이 완료되지 않았습니다 (status: {job.status}).")
+        results = job.results
+        summary_data = results.get('summary', {})
+        manifest = job.manifest
+
+        if fmt == 'json':
+            parts = [f'{{"id":{json.dumps(job.id)},"rows":{job.rows},'
+                     f'"summary":{json.dumps(to_jsonable({k: v for k, v in summary_data.items() if k != "월별추이"}), ensure_ascii=False)},'
+                     f'"manifest":{json.dumps(to_jsonable(manifest), ensure_ascii=False)},'
+                     '"results":{']
+            tables = []
+            for key in job.keys:
+                data = results.get(key)
+                if key == 'summary' or data is None:
+                    continue
+                shown = data if limit is None else data.head(limit)
+                table = shown.to_json(orient='split', index=False, force_ascii=False, date_format='iso')
+                tables.append(f'{json.dumps(key)}:{{"rows":{len(data)},"table":{table}}}')
+            parts.append(','.join(tables))
+            parts.append('}}')
+            return "application/json; charset=utf-8", ''.join(parts).encode('utf-8'), '.json'
+
+        if fmt not in RESULT_FORMATS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"지원하지 않는 형식: {fmt} (json, {', '.join(RESULT_FORMATS)})")
+        mime, ext = RESULT_FORMATS[fmt]
+        if fmt == 'xlsx':
+            body = create_excel_file(None, results, summary_data, manifest=manifest)
+        else:
+            body = create_html_report(results, summary_data, interactive=(fmt == 'html_full'))
+            body = body.encode('utf-8') if body is not None else None
+        if body is None:
+            raise ServiceError(HTTPStatus.INTERNAL_SERVER_ERROR, "보고서 생성에 실패했습니다.")
+        return mime, body, ext
+
+    def health(self):
+        scheduler = self.scheduler
+        return {
+            'status': 'degraded' if self.reference_errors else 'ok',
+            'reference_errors': self.reference_errors,
+            'workers': scheduler.max_workers,
+            'running': len(scheduler.running),
+            'pending': len(scheduler.pending),
+            'memory_in_use_mb': round(scheduler.memory_in_use() / 1024 ** 2, 1),
+            'memory_budget_mb': round(scheduler.memory_budget / 1024 ** 2, 1),
+            'rss_mb': round(current_rss_mb(), 1),
+            'max_upload_mb': round(self.max_upload_bytes / 1024 ** 2, 1)
+        }
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """JSON API 라우팅 (server.service에 AnalysisService)"""
+
+    server_version = 'TradeGuard'
+    protocol_version = 'HTTP/1.1'
+    job_path = re.compile(r'^/jobs/([0-9a-f]+)(/result)?/?$')
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8")
+
+    def _handle(self, method):
+        service = self.server.service
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        match = self.job_path.match(url.path)
+        self.body_read = False
+        try:
+            if method == 'POST' and url.path.rstrip('/') == '/jobs':
+                body = self._read_body(service.max_upload_bytes)
+                filename = query.get('filename') or unquote(self.headers.get('X-Filename', ''))
+                job = service.submit(body, filename, query.get('analyses'), self.client_address[0])
+                status = HTTPStatus.UNPROCESSABLE_ENTITY if job.status == 'failed' else HTTPStatus.ACCEPTED
+                self._send_json(status, service.job_status(job))
+            elif method == 'GET' and match and not match.group(2):
+                self._send_json(HTTPStatus.OK, service.job_status(service.get_job(match.group(1))))
+            elif method == 'GET' and match:
+                limit = service.parse_limit(query.get('limit'))
+                job = service.get_job(match.group(1))
+                mime, body, ext = service.job_result(job, query.get('format', 'json'), limit)
+                headers = {} if ext == '.json' else {'Content-Disposition': f'attachment; filename="tradeguard_{job.id}{ext}"'}
+                self._send(HTTPStatus.OK, body, mime, headers)
+            elif method == 'DELETE' and match and not match.group(2):
+                job = service.get_job(match.group(1))
+                service.scheduler.cancel(job)
+                self._send_json(HTTPStatus.OK, service.job_status(job))
+            elif method == 'GET' and url.path == '/analyses':
+                self._send_json(HTTPStatus.OK, {key: label for label, key in ANALYSIS_KEY_MAP.items()})
+            elif method == 'GET' and url.path == '/health':
+                self._send_json(HTTPStatus.OK, service.health())
+            else:
+                raise ServiceError(HTTPStatus.NOT_FOUND, "없는 경로입니다.")
+        except ServiceError as e:
+            self._close_if_body_unread()
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            logger.exception("요청 처리 오류")
+            self._close_if_body_unread()
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+
+    def _close_if_body_unread(self):
+        """본문을 다 읽지 않은 채 응답하면 남은 업로드가 다음 요청으로 해석되지 않도록 연결을 닫음"""
+        length = self.headers.get('Content-Length', '').strip()
+        if not self.body_read and (length not in ('', '0') or 'Transfer-Encoding' in self.headers):
+            self.close_connection = True
+
+    def _read_body(self, max_bytes):
+        """Content-Length 기준으로 크기 제한을 먼저 확인한 뒤 본문 읽기"""
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise ServiceError(HTTPStatus.LENGTH_REQUIRED, "Content-Length 헤더가 필요합니다.")
+        if not length.strip().isdecimal():
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Content-Length 형식 오류: {length}")
+        length = int(length)
+        if length > max_bytes:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"파일이 허용 크기 {max_bytes / 1024 ** 2:,.0f}MB를 초과합니다.")
+        if length == 0:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "업로드 본문이 비어 있습니다.")
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_BYTES))
+            if not chunk:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "업로드가 중간에 끊겼습니다.")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        self.body_read = True
+        return b''.join(chunks)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+def create_server(host=SERVICE_HOST, port=SERVICE_PORT, workers=JOB_MAX_WORKERS,
+                  max_upload_mb=SERVICE_MAX_UPLOAD_MB, max_pending=SERVICE_MAX_PENDING_JOBS):
+    """분석 서비스 HTTP 서버 생성 (serve_forever()로 실행)"""
+    service = AnalysisService(workers, max_upload_mb, max_pending)
+    service.warm_up()
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT, workers=JOB_MAX_WORKERS,
+          max_upload_mb=SERVICE_MAX_UPLOAD_MB, max_pending=SERVICE_MAX_PENDING_JOBS):
+    server = create_server(host, port, workers, max_upload_mb, max_pending)
+    print(f"TradeGuard 분석 서비스: http://{host}:{server.server_address[1]} "
+          f"(워커 {workers}개, 업로드 최대 {max_upload_mb:,.0f}MB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
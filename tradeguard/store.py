@@ -0,0 +1,344 @@
+"""고객사별 수입신고 이력 저장소 (Parquet, 고객사/수리월 파티션)
+
+업로드한 파일을 정규화된 형태로 쌓아 두고, 기간/고객사를 골라 여러 달에 걸친 분석
+(예: 같은 규격1이 달마다 다른 세번부호로 신고된 경우)을 할 수 있게 한다.
+
+    <root>/client=<고객사(URL 인코딩)>/month=<YYYY-MM 또는 미상>/part-<id>.parquet
+    <root>/_uploads.jsonl   추가 이력 (원본 파일, 행 수, 신규/교체 건수)
+
+- 중복 제거: 같은 고객사 안에서 (수입신고번호, 란번호, 행번호)가 같으면 한 행만 남긴다
+  (기본은 새로 올린 값으로 교체, 정정 신고 반영). 키가 비어 있는 행은 그대로 둔다.
+- 조회: 고객사/수리월은 디렉터리 이름으로 먼저 걸러 필요한 파일만 열고(파티션 프루닝),
+  수리일자와 추가 조건은 pyarrow 스캐너로 넘겨 row group 통계로 건너뛴다(조건 푸시다운).
+- 타입: 파일마다 추론 타입이 달라도 합칠 수 있도록 금액/세율/수량은 실수, 키/수리일자는 정수,
+  나머지는 문자열로 저장한다.
+
+한 저장소에 동시에 쓰는 프로세스는 하나라고 가정한다 (같은 프로세스 안의 스레드는 잠금으로 직렬화).
+"""
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+from .ingest import get_input_columns, optimize_memory
+
+logger = logging.getLogger(__name__)
+
+# --- Store Settings ---
+
+STORE_DIR = os.environ.get('TRADEGUARD_STORE_DIR', 'tradeguard_store')
+STORE_KEY_COLUMNS = [COL_IMPORT_DEC_NO, COL_LINE_NO, COL_ROW_NO]
+STORE_INTEGER_COLUMNS = [COL_LINE_NO, COL_ROW_NO, COL_ACCEPTANCE_DATE]
+STORE_NUMERIC_COLUMNS = [
+    COL_TARIFF_RATE, COL_TARIFF_EXEMPTION_RATE, COL_ACTUAL_DUTY, COL_QTY_1, COL_UNIT_PRICE, COL_AMOUNT,
+    COL_LINE_PAYMENT_AMT, COL_TAXABLE_KRW, COL_TAXABLE_USD, COL_FREIGHT, COL_INPUT_FREIGHT
+]
+STORE_CLIENT_COLUMN = '고객사'
+STORE_MONTH_COLUMN = '수리월'
+STORE_UNKNOWN_MONTH = '미상'
+STORE_UPLOAD_LOG = '_uploads.jsonl'
+STORE_COMPRESSION = 'zstd'
+STORE_FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError("이력 저장소에는 pyarrow가 필요합니다 (pip install pyarrow).") from e
+    # 통합 스키마의 promote_options='permissive'는 pyarrow 14부터 지원
+    if int(pyarrow.__version__.split('.')[0]) < 14:
+        raise ImportError(f"이력 저장소에는 pyarrow 14 이상이 필요합니다 (현재 {pyarrow.__version__}).")
+
+def acceptance_ymd(series):
+    """수리일자 -> YYYYMMDD 정수 (Int64, 해석할 수 없으면 결측)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_numeric(series.dt.strftime('%Y%m%d'), errors='coerce').astype('Int64')
+    digits = series.astype(str).str.replace(r'\.0$', '', regex=True).str.replace(r'[^0-9]', '', regex=True).str[:8]
+    values = pd.to_numeric(digits.where(digits.str.len() == 8), errors='coerce').astype('Int64')
+    return values.where((values >= 19000101) & (values <= 29991231))
+
+def month_of(ymd):
+    """YYYYMMDD(Int64) -> 'YYYY-MM' (결측은 STORE_UNKNOWN_MONTH)"""
+    months = (ymd // 10000).astype(str) + '-' + (ymd // 100 % 100).astype(str).str.zfill(2)
+    return months.where(ymd.notna(), STORE_UNKNOWN_MONTH).astype(object)
+
+def _month_bound(value):
+    """'2024-03', '202403', '2024-03-15', 20240315, date -> ('YYYY-MM', YYYYMMDD 또는 None)"""
+    if value is None:
+        return None, None
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        value = value.strftime('%Y%m%d')
+    digits = ''.join(ch for ch in str(value) if ch.isdigit())
+    if len(digits) == 6:
+        return f"{digits[:4]}-{digits[4:]}", None
+    if len(digits) == 8:
+        return f"{digits[:4]}-{digits[4:6]}", int(digits)
+    raise ValueError(f"기간 형식 오류: {value} (예: 2024-03 또는 2024-03-15)")
+
+def _text(series):
+    """저장용 문자열 컬럼 (정수로 표현되는 실수는 '12.0'이 아닌 '12', 결측은 None)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if pd.api.types.is_bool_dtype(series):
+        series = series.astype(object)
+    elif pd.api.types.is_float_dtype(series):
+        finite = series.dropna()
+        if len(finite) and np.all(np.mod(finite, 1) == 0) and finite.abs().max() < 2 ** 53:
+            series = series.astype('Int64')
+    text = series.astype(str).str.strip()
+    return text.where(series.notna(), None).astype(object)
+
+def to_store_frame(df):
+    """수집된 DataFrame -> 저장 스키마 (키/수리일자 Int64, 금액류 float64, 나머지 문자열)"""
+    frame = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        series = df[col]
+        if col == COL_ACCEPTANCE_DATE:
+            frame[col] = acceptance_ymd(series)
+        elif col in STORE_INTEGER_COLUMNS:
+            frame[col] = pd.to_numeric(series, errors='coerce').round().astype('Int64')
+        elif col in STORE_NUMERIC_COLUMNS:
+            if not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series.astype(str).str.replace(',', ''), errors='coerce')
+            frame[col] = series.astype('float64')
+        elif col not in (STORE_CLIENT_COLUMN, STORE_MONTH_COLUMN):
+            frame[col] = _text(series)
+    return frame.reset_index(drop=True)
+
+def _key_index(frame):
+    """키가 모두 있는 행의 (수입신고번호, 란번호, 행번호) MultiIndex와 해당 행 마스크"""
+    keys = [c for c in STORE_KEY_COLUMNS if c in frame.columns]
+    if len(keys) < len(STORE_KEY_COLUMNS):
+        return None, pd.Series(False, index=frame.index)
+    mask = frame[keys].notna().all(axis=1)
+    return pd.MultiIndex.from_frame(frame.loc[mask, keys].astype(object)), mask
+
+def _filter_expression(filters):
+    """[(컬럼, 연산자, 값), ...] -> pyarrow.dataset 조건식 (모두 AND)"""
+    import pyarrow.dataset as ds
+    expression = None
+    for column, op, value in filters or []:
+        if op not in STORE_FILTER_OPS:
+            raise ValueError(f"지원하지 않는 조건 연산자: {op} (사용 가능: {', '.join(STORE_FILTER_OPS)})")
+        field = ds.field(column)
+        condition = {
+            '==': lambda: field == value, '!=': lambda: field != value,
+            '<': lambda: field < value, '<=': lambda: field <= value,
+            '>': lambda: field > value, '>=': lambda: field >= value,
+            'in': lambda: field.isin(list(value)), 'not in': lambda: ~field.isin(list(value))
+        }[op]()
+        expression = condition if expression is None else expression & condition
+    return expression
+
+class DeclarationStore:
+    """고객사/수리월 파티션 Parquet 저장소
+
+        store = DeclarationStore('tradeguard_store')
+        store.append(df, client='A상사', source='2024-03.xlsx')
+        df = store.load(clients=['A상사'], start='2024-01', end='2024-06')
+        results = run_analyses(df, analysis_options, {})
+    """
+
+    def __init__(self, root=STORE_DIR):
+        _require_pyarrow()
+        self.root = root
+        self._lock = threading.Lock()
+
+    # --- Layout ---
+
+    def _partition_dir(self, client, month):
+        return os.path.join(self.root, f"client={quote(str(client), safe='')}", f"month={quote(month, safe='')}")
+
+    def _partition_files(self, clients=None, start_month=None, end_month=None):
+        """조건에 맞는 파티션의 Parquet 파일 [(고객사, 수리월, 경로)] (디렉터리 이름만으로 판단)"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        wanted = {str(c) for c in clients} if clients is not None else None
+        for client_dir in sorted(os.listdir(self.root)):
+            if not client_dir.startswith('client='):
+                continue
+            client = unquote(client_dir[len('client='):])
+            if wanted is not None and client not in wanted:
+                continue
+            for month_dir in sorted(os.listdir(os.path.join(self.root, client_dir))):
+                if not month_dir.startswith('month='):
+                    continue
+                month = unquote(month_dir[len('month='):])
+                if (start_month or end_month) and month == STORE_UNKNOWN_MONTH:
+                    continue
+                if (start_month and month < start_month) or (end_month and month > end_month):
+                    continue
+                directory = os.path.join(self.root, client_dir, month_dir)
+                for name in sorted(os.listdir(directory)):
+                    if name.endswith('.parquet') and not name.startswith(('.', '_')):
+                        found.append((client, month, os.path.join(directory, name)))
+        return found
+
+    def _read_partition(self, client, month):
+        paths = [path for _, _, path in self._partition_files([client]) if os.path.dirname(path) == self._partition_dir(client, month)]
+        if not paths:
+            return None, []
+        frames = [pd.read_parquet(path) for path in paths]
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0], paths
+
+    def _write_partition(self, client, month, frame, old_paths):
+        """파티션을 새 파일 하나로 교체 (임시 파일에 쓴 뒤 이름 변경, 이후 기존 파일 삭제)"""
+        directory = self._partition_dir(client, month)
+        os.makedirs(directory, exist_ok=True)
+        if len(frame):
+            name = f"part-{uuid.uuid4().hex[:12]}.parquet"
+            temp_path = os.path.join(directory, f".{name}.tmp")
+            frame.to_parquet(temp_path, index=False, compression=STORE_COMPRESSION)
+            os.replace(temp_path, os.path.join(directory, name))
+        for path in old_paths:
+            os.remove(path)
+        if not os.listdir(directory):
+            os.rmdir(directory)
+
+    # --- Write ---
+
+    def append(self, df, client, source=None, replace=True):
+        """수집된 DataFrame을 고객사 파티션에 추가하고 처리 결과 dict 반환
+
+        replace=True면 이미 있는 키는 새 값으로 교체, False면 새 행을 버린다.
+        반환: {'client', 'rows', 'added', 'replaced', 'skipped', 'deduplicated', 'partitions': [수리월, ...]}
+        키 컬럼이 하나라도 없으면 중복을 판단할 수 없으므로 그대로 추가하고 deduplicated=False로 표시한다.
+        """
+        if not str(client).strip():
+            raise ValueError("고객사 이름이 필요합니다.")
+        client = str(client).strip()
+        # 분석 중 추가된 보조 컬럼은 저장하지 않음
+        frame = to_store_frame(df[[c for c in get_input_columns(df) if c in df.columns]])
+        months = month_of(frame[COL_ACCEPTANCE_DATE]) if COL_ACCEPTANCE_DATE in frame.columns else \
+            pd.Series(STORE_UNKNOWN_MONTH, index=frame.index, dtype=object)
+
+        # 업로드 안의 중복은 마지막 행만 유지
+        new_keys, keyed = _key_index(frame)
+        if new_keys is None:
+            missing = [c for c in STORE_KEY_COLUMNS if c not in frame.columns]
+            logger.warning(f"중복 제거 키 컬럼이 없어 그대로 추가합니다 ({client}: {', '.join(missing)} 없음)")
+        else:
+            duplicated = pd.Series(False, index=frame.index)
+            duplicated[keyed] = new_keys.duplicated(keep='last')
+            frame, months = frame[~duplicated].reset_index(drop=True), months[~duplicated].reset_index(drop=True)
+            new_keys, keyed = _key_index(frame)
+
+        with self._lock:
+            # 이미 저장된 같은 키 (수리일자가 정정되어 다른 달 파티션에 있는 경우 포함)
+            touched = set(months)
+            existing_keys = None
+            if new_keys is not None and len(new_keys):
+                existing = self.load([client], columns=STORE_KEY_COLUMNS, optimize=False)
+                if len(existing):
+                    old_keys, old_keyed = _key_index(existing)
+                    hits = old_keys.isin(new_keys)
+                    existing_keys = old_keys[hits]
+                    touched |= set(existing.loc[old_keyed, STORE_MONTH_COLUMN][hits])
+            conflict = pd.Series(False, index=frame.index)
+            if existing_keys is not None and len(existing_keys):
+                conflict[keyed] = new_keys.isin(existing_keys)
+            replaced = int(conflict.sum()) if replace else 0
+            if not replace:
+                frame, months = frame[~conflict], months[~conflict]
+
+            for month in sorted(touched):
+                part = frame[months == month]
+                old, old_paths = self._read_partition(client, month)
+                dropped = False
+                if old is not None and replace and replaced:
+                    old_keys, old_keyed = _key_index(old)
+                    if old_keys is not None:
+                        drop = pd.Series(False, index=old.index)
+                        drop[old_keyed] = old_keys.isin(existing_keys)
+                        dropped = bool(drop.any())
+                        old = old[~drop]
+                if not len(part) and not dropped:
+                    continue
+                combined = part if old is None else pd.concat([old, part], ignore_index=True) if len(part) else old
+                self._write_partition(client, month, combined.reset_index(drop=True), old_paths)
+
+            record = {
+                'client': client,
+                'rows': len(df),
+                'added': len(frame) - replaced,
+                'replaced': replaced,
+                'skipped': len(df) - len(frame),
+                'deduplicated': new_keys is not None,
+                'partitions': sorted(set(months))
+            }
+            self._log_upload(dict(record, source=source, at=datetime.datetime.now().isoformat(timespec='seconds')))
+        return record
+
+    def _log_upload(self, record):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, STORE_UPLOAD_LOG), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    # --- Read ---
+
+    def load(self, clients=None, start=None, end=None, columns=None, filters=None, optimize=True):
+        """기간/고객사 조건으로 신고 행 조회 (고객사, 수리월 컬럼 포함)
+
+        start/end는 월('2024-03') 또는 일('2024-03-15') 단위이며 양끝을 포함한다.
+        filters는 [(컬럼, 연산자, 값)] 목록 (예: [('결제통화단위', '==', 'USD')])으로 스캐너에 넘겨진다.
+        optimize=True면 수집과 같은 기준으로 메모리 보고/다운캐스팅을 적용한다.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        start_month, start_day = _month_bound(start)
+        end_month, end_day = _month_bound(end)
+        files = self._partition_files(clients, start_month, end_month)
+        if not files:
+            return pd.DataFrame(columns=list(columns or []) + [STORE_CLIENT_COLUMN, STORE_MONTH_COLUMN])
+
+        # 파일마다 컬럼 구성/정수-실수 타입이 다를 수 있으므로 통합 스키마로 스캔
+        partition_schema = pa.schema([('client', pa.string()), ('month', pa.string())])
+        schema = pa.unify_schemas([pq.read_schema(path) for _, _, path in files] + [partition_schema],
+                                  promote_options='permissive')
+        dataset = ds.dataset([path for _, _, path in files], schema=schema, format='parquet',
+                             partitioning=ds.partitioning(partition_schema, flavor='hive'),
+                             partition_base_dir=self.root)
+
+        conditions = []
+        if start_day is not None and COL_ACCEPTANCE_DATE in schema.names:
+            conditions.append((COL_ACCEPTANCE_DATE, '>=', start_day))
+        if end_day is not None and COL_ACCEPTANCE_DATE in schema.names:
+            conditions.append((COL_ACCEPTANCE_DATE, '<=', end_day))
+        expression = _filter_expression(conditions + list(filters or []))
+
+        names = [c for c in (columns or schema.names) if c in schema.names and c not in ('client', 'month')]
+        table = dataset.to_table(columns=names + ['client', 'month'], filter=expression)
+        df = table.to_pandas().rename(columns={'client': STORE_CLIENT_COLUMN, 'month': STORE_MONTH_COLUMN})
+        if optimize:
+            df.attrs['input_columns'] = json.dumps([str(c) for c in df.columns], ensure_ascii=False)
+            optimize_memory(df)
+        return df
+
+    def partitions(self):
+        """파티션 목록 DataFrame (고객사, 수리월, 파일 수, 행 수, 크기 MB)"""
+        import pyarrow.parquet as pq
+        rows = {}
+        for client, month, path in self._partition_files():
+            item = rows.setdefault((client, month), {STORE_CLIENT_COLUMN: client, STORE_MONTH_COLUMN: month,
+                                                     '파일 수': 0, '행 수': 0, '크기(MB)': 0.0})
+            item['파일 수'] += 1
+            item['행 수'] += pq.ParquetFile(path).metadata.num_rows
+            item['크기(MB)'] += os.path.getsize(path) / 1048576
+        frame = pd.DataFrame(list(rows.values()),
+                             columns=[STORE_CLIENT_COLUMN, STORE_MONTH_COLUMN, '파일 수', '행 수', '크기(MB)'])
+        frame['크기(MB)'] = frame['크기(MB)'].round(2)
+        return frame
+
+    def clients(self):
+        return sorted({client for client, _, _ in self._partition_files()})
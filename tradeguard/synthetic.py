@@ -0,0 +1,539 @@
+"""합성 수입신고 데이터 생성기 (대용량 테스트용, 정답 라벨 포함)
+
+실제 고객 데이터 없이 수집/분석/보고서 경로를 재현 가능하게 시험하기 위해
+모든 원천 COL_* 컬럼을 가진 신고 행을 청크 단위로 생성하고, 12개 Risk 규칙별 이상 건을
+주입한 뒤 정답(ground truth)을 함께 저장한다.
+
+기본 데이터는 어떤 규칙에도 걸리지 않도록 만든다.
+- 세율구분: 기본세율 8% 미만은 FTA 세율(F + 3자리, 세율 0), 8% 이상은 C
+- 규격1은 거래처 하나에 속하고 세번부호/법령코드/기본 단가가 규격별로 고정
+- 단가는 규격 기본 단가 ±5% 순환 (Z-Score 이상치 없음), 규격 기본 단가는 20 이상
+- 거래처별 결제통화 하나, EXW/FOB는 입력운임 있음, 세번 22류는 내국세부호 있음
+
+이상 건 주입 (anomaly_rate는 규칙별 대략의 행 비율)
+- 행 단위: 8% 환급(A, 적출국≠원산지), 0% 세율(E1, 세율<8), F세율(F, 세율≥8),
+  FTA 기회(A, 적출국=원산지, 세율>0 → 8% 환급에도 해당), 무상운임(FOB, 입력운임 0)
+- 규격 단위: 내국세 누락(22류, 내국세부호 없음), 용도세율(usage_rate_hsk.csv의 HSK),
+  저가(기본 단가 10 미만), 세율 위험(일부 행에 다른 세번부호), 수입요건(일부 행에 다른 법령코드),
+  단가 위험(규격별 4번째 행 단가 10배, 규격 행 수 8 이상일 때만 정답)
+- 거래처 단위: 통화단위 불일치(일부 신고의 결제통화 변경)
+
+세번부호는 파일 형식과 관계없이 같은 값으로 읽히도록 0으로 시작하지 않는 코드만 쓴다.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .constants import *
+
+# --- Generator Settings ---
+
+SYNTHETIC_FORMATS = ('csv', 'xlsx', 'parquet')
+SYNTHETIC_CHUNK_ROWS = 250000
+SYNTHETIC_RULES = ['eight_percent', 'zero_risk', 'tariff_risk', 'price_risk', 'domestic_tax', 'import_req_risk',
+                   'f_rate', 'fta_opp', 'low_price', 'currency_inc', 'free_freight', 'usage_rate']
+DEFAULT_CURRENCY_MIX = {'USD': 0.6, 'EUR': 0.15, 'CNY': 0.1, 'JPY': 0.1, 'GBP': 0.05}
+FX_KRW = {'USD': 1350.0, 'EUR': 1470.0, 'CNY': 187.0, 'JPY': 9.1, 'GBP': 1710.0, 'VND': 0.055, 'THB': 38.0}
+
+# 통화 -> 거래처 국가 후보
+CURRENCY_COUNTRIES = {
+    'USD': ['US', 'CN', 'VN', 'TH', 'IN'],
+    'EUR': ['DE', 'FR', 'IT'],
+    'CNY': ['CN'],
+    'JPY': ['JP'],
+    'GBP': ['GB'],
+    'VND': ['VN'],
+    'THB': ['TH']
+}
+# 국가 -> 기본세율 8% 미만 품목에 적용하는 FTA 세율구분
+FTA_RATE_TYPES = {'US': 'FUS1', 'CN': 'FCN1', 'VN': 'FAS1', 'TH': 'FAS1', 'IN': 'FIN1',
+                  'DE': 'FEU1', 'FR': 'FEU1', 'IT': 'FEU1', 'GB': 'FGB1', 'JP': 'FRCP'}
+RATE_DESCRIPTIONS = {'A': '기본세율', 'C': 'WTO협정세율', 'E1': '할당관세', 'F': '편익관세',
+                     'FUS1': '한-미 FTA', 'FCN1': '한-중 FTA', 'FAS1': '한-아세안 FTA', 'FIN1': '한-인도 CEPA',
+                     'FEU1': '한-EU FTA', 'FGB1': '한-영 FTA', 'FRCP': 'RCEP'}
+INCOTERMS = ['FOB', 'CIF', 'EXW', 'CFR', 'DAP']
+PAYMENT_METHODS = ['TT', 'LS', 'LC', 'DA']
+TRADE_TYPES = ['11', '11', '11', '11', '11', '11', '11', '15', '29', '87']
+PRODUCT_NAMES = ['PLASTIC PARTS', 'STEEL BOLT', 'LED MODULE', 'COTTON FABRIC', 'BEARING', 'VALVE',
+                 'CABLE ASSEMBLY', 'FILTER', 'PUMP', 'SENSOR', 'GLASS BOTTLE', 'RUBBER SEAL']
+BASIC_RATES = [0, 3, 5, 6.5, 8, 8, 10, 13]
+LAW_CODES = [('식품위생법', '수입식품등 수입신고확인증', None), ('전기용품안전관리법', '안전확인신고서', None),
+             ('화학물질관리법', '화학물질확인서', None), ('대외무역법', '원산지표시확인', '비대상')]
+KEY_COLUMNS = [COL_IMPORT_DEC_NO, COL_LINE_NO, COL_ROW_NO]
+
+# 생성 컬럼 순서 (행별관세, FTA사후환급 검토는 분석 단계에서 계산되므로 제외)
+SYNTHETIC_COLUMNS = [
+    COL_IMPORT_DEC_NO, COL_ACCEPTANCE_DATE, COL_BL_NO, COL_TRADE_TYPE, COL_TRADE_COMPANY, COL_TRADE_COUNTRY,
+    COL_LINE_NO, COL_ROW_NO, COL_HS_CODE, COL_RATE_TYPE, COL_RATE_DESC, COL_TARIFF_RATE,
+    COL_EXPORT_COUNTRY, COL_ORIGIN_COUNTRY, COL_TRADE_NAME, COL_SPEC_1, COL_SPEC_2, COL_SPEC_3,
+    COL_COMP_1, COL_COMP_2, COL_COMP_3, COL_QTY_1, COL_UNIT_1, COL_UNIT_PRICE, COL_AMOUNT,
+    COL_LINE_PAYMENT_AMT, COL_CURRENCY, COL_PAYMENT_METHOD, COL_INCOTERMS, COL_TAXABLE_USD, COL_TAXABLE_KRW,
+    COL_ACTUAL_DUTY, COL_INTERNAL_TAX_CODE, COL_LAW_CODE, COL_ISSUED_DOC_NAME, COL_NON_TARGET_REASON,
+    COL_FREIGHT, COL_FREIGHT_CURRENCY, COL_INPUT_FREIGHT, COL_CALCULATED_FREIGHT_KRW,
+    COL_TARIFF_EXEMPTION_CODE, COL_TARIFF_EXEMPTION_RATE
+]
+
+def _load_usage_hsk_codes(csv_path=USAGE_RATE_HSK_PATH):
+    """용도세율 HSK 10자리 목록 (분석과 같은 로더로 읽어 형식 오류를 숨기지 않음, 0으로 시작하지 않는 코드만)"""
+    if not os.path.exists(csv_path):
+        return []
+    from .analysis import load_usage_rate_hsk
+    return sorted(code for code in load_usage_rate_hsk(csv_path)
+                  if len(code) == 10 and code.isdigit() and not code.startswith('0'))
+
+def _zipf_weights(n, skew=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+class SyntheticDeclarationGenerator:
+    """거래처/규격 카탈로그를 만들고 신고 행을 청크 단위로 생성 (정답 라벨 누적)
+
+    정답은 규칙별 (규칙, 수입신고번호, 란번호, 행번호, 규격1, 무역거래처상호) 행으로 truth()가 반환한다.
+    """
+
+    def __init__(self, rows, seed=42, n_specs=None, n_companies=None, anomaly_rate=0.01,
+                 currency_mix=None, start_date='2024-01-01', months=12):
+        self.rows = int(rows)
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.n_specs = int(n_specs or max(60, self.rows // 200))
+        self.n_companies = int(n_companies or max(12, min(self.n_specs // 5, self.rows // 2000)))
+        self.anomaly_rate = float(anomaly_rate)
+        self.currency_mix = dict(currency_mix or DEFAULT_CURRENCY_MIX)
+        self.start_date = pd.Timestamp(start_date)
+        self.months = int(months)
+        self.usage_hsk_codes = _load_usage_hsk_codes()
+        self._build_companies()
+        self._build_specs()
+        self.generated = 0
+        self.next_decl = 0
+        self.spec_counts = np.zeros(self.n_specs, dtype=np.int64)
+        self.company_decl_counts = np.zeros(self.n_companies, dtype=np.int64)
+        self._truth_parts = []
+        self._pending = {'price_risk': [], 'tariff_risk': [], 'import_req_risk': [], 'currency_inc': []}
+        self._import_sets = {}  # 수입요건 주입 규격 -> 신고별 법령 세트 종류 집합
+        self._currency_seen = {}  # 통화 불일치 주입 거래처 -> 사용한 통화 집합
+
+    # --- Catalog ---
+
+    def _build_companies(self):
+        rng = self.rng
+        n = self.n_companies
+        currencies = list(self.currency_mix)
+        probs = np.array([self.currency_mix[c] for c in currencies], dtype=float)
+        self.company_currency = rng.choice(currencies, n, p=probs / probs.sum())
+        self.company_country = np.array([rng.choice(CURRENCY_COUNTRIES.get(c, ['US'])) for c in self.company_currency])
+        self.company_name = np.array([f"{country} SUPPLIER {i:05d} CO., LTD." for i, country in enumerate(self.company_country)],
+                                     dtype=object)
+        self.company_incoterms = rng.choice(INCOTERMS, n)
+        self.company_payment = rng.choice(PAYMENT_METHODS, n)
+        self.company_weights = _zipf_weights(n, 0.8)[rng.permutation(n)]
+        # 통화단위 불일치 주입 거래처 (거래 비중 합이 anomaly_rate 근처가 되도록 작은 거래처부터)
+        order = np.argsort(self.company_weights)
+        picked = order[np.cumsum(self.company_weights[order]) <= max(self.anomaly_rate, self.company_weights[order[0]])]
+        self.currency_inc_company = np.zeros(n, dtype=bool)
+        self.currency_inc_company[picked[:max(1, len(picked))]] = True
+        alternatives = [c for c in FX_KRW if c in currencies] or list(FX_KRW)
+        self.company_alt_currency = np.array([next(c for c in alternatives + ['USD', 'EUR'] if c != cur)
+                                              for cur in self.company_currency])
+
+    def _build_specs(self):
+        rng = self.rng
+        n = self.n_specs
+        usage = set(self.usage_hsk_codes)
+
+        # 규격 -> 거래처 (거래처별 카탈로그, 카탈로그 안에서 앞쪽 규격일수록 자주 등장)
+        spec_company = np.sort(rng.integers(0, self.n_companies, n))
+        missing = np.setdiff1d(np.arange(self.n_companies), spec_company)
+        spec_company[:len(missing)] = missing  # 모든 거래처가 규격을 하나 이상 갖도록
+        order = np.argsort(spec_company, kind='stable')
+        self.spec_company = spec_company[order]
+        self.catalog_start = np.searchsorted(self.spec_company, np.arange(self.n_companies))
+        self.catalog_size = np.bincount(self.spec_company, minlength=self.n_companies)
+
+        def random_hs(count):
+            codes = []
+            while len(codes) < count:
+                chapter = rng.integers(25, 98)
+                if chapter == 22:
+                    continue
+                code = f"{chapter:02d}{rng.integers(0, 10 ** 8):08d}"
+                if code not in usage:
+                    codes.append(code)
+            return np.array(codes, dtype=object)
+
+        self.spec_hs = random_hs(n)
+        self.spec_alt_hs = random_hs(n)
+        self.spec_basic_rate = rng.choice(BASIC_RATES, n).astype(float)
+        self.spec_base_price = np.round(rng.lognormal(4.0, 1.0, n) + 20, 2)
+        self.spec_unit = rng.choice(['EA', 'KG', 'SET', 'PCS'], n).astype(object)
+        self.spec_name = np.array([PRODUCT_NAMES[i % len(PRODUCT_NAMES)] for i in rng.integers(0, 1000, n)], dtype=object)
+        self.spec_code = np.array([f"SP-{i:06d}" for i in range(n)], dtype=object)
+        self.spec_size = np.array([f"{a}x{b}mm" for a, b in zip(rng.integers(5, 500, n), rng.integers(5, 500, n))], dtype=object)
+        self.spec_color = rng.choice(['BLACK', 'WHITE', 'GRAY', 'BLUE', None], n).astype(object)
+        self.spec_comp = rng.choice(['PP 100%', 'ABS 80% PC 20%', 'SUS304', 'COTTON 100%', 'AL6061'], n).astype(object)
+        self.spec_tax_code = np.full(n, None, dtype=object)
+        law = rng.integers(-len(LAW_CODES), len(LAW_CODES), n)  # 음수: 요건 없음
+        self.spec_law = law
+
+        # 규칙별 전용 규격 (기본 규격과 겹치지 않게 무작위 선택)
+        per_rule = max(1, int(round(self.anomaly_rate * n)))
+        # 단가 위험은 행 수가 많아야 Z-Score로 드러나므로 비중 큰 거래처의 대표 규격(카탈로그 첫 규격)에 주입
+        popular = self.catalog_start[np.argsort(-self.company_weights)]
+        popular = popular[self.catalog_size[np.argsort(-self.company_weights)] > 0][:per_rule]
+        pool = rng.permutation(np.setdiff1d(np.arange(n), popular))
+        groups = {'price_risk': popular}
+        for name in ['domestic_tax', 'domestic_ok', 'usage_rate', 'low_price', 'tariff_risk', 'import_req_risk']:
+            groups[name], pool = pool[:per_rule], pool[per_rule:]
+        self.spec_rule = np.full(n, '', dtype=object)
+        for name, idx in groups.items():
+            self.spec_rule[idx] = name
+
+        liquor_hs = np.array(['2203000000', '2204210000', '2208300000', '2208400000'], dtype=object)
+        for name in ['domestic_tax', 'domestic_ok']:
+            idx = groups[name]
+            self.spec_hs[idx] = rng.choice(liquor_hs, len(idx))
+            self.spec_unit[idx] = 'L'
+            self.spec_name[idx] = 'ALCOHOLIC BEVERAGE'
+        self.spec_tax_code[groups['domestic_ok']] = 'A10'
+        if self.usage_hsk_codes:
+            self.spec_hs[groups['usage_rate']] = rng.choice(self.usage_hsk_codes, len(groups['usage_rate']))
+        else:
+            self.spec_rule[groups['usage_rate']] = ''
+        self.spec_base_price[groups['low_price']] = np.round(rng.uniform(2, 9, len(groups['low_price'])), 2)
+        self.spec_law[groups['import_req_risk']] = rng.integers(0, len(LAW_CODES), len(groups['import_req_risk']))
+
+    # --- Rows ---
+
+    def _declarations(self, target_rows):
+        """신고 단위 구조 (신고 -> 란 1~4개 -> 행 1~3개), target_rows 이상이 되도록 생성"""
+        rng = self.rng
+        n_decl = max(1, target_rows // 4 + 1)
+        lines = rng.integers(1, 5, n_decl)
+        line_decl = np.repeat(np.arange(n_decl), lines)
+        line_no = np.arange(len(line_decl)) - np.repeat(np.cumsum(lines) - lines, lines) + 1
+        rows_per_line = rng.integers(1, 4, len(line_decl))
+        row_line = np.repeat(np.arange(len(line_decl)), rows_per_line)
+        row_no = np.arange(len(row_line)) - np.repeat(np.cumsum(rows_per_line) - rows_per_line, rows_per_line) + 1
+
+        decl_local = line_decl[row_line]
+        # 신고 경계에서 자르기 (마지막 청크만 정확히 target_rows에서 자름)
+        last_decl = decl_local[min(target_rows, len(decl_local)) - 1]
+        keep = decl_local <= last_decl
+        if self.generated + keep.sum() > self.rows:
+            keep = np.arange(len(decl_local)) < self.rows - self.generated
+        return decl_local[keep], line_no[row_line][keep], row_no[keep], int(decl_local[keep].max()) + 1
+
+    def next_chunk(self, chunk_rows=SYNTHETIC_CHUNK_ROWS):
+        """다음 청크 DataFrame (모든 행을 생성했으면 None)"""
+        remaining = self.rows - self.generated
+        if remaining <= 0:
+            return None
+        rng = self.rng
+        decl_local, line_no, row_no, n_decl = self._declarations(min(chunk_rows, remaining))
+        n = len(decl_local)
+        decl_global = self.next_decl + decl_local
+
+        # 신고 단위 속성
+        decl_company = rng.choice(self.n_companies, n_decl, p=self.company_weights)
+        decl_occ = np.zeros(n_decl, dtype=np.int64)
+        for company in np.unique(decl_company):  # 거래처별 누적 신고 순번
+            idx = np.flatnonzero(decl_company == company)
+            decl_occ[idx] = self.company_decl_counts[company] + np.arange(len(idx))
+            self.company_decl_counts[company] += len(idx)
+        days = (pd.DateOffset(months=self.months) + self.start_date - self.start_date).days
+        decl_date = self.start_date + pd.to_timedelta(rng.integers(0, max(days, 1), n_decl), unit='D')
+        decl_trade_type = rng.choice(TRADE_TYPES, n_decl)
+
+        company = decl_company[decl_local]
+        # 규격: 거래처 카탈로그 안에서 앞쪽일수록 자주 (u^2 분포)
+        spec = self.catalog_start[company] + np.minimum(
+            (self.catalog_size[company] * rng.random(n) ** 2).astype(np.int64), self.catalog_size[company] - 1)
+        occ = pd.Series(spec).groupby(spec).cumcount().to_numpy() + self.spec_counts[spec]
+        self.spec_counts += np.bincount(spec, minlength=self.n_specs)
+        rule = self.spec_rule[spec]
+
+        # 가격/수량
+        price = np.round(self.spec_base_price[spec] * (1 + 0.05 * ((occ % 3) - 1)), 2)
+        price_outlier = (rule == 'price_risk') & (occ == 3)
+        price = np.where(price_outlier, np.round(price * 10, 2), price)
+        qty = rng.integers(1, 500, n)
+        amount = np.round(price * qty, 2)
+
+        # 통화 (통화 불일치 주입 거래처는 신고 순번 홀수에서 다른 통화)
+        currency = self.company_currency[company].astype(object)
+        alt_currency = self.currency_inc_company[company] & (decl_occ[decl_local] % 2 == 1)
+        currency[alt_currency] = self.company_alt_currency[company][alt_currency]
+        fx = pd.Series(currency).map(FX_KRW).to_numpy(dtype=float)
+
+        # 세율 (기본 + 행 단위 이상 건)
+        country = self.company_country[company]
+        basic = self.spec_basic_rate[spec]
+        rate_type = np.where(basic >= 8, 'C', pd.Series(country).map(FTA_RATE_TYPES).to_numpy()).astype(object)
+        tariff_rate = np.where(basic >= 8, basic, 0.0)
+        export_country = country.astype(object)
+        origin = np.where(rng.random(n) < 0.7, country, rng.choice(list(FTA_RATE_TYPES), n)).astype(object)
+        r = self.anomaly_rate
+        category = rng.choice(6, n, p=[1 - 5 * r, r, r, r, r, r])  # 0 기본, 1 8%, 2 0%, 3 F, 4 FTA, 5 무상운임
+        other_country = np.where(country == 'KR', 'US', np.where(country == 'CN', 'VN', 'CN'))
+
+        m = category == 1
+        rate_type[m], tariff_rate[m] = 'A', np.maximum(basic[m], 8)
+        origin[m] = other_country[m]
+        m = category == 2
+        rate_type[m], tariff_rate[m] = 'E1', np.minimum(basic[m], 5)
+        m = category == 3
+        rate_type[m], tariff_rate[m] = 'F', np.maximum(basic[m], 8)
+        m = category == 4
+        rate_type[m], tariff_rate[m] = 'A', np.maximum(basic[m], 8)
+        origin[m] = export_country[m]
+
+        # 운임 (EXW/FOB는 입력운임 필요)
+        incoterms = self.company_incoterms[company].astype(object)
+        incoterms[category == 5] = 'FOB'
+        needs_freight = np.isin(incoterms, ['EXW', 'FOB'])
+        freight = np.round(amount * rng.uniform(0.02, 0.08, n), 2)
+        input_freight = np.where(needs_freight & (category != 5), freight, np.nan)
+        freight = np.where(needs_freight, freight, 0.0)
+
+        # 세번부호/요건 (세율 위험·수입요건 주입 규격은 누적 순번 5n+1 행에서 변경)
+        hs = self.spec_hs[spec].copy()
+        alt_row = (occ % 5 == 1)
+        hs_changed = (rule == 'tariff_risk') & alt_row
+        hs[hs_changed] = self.spec_alt_hs[spec][hs_changed]
+        law_idx = self.spec_law[spec].copy()
+        law_changed = (rule == 'import_req_risk') & alt_row
+        law_idx[law_changed] = (law_idx[law_changed] + 1) % len(LAW_CODES)
+        law_table = np.array(LAW_CODES + [(None, None, None)], dtype=object)
+        law = law_table[np.where(law_idx >= 0, law_idx, len(LAW_CODES))]
+
+        taxable_krw = np.round(amount * fx + np.where(needs_freight, freight * fx, 0)).astype(np.int64)
+        df = pd.DataFrame({
+            COL_IMPORT_DEC_NO: [f"{41000 + d % 97:05d}-{self.start_date.year % 100:02d}-{d:07d}M" for d in decl_global],
+            COL_ACCEPTANCE_DATE: decl_date.strftime('%Y%m%d').astype(np.int64)[decl_local],
+            COL_BL_NO: [f"BL{d:010d}" for d in decl_global],
+            COL_TRADE_TYPE: decl_trade_type[decl_local],
+            COL_TRADE_COMPANY: self.company_name[company],
+            COL_TRADE_COUNTRY: country,
+            COL_LINE_NO: line_no,
+            COL_ROW_NO: row_no,
+            COL_HS_CODE: hs,
+            COL_RATE_TYPE: rate_type,
+            COL_RATE_DESC: pd.Series(rate_type).map(RATE_DESCRIPTIONS).to_numpy(),
+            COL_TARIFF_RATE: tariff_rate,
+            COL_EXPORT_COUNTRY: export_country,
+            COL_ORIGIN_COUNTRY: origin,
+            COL_TRADE_NAME: self.spec_name[spec],
+            COL_SPEC_1: self.spec_code[spec],
+            COL_SPEC_2: self.spec_size[spec],
+            COL_SPEC_3: self.spec_color[spec],
+            COL_COMP_1: self.spec_comp[spec],
+            COL_COMP_2: None,
+            COL_COMP_3: None,
+            COL_QTY_1: qty,
+            COL_UNIT_1: self.spec_unit[spec],
+            COL_UNIT_PRICE: price,
+            COL_AMOUNT: amount,
+            COL_CURRENCY: currency,
+            COL_PAYMENT_METHOD: self.company_payment[company],
+            COL_INCOTERMS: incoterms,
+            COL_TAXABLE_KRW: taxable_krw,
+            COL_INTERNAL_TAX_CODE: self.spec_tax_code[spec],
+            COL_LAW_CODE: law[:, 0],
+            COL_ISSUED_DOC_NAME: law[:, 1],
+            COL_NON_TARGET_REASON: law[:, 2],
+            COL_FREIGHT: freight,
+            COL_FREIGHT_CURRENCY: currency,
+            COL_INPUT_FREIGHT: input_freight,
+            COL_CALCULATED_FREIGHT_KRW: np.round(freight * fx).astype(np.int64),
+            COL_TARIFF_EXEMPTION_CODE: np.where(rng.random(n) < 0.01, 'E001', None),
+        })
+        df[COL_TARIFF_EXEMPTION_RATE] = np.where(df[COL_TARIFF_EXEMPTION_CODE].notna(), 50.0, np.nan)
+        df[COL_TAXABLE_USD] = np.round(taxable_krw / FX_KRW['USD'], 2)
+        line_key = [df[COL_IMPORT_DEC_NO], df[COL_LINE_NO]]
+        df[COL_LINE_PAYMENT_AMT] = df.groupby(line_key)[COL_AMOUNT].transform('sum').round(2)
+        line_taxable = df.groupby(line_key)[COL_TAXABLE_KRW].transform('sum')
+        df[COL_ACTUAL_DUTY] = (line_taxable * tariff_rate / 100).round().astype(np.int64)
+        df = df[SYNTHETIC_COLUMNS]
+
+        # 정답 라벨
+        keys = df[KEY_COLUMNS + [COL_SPEC_1, COL_TRADE_COMPANY]]
+        row_truth = {
+            'eight_percent': np.isin(category, [1, 4]),
+            'zero_risk': category == 2,
+            'f_rate': category == 3,
+            'fta_opp': category == 4,
+            'free_freight': category == 5,
+            'domestic_tax': rule == 'domestic_tax',
+            'usage_rate': rule == 'usage_rate',
+            'low_price': rule == 'low_price'
+        }
+        for name, mask in row_truth.items():
+            if mask.any():
+                self._truth_parts.append(keys[mask].assign(rule=name))
+        self._track_pending(df, keys, spec, rule, company, alt_currency, law_changed, price_outlier, decl_local)
+
+        self.generated += n
+        self.next_decl += n_decl
+        return df
+
+    def _track_pending(self, df, keys, spec, rule, company, alt_currency, law_changed, price_outlier, decl_local):
+        """전체 데이터를 봐야 확정되는 규칙의 후보 행 보관"""
+        pending = self._pending
+        if price_outlier.any():
+            pending['price_risk'].append(keys[price_outlier].assign(_spec=spec[price_outlier]))
+        tariff = rule == 'tariff_risk'
+        if tariff.any():
+            pending['tariff_risk'].append(keys[tariff].assign(_spec=spec[tariff]))
+
+        # 통화 불일치: 주입 거래처의 모든 행, 거래처가 두 통화 이상 썼는지 누적
+        inc = self.currency_inc_company[company]
+        if inc.any():
+            pending['currency_inc'].append(keys[inc].assign(_company=company[inc]))
+            for c, cur in set(zip(company[inc], df[COL_CURRENCY].to_numpy()[inc])):
+                self._currency_seen.setdefault(c, set()).add(cur)
+
+        # 수입요건: 주입 규격이 들어간 신고별 법령 세트 종류(기본/변경/혼합)와 그 신고의 모든 행
+        imp = rule == 'import_req_risk'
+        if imp.any():
+            pairs = pd.DataFrame({'spec': spec[imp], 'decl': decl_local[imp], 'changed': law_changed[imp]})
+            kinds = pairs.groupby(['spec', 'decl'])['changed'].agg(['min', 'max'])
+            for (s, _), (lo, hi) in zip(kinds.index, kinds.to_numpy()):
+                self._import_sets.setdefault(s, set()).add((bool(lo), bool(hi)))
+            decl_spec = pairs[['decl', 'spec']].drop_duplicates()
+            rows = pd.DataFrame({'decl': decl_local}).reset_index().merge(decl_spec, on='decl')
+            pending['import_req_risk'].append(keys.iloc[rows['index'].to_numpy()].assign(_spec=rows['spec'].to_numpy()))
+
+    def truth(self):
+        """규칙별 정답 행 (rule, 수입신고번호, 란번호, 행번호, 규격1, 무역거래처상호)"""
+        parts = list(self._truth_parts)
+        pending = {name: pd.concat(items, ignore_index=True) if items else None for name, items in self._pending.items()}
+
+        if pending['price_risk'] is not None:  # 규격 행 수 8 이상이면 10배 단가의 Z-Score > 1.96
+            ok = self.spec_counts[pending['price_risk']['_spec'].to_numpy()] >= 8
+            parts.append(pending['price_risk'][ok].drop(columns='_spec').assign(rule='price_risk'))
+        if pending['tariff_risk'] is not None:  # 순번 1 행이 있으면(2행 이상) 세번부호 2개
+            ok = self.spec_counts[pending['tariff_risk']['_spec'].to_numpy()] >= 2
+            parts.append(pending['tariff_risk'][ok].drop(columns='_spec').assign(rule='tariff_risk'))
+        if pending['currency_inc'] is not None:
+            multi = [c for c, seen in self._currency_seen.items() if len(seen) > 1]
+            ok = pending['currency_inc']['_company'].isin(multi)
+            parts.append(pending['currency_inc'][ok].drop(columns='_company').assign(rule='currency_inc'))
+        if pending['import_req_risk'] is not None:
+            risky = [s for s, kinds in self._import_sets.items() if len(kinds) > 1]
+            ok = pending['import_req_risk']['_spec'].isin(risky)
+            parts.append(pending['import_req_risk'][ok].drop(columns='_spec').assign(rule='import_req_risk'))
+
+        columns = ['rule'] + KEY_COLUMNS + [COL_SPEC_1, COL_TRADE_COMPANY]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(parts, ignore_index=True)[columns].drop_duplicates(['rule'] + KEY_COLUMNS)
+
+    def params(self):
+        return {
+            'rows': self.rows, 'seed': self.seed, 'specs': self.n_specs, 'companies': self.n_companies,
+            'anomaly_rate': self.anomaly_rate, 'currency_mix': self.currency_mix,
+            'start_date': self.start_date.strftime('%Y-%m-%d'), 'months': self.months
+        }
+
+# --- Writers ---
+
+def _parquet_schema(df):
+    import pyarrow as pa
+    fields = []
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]):
+            fields.append(pa.field(col, pa.int64()))
+        elif pd.api.types.is_float_dtype(df[col]):
+            fields.append(pa.field(col, pa.float64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+def generate_synthetic_data(out_prefix, rows, formats=('csv',), chunk_rows=SYNTHETIC_CHUNK_ROWS, **kwargs):
+    """합성 데이터를 청크 단위로 out_prefix.{csv,xlsx,parquet}에 쓰고 정답 파일 저장
+
+    정답: out_prefix.truth.csv (규칙별 행 키), out_prefix.truth.json (생성 조건, 규칙별 행/신고 수)
+    반환값은 생성된 파일 경로 목록.
+    """
+    formats = tuple(formats)
+    unknown = [f for f in formats if f not in SYNTHETIC_FORMATS]
+    if unknown:
+        raise ValueError(f"지원하지 않는 형식: {', '.join(unknown)}")
+    if 'xlsx' in formats and rows > 1048575:
+        raise ValueError("XLSX는 시트당 1,048,575행까지만 쓸 수 있습니다 (csv/parquet를 사용하세요).")
+
+    generator = SyntheticDeclarationGenerator(rows, **kwargs)
+    os.makedirs(os.path.dirname(os.path.abspath(out_prefix)), exist_ok=True)
+    paths = {fmt: f"{out_prefix}.{fmt}" for fmt in formats}
+    parquet_writer = workbook = worksheet = None
+    written = 0
+    try:
+        while True:
+            df = generator.next_chunk(chunk_rows)
+            if df is None:
+                break
+            if 'csv' in paths:
+                df.to_csv(paths['csv'], mode='w' if written == 0 else 'a', header=written == 0, index=False,
+                          encoding='utf-8-sig' if written == 0 else 'utf-8')
+            if 'parquet' in paths:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if parquet_writer is None:
+                    schema = _parquet_schema(df)
+                    parquet_writer = pq.ParquetWriter(paths['parquet'], schema, compression='zstd')
+                parquet_writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            if 'xlsx' in paths:
+                import xlsxwriter
+                if workbook is None:
+                    workbook = xlsxwriter.Workbook(paths['xlsx'], {'constant_memory': True})
+                    worksheet = workbook.add_worksheet('수입신고')
+                    worksheet.write_row(0, 0, list(df.columns))
+                    text_format = workbook.add_format({'num_format': '@'})
+                    worksheet.set_column(df.columns.get_loc(COL_HS_CODE), df.columns.get_loc(COL_HS_CODE), 12, text_format)
+                values = df.astype(object).where(df.notna(), None).to_numpy()
+                for i, row in enumerate(values, start=written + 1):
+                    worksheet.write_row(i, 0, row)
+            written += len(df)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if workbook is not None:
+            workbook.close()
+
+    truth = generator.truth()
+    truth.to_csv(f"{out_prefix}.truth.csv", index=False, encoding='utf-8-sig')
+    summary = {
+        'params': generator.params(),
+        'files': list(paths.values()),
+        'rules': {rule: {'rows': int((truth['rule'] == rule).sum()),
+                         'declarations': int(truth.loc[truth['rule'] == rule, COL_IMPORT_DEC_NO].nunique())}
+                  for rule in SYNTHETIC_RULES}
+    }
+    with open(f"{out_prefix}.truth.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return list(paths.values()) + [f"{out_prefix}.truth.csv", f"{out_prefix}.truth.json"]
+
+def evaluate_against_truth(results, truth):
+    """분석 결과를 정답과 비교한 규칙별 정밀도/재현율
+
+    결과에 있는 가장 구체적인 키(수입신고번호 > 규격1 > 무역거래처상호) 단위로 집합을 비교한다.
+    """
+    rows = []
+    for rule in SYNTHETIC_RULES:
+        data = results.get(rule)
+        expected_rows = truth[truth['rule'] == rule]
+        key = next((c for c in [COL_IMPORT_DEC_NO, COL_SPEC_1, COL_TRADE_COMPANY]
+                    if data is not None and c in data.columns), COL_IMPORT_DEC_NO)
+        expected = set(expected_rows[key].astype(str))
+        found = set(data[key].astype(str)) if data is not None and key in data.columns else set()
+        tp = len(expected & found)
+        rows.append({
+            '규칙': rule, '비교 기준': key, '정답': len(expected), '탐지': len(found),
+            'TP': tp, 'FP': len(found - expected), 'FN': len(expected - found),
+            '정밀도': round(tp / len(found), 4) if found else (1.0 if not expected else 0.0),
+            '재현율': round(tp / len(expected), 4) if expected else 1.0
+        })
+    return pd.DataFrame(rows)